@@ -0,0 +1,261 @@
+"""
+🧱 콜드 스타트용 모델/데이터 산출물
+
+    python artifacts.py build-artifacts [--out DIR]
+
+- CSV (상권, 예측 입력 벡터, 지하철) → 컬럼별 .npy
+  (숫자형은 원래 dtype 그대로, 문자열은 고정폭 유니코드 + 결측 마스크)
+- 0520_encoders.pkl → 인코더별 classes_ .npy
+- XGBoost 모델 pkl → 트리 노드 배열 .npy (tree_ensemble.TreeEnsemble 로 xgboost 없이 채점)
+
+서버는 meta.json 의 digest 가 원본 파일과 같을 때만 산출물을 쓰고 (아니면 원본 CSV/pkl 로드),
+원본 파일의 (크기, mtime) 이 빌드 때 기록한 fingerprint 와 같으면 내용 해시는 건너뛴다.
+.npy 는 mmap 으로 열어서 같은 산출물을 쓰는 워커들이 페이지 캐시를 공유한다.
+산출물 경로는 xgboost/sklearn 을 import 하지 않는다 (둘이 콜드 스타트 import 시간의 대부분).
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from tree_ensemble import TreeEnsemble
+
+ARTIFACT_DIR = os.environ.get(
+    "ARTIFACT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts")
+)
+# 산출물 구조가 바뀌면 올린다 (다른 버전 산출물은 무시)
+ARTIFACT_FORMAT = 2
+
+
+def write_table(df, table_dir):
+    """DataFrame → 컬럼별 .npy, 컬럼 메타 목록 반환"""
+    import pandas as pd
+
+    os.makedirs(table_dir, exist_ok=True)
+    columns = []
+    for k, (name, series) in enumerate(df.items()):
+        values = series.to_numpy()
+        entry = {"name": name, "file": f"{k}.npy"}
+        path = os.path.join(table_dir, entry["file"])
+        if values.dtype.kind in "biuf":
+            entry["kind"] = "numeric"
+            np.save(path, values)
+        else:
+            missing = pd.isna(series).to_numpy()
+            present = values[~missing]
+            if all(isinstance(v, str) for v in present):
+                entry["kind"] = "string"
+                np.save(path, np.where(missing, "", values).astype(str))
+                if missing.any():
+                    entry["mask"] = f"{k}.mask.npy"
+                    np.save(os.path.join(table_dir, entry["mask"]), missing)
+            else:
+                # 문자열/숫자가 섞인 컬럼은 그대로 피클 (mmap 불가)
+                entry["kind"] = "object"
+                np.save(path, values.astype(object), allow_pickle=True)
+        columns.append(entry)
+    return columns
+
+
+def read_table(table_dir, columns):
+    """컬럼별 .npy → DataFrame (숫자형 컬럼은 mmap 배열을 복사 없이 그대로 사용)"""
+    import pandas as pd
+
+    data = {}
+    for entry in columns:
+        path = os.path.join(table_dir, entry["file"])
+        if entry["kind"] == "numeric":
+            data[entry["name"]] = np.load(path, mmap_mode="r")
+        elif entry["kind"] == "string":
+            values = np.load(path, mmap_mode="r").astype(object)
+            if "mask" in entry:
+                values[np.load(os.path.join(table_dir, entry["mask"]))] = np.nan
+            data[entry["name"]] = values
+        else:
+            data[entry["name"]] = np.load(path, allow_pickle=True)
+    return pd.DataFrame(data, copy=False)
+
+
+class ClassEncoder:
+    """
+    LabelEncoder 의 classes_ 만으로 transform 하는 경량 인코더 (sklearn 없이 로드)
+    """
+
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes, dtype=object)
+        self._table = {value: i for i, value in enumerate(self.classes_)}
+
+    def transform(self, y):
+        y = np.asarray(y, dtype=object).ravel()
+        unseen = [value for value in y if value not in self._table]
+        if unseen:
+            raise ValueError(f"y contains previously unseen labels: {np.unique(np.asarray(unseen, dtype=object))}")
+        return np.array([self._table[value] for value in y], dtype=np.int64)
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y, dtype=np.intp)]
+
+
+def flatten_encoders(encoders, prefix=()):
+    """{이름: LabelEncoder 또는 하위 dict} → [(경로 튜플, classes_), ...]"""
+    items = []
+    for key, value in encoders.items():
+        if isinstance(value, dict):
+            items.extend(flatten_encoders(value, prefix + (key,)))
+        elif hasattr(value, "classes_"):
+            items.append((prefix + (key,), value.classes_))
+        else:
+            raise ValueError(f"지원하지 않는 인코더 타입: {'/'.join(prefix + (key,))} ({type(value).__name__})")
+    return items
+
+
+def write_ensemble(ensemble, model_dir):
+    """TreeEnsemble → 노드 배열별 .npy, 메타 반환"""
+    os.makedirs(model_dir)
+    for name in TreeEnsemble.ARRAYS:
+        np.save(os.path.join(model_dir, f"{name}.npy"), getattr(ensemble, name))
+    return {"feature_names": ensemble.feature_names_in_.tolist(), "base_score": float(ensemble.base_score)}
+
+
+def read_ensemble(model_dir, entry):
+    arrays = {name: np.load(os.path.join(model_dir, f"{name}.npy"), mmap_mode="r") for name in TreeEnsemble.ARRAYS}
+    return TreeEnsemble(entry["feature_names"], entry["base_score"], **arrays)
+
+
+class Artifacts:
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = meta
+
+    def compatible(self, digest):
+        return self.meta.get("format") == ARTIFACT_FORMAT and self.meta.get("digest") == digest
+
+    def recorded_digest(self, fingerprint):
+        """원본 파일 fingerprint 가 빌드 때와 같으면 그때 계산한 digest (다르면 None → 다시 해시)"""
+        if self.meta.get("fingerprint") != fingerprint:
+            return None
+        return self.meta.get("digest")
+
+    def table(self, name):
+        entry = self.meta["tables"][name]
+        return read_table(os.path.join(self.path, "tables", name), entry["columns"])
+
+    def encoders(self):
+        result = {}
+        for entry in self.meta["encoders"]:
+            classes = np.load(os.path.join(self.path, entry["file"]), mmap_mode="r")
+            node = result
+            for key in entry["path"][:-1]:
+                node = node.setdefault(key, {})
+            node[entry["path"][-1]] = ClassEncoder(classes)
+        return result
+
+    def model(self, source_name):
+        entry = self.meta["models"][source_name]
+        return read_ensemble(os.path.join(self.path, entry["dir"]), entry)
+
+
+def open_artifacts(path=ARTIFACT_DIR):
+    """산출물 디렉터리 열기 (없으면 None)"""
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return Artifacts(path, meta)
+
+
+def staging_dir(out_dir):
+    """out_dir 옆의 빈 임시 디렉터리 (빌드는 여기에 하고 swap_dir 로 교체)"""
+    tmp_dir = f"{out_dir.rstrip(os.sep)}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    return tmp_dir
+
+
+def swap_dir(tmp_dir, out_dir):
+    """
+    다 만든 tmp_dir 로 out_dir 를 통째로 교체.
+    기존 파일은 덮어쓰지 않고 디렉터리째 치우므로, 실행 중인 서버가 mmap 해 둔 옛 파일은 그대로 남는다.
+    """
+    old_dir = f"{out_dir.rstrip(os.sep)}.old-{os.getpid()}"
+    if os.path.exists(out_dir):
+        os.rename(out_dir, old_dir)
+    os.rename(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def build_artifacts(base_dir, out_dir=ARTIFACT_DIR):
+    """
+    원본 CSV/pkl → 산출물. 임시 디렉터리에 다 쓴 뒤 통째로 교체해서
+    서버가 반쯤 쓴 산출물을 읽지 않게 한다 (이미 mmap 한 이전 파일은 그대로 유효).
+    """
+    import joblib
+    import pandas as pd
+
+    from registry import (
+        AREA_PATH, ENCODER_PATH, FEATURE_PATH, MODEL_PATHS, SUBWAY_PATH, data_digest, load_dataframe,
+        source_fingerprint
+    )
+
+    started = time.time()
+    fingerprint = source_fingerprint(base_dir)
+    digest = data_digest(base_dir)
+    tmp_dir = staging_dir(out_dir)
+
+    meta = {"format": ARTIFACT_FORMAT, "digest": digest, "fingerprint": fingerprint,
+            "tables": {}, "encoders": [], "models": {}}
+
+    sources = {
+        "features": lambda: pd.read_csv(os.path.join(base_dir, FEATURE_PATH)),
+        "area": lambda: load_dataframe(os.path.join(base_dir, AREA_PATH)),
+        "subway": lambda: load_dataframe(os.path.join(base_dir, SUBWAY_PATH)),
+    }
+    for name, load in sources.items():
+        df = load()
+        columns = write_table(df, os.path.join(tmp_dir, "tables", name))
+        meta["tables"][name] = {"rows": len(df), "columns": columns}
+        print(f"📄 {name}: {len(df)}행 {len(columns)}열")
+
+    os.makedirs(os.path.join(tmp_dir, "encoders"))
+    for k, (path, classes) in enumerate(flatten_encoders(joblib.load(os.path.join(base_dir, ENCODER_PATH)))):
+        file = os.path.join("encoders", f"{k}.npy")
+        classes = np.asarray(classes)
+        if classes.dtype == object and all(isinstance(v, str) for v in classes):
+            classes = classes.astype(str)
+        np.save(os.path.join(tmp_dir, file), classes)
+        meta["encoders"].append({"path": list(path), "file": file})
+    print(f"🔤 인코더: {len(meta['encoders'])}개")
+
+    os.makedirs(os.path.join(tmp_dir, "models"))
+    for k, model_path in enumerate(sorted(set(MODEL_PATHS.values()))):
+        ensemble = TreeEnsemble.from_model(joblib.load(os.path.join(base_dir, model_path)))
+        model_dir = os.path.join("models", str(k))
+        meta["models"][model_path] = {"dir": model_dir, **write_ensemble(ensemble, os.path.join(tmp_dir, model_dir))}
+    print(f"🌲 모델: {len(meta['models'])}개 (트리 노드 배열)")
+
+    meta["built_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    swap_dir(tmp_dir, out_dir)
+    print(f"✅ 산출물 빌드 완료: {out_dir} ({time.time() - started:.1f}s, digest {digest})")
+    return meta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="콜드 스타트용 모델/데이터 산출물 빌드")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build-artifacts", help="CSV/인코더 → .npy, 모델 → 트리 노드 배열")
+    build.add_argument("--out", default=ARTIFACT_DIR, help="출력 디렉터리")
+    args = parser.parse_args(argv)
+
+    from registry import BASE_DIR
+    build_artifacts(BASE_DIR, args.out)
+
+
+if __name__ == "__main__":
+    main()
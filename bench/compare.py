@@ -0,0 +1,62 @@
+"""
+📊 벤치마크 결과 비교
+
+같은 종류(load/micro)의 결과 JSON 두 개를 받아 지표별 이전 → 이후 값과 비율을 출력한다.
+
+    python -m bench.compare bench/results/micro-A.json bench/results/micro-B.json
+"""
+import argparse
+import json
+
+# 값이 클수록 좋은 지표 (나머지는 작을수록 좋음)
+HIGHER_IS_BETTER = ("throughput_rps",)
+
+
+def flatten(value, prefix=""):
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            out.update(flatten(v, f"{prefix}.{k}" if prefix else str(k)))
+        return out
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def compare(before, after):
+    a = flatten({k: v for k, v in before.items() if k != "config"})
+    b = flatten({k: v for k, v in after.items() if k != "config"})
+    rows = []
+    for key in sorted(a.keys() & b.keys()):
+        if key.endswith((".repeat", ".count")) or ".status." in key:
+            continue
+        ratio = b[key] / a[key] if a[key] else None
+        rows.append((key, a[key], b[key], ratio))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="벤치마크 결과 비교")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args(argv)
+
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+    if before.get("kind") != after.get("kind"):
+        raise SystemExit(f"❌ 결과 종류가 다릅니다: {before.get('kind')} vs {after.get('kind')}")
+
+    width = max((len(key) for key, *_ in compare(before, after)), default=10)
+    for key, old, new, ratio in compare(before, after):
+        mark = ""
+        if ratio is not None:
+            better = ratio > 1 if key.split(".")[-1] in HIGHER_IS_BETTER else ratio < 1
+            mark = "✅" if better and abs(ratio - 1) > 0.05 else ("⚠️" if abs(ratio - 1) > 0.05 else "")
+        ratio_text = f"x{ratio:.3f}" if ratio is not None else "-"
+        print(f"{key:{width}s} {old:>14.3f} → {new:>14.3f}  {ratio_text:>8s} {mark}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+🚦 부하 재생 드라이버
+
+로컬 스텁을 업스트림으로 붙인 gunicorn(--preload) 위에서 앱을 띄우고,
+합성 요청을 정해진 동시성으로 보내 처리량, p50/p95/p99 지연, 워커별 RSS, 콜드 스타트 시간을
+측정해 JSON 으로 저장한다.
+
+gunicorn 이 필요하다 (requirements.txt). 상권 통합 CSV 가 없는 환경에서는 합성 데이터로 돌린다.
+
+    pip install -r requirements.txt
+    python -m bench.synthetic --out /tmp/flask-proxy-data
+    python -m bench.load --target mixed --concurrency 8 --requests 500 --workers 2 --threads 4 \
+        --data-dir /tmp/flask-proxy-data
+
+예측 풀 과부하(503 + Retry-After) 확인: 예측을 무겁게 하고 풀을 작게 잡는다
+
+    python -m bench.load --target mixed --predict-ratio 0.7 --concurrency 24 --requests 300 --workers 1 \
+        --threads 8 --predict-radius 1200 --no-cache --server-env PREDICT_WORKERS=2 \
+        --data-dir /tmp/flask-proxy-data
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import urllib3
+
+from bench.requests_gen import RequestGenerator
+from bench.upstream_stub import start_stub
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT_DIR, "bench", "results")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def summarize(latencies):
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else None,
+        "p50_ms": round(percentile(values, 50) * 1000, 3) if values else None,
+        "p95_ms": round(percentile(values, 95) * 1000, 3) if values else None,
+        "p99_ms": round(percentile(values, 99) * 1000, 3) if values else None,
+        "max_ms": round(values[-1] * 1000, 3) if values else None,
+    }
+
+
+def rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def child_pids(parent_pid):
+    children = []
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            if int(fields[1]) == parent_pid:
+                children.append(int(name))
+        except (OSError, IndexError, ValueError):
+            continue
+    return children
+
+
+class Server:
+    def __init__(self, workers, threads, env):
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        cmd = [
+            sys.executable, "-m", "gunicorn", "--preload",
+            "-w", str(workers), "--threads", str(threads),
+            "-b", f"127.0.0.1:{self.port}", "proxy:app",
+        ]
+        # 예측 풀의 요청 수 상한이 실제 요청 스레드 수를 기준으로 잡히도록
+        env = dict(env, REQUEST_THREADS=str(threads))
+        self.started = time.perf_counter()
+        self.proc = subprocess.Popen(cmd, cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def wait_ready(self, http, timeout=120):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError("gunicorn 이 시작 중에 종료되었습니다")
+            try:
+                if http.request("GET", f"{self.base_url}/api/proxy/stats", retries=False).status == 200:
+                    return time.perf_counter() - self.started
+            except urllib3.exceptions.HTTPError:
+                pass
+            time.sleep(0.05)
+        raise TimeoutError("gunicorn 준비 시간 초과")
+
+    def worker_rss(self):
+        return {pid: rss_kb(pid) for pid in child_pids(self.proc.pid)}
+
+    def stop(self):
+        self.proc.send_signal(signal.SIGTERM)
+        try:
+            self.proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+def send(http, base_url, kind, payload):
+    started = time.perf_counter()
+    if kind == "predict":
+        response = http.request(
+            "POST", f"{base_url}/api/predict", body=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, retries=False,
+        )
+    else:
+        response = http.request("GET", f"{base_url}/api/proxy?{urlencode(payload)}", retries=False)
+    return kind, response.status, time.perf_counter() - started, response.headers.get("Retry-After")
+
+
+def run(args):
+    _, stub, stub_url = start_stub(latency=args.stub_latency, total=args.stub_total, item_bytes=args.stub_item_bytes)
+
+    env = dict(os.environ, STORE_LIST_URL=stub_url)
+    if args.data_dir:
+        env["DATA_DIR"] = os.path.abspath(args.data_dir)
+    if args.no_cache:
+        env["PROXY_CACHE_MAX_BYTES"] = "0"
+        env["PREDICT_CACHE_MAX_BYTES"] = "0"
+    for item in args.server_env:
+        name, _, value = item.partition("=")
+        env[name] = value
+
+    http = urllib3.PoolManager(maxsize=args.concurrency + 2, timeout=urllib3.Timeout(connect=5, read=120))
+    server = Server(args.workers, args.threads, env)
+    try:
+        ready_s = server.wait_ready(http)
+
+        gen = RequestGenerator(seed=args.seed, repeat_ratio=args.repeat_ratio)
+
+        def next_request():
+            if args.target == "mixed":
+                kind, payload = gen.mixed(args.predict_ratio)
+            else:
+                kind, payload = args.target, getattr(gen, args.target)()
+            if kind == "predict" and args.predict_radius:
+                payload["radius"] = args.predict_radius
+            return kind, payload
+
+        # 🧊 첫 요청 (콜드 캐시) 지연
+        kind, payload = next_request()
+        _, _, first_s, _ = send(http, server.base_url, kind, payload)
+
+        for _ in range(args.warmup):
+            send(http, server.base_url, *next_request())
+
+        workload = [next_request() for _ in range(args.requests)]
+        results = []
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            futures = [pool.submit(send, http, server.base_url, kind, payload) for kind, payload in workload]
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(("error", type(e).__name__, None, None))
+        wall = time.perf_counter() - started
+
+        rss = server.worker_rss()
+        # 예측 풀 통계 (응답한 워커의 값): 거절/마감 초과 수
+        response = http.request("GET", f"{server.base_url}/api/predict/stats", retries=False)
+        pool_stats = json.loads(response.data).get("pool") if response.status == 200 else None
+    finally:
+        server.stop()
+
+    by_kind = {}
+    for kind, status, latency, retry_after in results:
+        entry = by_kind.setdefault(kind, {"latencies": [], "status": {}, "retry_after": {}})
+        entry["status"][str(status)] = entry["status"].get(str(status), 0) + 1
+        if retry_after is not None:
+            entry["retry_after"][retry_after] = entry["retry_after"].get(retry_after, 0) + 1
+        if latency is not None:
+            entry["latencies"].append(latency)
+
+    all_latencies = [latency for _, _, latency, _ in results if latency is not None]
+    return {
+        "kind": "load",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "cold_start": {"ready_s": round(ready_s, 3), "first_request_s": round(first_s, 3)},
+        "throughput_rps": round(len(results) / wall, 2) if wall else None,
+        "wall_s": round(wall, 3),
+        "latency": summarize(all_latencies),
+        "by_kind": {
+            kind: {"status": entry["status"], "retry_after": entry["retry_after"], "latency": summarize(entry["latencies"])}
+            for kind, entry in by_kind.items()
+        },
+        "worker_rss_kb": rss,
+        "predict_pool": pool_stats,
+        "upstream_requests": stub.requests,
+    }
+
+
+def save(result, out):
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, f"{result['kind']}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="/api/predict, /api/proxy 부하 재생")
+    parser.add_argument("--target", choices=["predict", "proxy", "mixed"], default="mixed")
+    parser.add_argument("--predict-ratio", type=float, default=0.3, help="mixed 에서 predict 비율")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn 워커 수")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn 워커당 스레드 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat-ratio", type=float, default=0.0, help="같은 위치 재요청 비율")
+    parser.add_argument("--no-cache", action="store_true", help="proxy/predict 캐시 끄기")
+    parser.add_argument("--stub-latency", type=float, default=0.05)
+    parser.add_argument("--stub-total", type=int, default=350)
+    parser.add_argument("--stub-item-bytes", type=int, default=0)
+    parser.add_argument("--data-dir", default=None, help="모델/데이터 디렉터리 (DATA_DIR, 예: bench.synthetic 출력)")
+    parser.add_argument("--predict-radius", type=int, default=None, help="predict 요청의 주변 탐색 반경 (m)")
+    parser.add_argument("--server-env", action="append", default=[], metavar="NAME=VALUE",
+                        help="서버 환경 변수 (예: PREDICT_WORKERS=2, 여러 번 지정 가능)")
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본: bench/results/)")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    path = save(result, args.out)
+    print(json.dumps({k: result[k] for k in ("cold_start", "throughput_rps", "latency", "by_kind", "predict_pool")},
+                     ensure_ascii=False, indent=2))
+    print(f"💾 결과 저장: {path}")
+
+
+if __name__ == "__main__":
+    main()
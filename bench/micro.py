@@ -0,0 +1,135 @@
+"""
+⏱️ 예측 파이프라인 단계별 마이크로 벤치마크
+
+최근접 상권/지하철역 조회, 피처 조립, model.predict, 요일/시간대 보정을 각각 반복 측정해
+JSON 으로 저장한다 (bench.compare 로 이전 결과와 비교).
+
+    python -m bench.micro --repeat 200
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from bench.load import save
+from bench.requests_gen import RequestGenerator
+from predictor import (
+    adaptive_neighbours, change_encoder_for, find_nearest_area, find_nearest_areas, find_nearest_station,
+    find_nearest_stations, offset_latlon, predict_location, score_neighbours
+)
+from registry import INDUSTRY_CODE_MAP, ModelRegistry
+
+
+def timeit(fn, repeat):
+    fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples = np.array(samples) * 1e6
+    return {
+        "repeat": repeat,
+        "mean_us": round(float(samples.mean()), 2),
+        "p50_us": round(float(np.percentile(samples, 50)), 2),
+        "p95_us": round(float(np.percentile(samples, 95)), 2),
+        "min_us": round(float(samples.min()), 2),
+    }
+
+
+def grid_points(lat, lon, radius=300, step=30):
+    offsets = np.arange(-radius, radius + 1, step)
+    return offset_latlon(lat, lon, np.repeat(offsets, len(offsets)), np.tile(offsets, len(offsets)))
+
+
+def run(args):
+    started = time.perf_counter()
+    snap = ModelRegistry(reload_interval=0).get()
+    load_s = time.perf_counter() - started
+
+    gen = RequestGenerator(seed=args.seed)
+    req = gen.predict()
+    lat, lon = req["lat"], req["lon"]
+    category = INDUSTRY_CODE_MAP[args.industry]
+    days, (start_time, end_time) = req["day_of_week"], map(int, req["time_range"].split("-"))
+    lats, lons = grid_points(lat, lon)
+
+    model = snap.model_for(category)
+    store = snap.feature_stores[category]
+    nearest, _ = find_nearest_area(snap, lat, lon)
+    area_idx, _ = find_nearest_areas(snap, lats, lons)
+    codes = snap.df["상권_코드"].to_numpy()[area_idx]
+    rows = [r for r in (store.row_of(code) for code in codes) if r is not None] or [0]
+    n = len(rows)
+    stat_names, stat_dist, stat_traffic = find_nearest_stations(snap, lats[:n], lons[:n])
+    X = store.assemble(rows, stat_dist, stat_traffic, np.zeros(n, dtype=int), np.full(n, 10.0), seasonal=True)
+    X1 = X[:1]
+
+    weights = snap.bojeong.temporal_weights(days, start_time, end_time)
+    profile_idx = snap.profiles.lookup(nearest["상권_코드_명"], category)
+    df_basis = snap.bojeong.get_sales_distribution_basis(snap.df, nearest["상권_코드_명"], category)
+    df_basis = df_basis.dropna(subset=["점포_당_매출_금액"])
+    change_encoder = change_encoder_for(snap, category)
+
+    cases = {
+        "nearest_area_single": lambda: find_nearest_area(snap, lat, lon),
+        f"nearest_area_batch_{len(lats)}": lambda: find_nearest_areas(snap, lats, lons),
+        "station_single": lambda: find_nearest_station(snap, lat, lon),
+        f"station_batch_{len(lats)}": lambda: find_nearest_stations(snap, lats, lons),
+        f"feature_assembly_{n}": lambda: store.assemble(rows, stat_dist, stat_traffic, np.zeros(n, dtype=int),
+                                                        np.full(n, 10.0), seasonal=True),
+        "model_predict_1": lambda: model.predict(store.frame(X1)),
+        f"model_predict_{n}": lambda: model.predict(store.frame(X)),
+        "temporal_corrections_dataframe": lambda: snap.bojeong.apply_temporal_corrections(
+            1e7, df_basis, days, start_time, end_time),
+    }
+    if profile_idx is not None:
+        cases["temporal_profile_lookup"] = lambda: snap.bojeong.apply_temporal_profile(
+            1e7, snap.profiles, profile_idx, weights)
+    cases["score_neighbours"] = lambda: score_neighbours(
+        snap, model, change_encoder, category, lat, lon, 1e7, weights)
+    cases["adaptive_neighbours_300"] = lambda: adaptive_neighbours(
+        snap, model, change_encoder, category, lat, lon, 1e7, weights)
+    cases["adaptive_neighbours_1000"] = lambda: adaptive_neighbours(
+        snap, model, change_encoder, category, lat, lon, 1e7, weights, radius=1000)
+    cases["predict_location"] = lambda: predict_location(
+        snap, lat, lon, category, days, start_time, end_time, req["store_count"])
+
+    results = {}
+    for name, fn in cases.items():
+        if args.only and args.only not in name:
+            continue
+        slow = name.startswith(("score_", "adaptive_", "predict_location"))
+        repeat = max(1, args.repeat // 10) if slow else args.repeat
+        try:
+            results[name] = timeit(fn, repeat)
+        except Exception as e:
+            results[name] = {"error": str(e)}
+        print(f"{name:40s} {results[name]}")
+
+    return {
+        "kind": "micro",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "load_s": round(load_s, 3),
+        "input": {"lat": lat, "lon": lon, "업종": category},
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="예측 파이프라인 마이크로 벤치마크")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--industry", default="I201", choices=sorted(INDUSTRY_CODE_MAP))
+    parser.add_argument("--only", default=None, help="이름에 이 문자열이 들어간 항목만 측정")
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본: bench/results/)")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    print(f"💾 결과 저장: {save(result, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+🎲 /api/predict, /api/proxy 합성 요청 생성기
+
+광진구 경계 안의 위경도와 업종/영업시간/요일 조합을 시드 고정으로 섞어서 만든다.
+"""
+import random
+
+# 광진구 대략적인 경계 (지하철역/상권 좌표 분포 기준)
+DISTRICT_BOUNDS = {"lat_min": 37.528, "lat_max": 37.568, "lon_min": 127.058, "lon_max": 127.110}
+
+INDUSTRY_CODES = ["I212", "I201", "I202"]
+TIME_RANGES = ["6-14", "11-21", "17-24", "0-24", "9-18", "11-14"]
+DAY_SETS = [
+    ["월", "화", "수", "목", "금"],
+    ["토", "일"],
+    ["월", "화", "수", "목", "금", "토", "일"],
+    ["금", "토"],
+    ["수"],
+]
+RADII = [300, 500, 1000]
+
+
+class RequestGenerator:
+    def __init__(self, seed=0, bounds=DISTRICT_BOUNDS, repeat_ratio=0.0):
+        """
+        repeat_ratio: 이미 만든 위치를 다시 쓰는 비율 (같은 핀을 다시 찍는 트래픽 재현)
+        """
+        self.rng = random.Random(seed)
+        self.bounds = bounds
+        self.repeat_ratio = repeat_ratio
+        self._seen = []
+
+    def location(self):
+        if self._seen and self.rng.random() < self.repeat_ratio:
+            return self.rng.choice(self._seen)
+        b = self.bounds
+        loc = (
+            round(self.rng.uniform(b["lat_min"], b["lat_max"]), 6),
+            round(self.rng.uniform(b["lon_min"], b["lon_max"]), 6),
+        )
+        self._seen.append(loc)
+        return loc
+
+    def predict(self):
+        lat, lon = self.location()
+        return {
+            "lat": lat,
+            "lon": lon,
+            "indsMclsCd": self.rng.choice(INDUSTRY_CODES),
+            "time_range": self.rng.choice(TIME_RANGES),
+            "day_of_week": self.rng.choice(DAY_SETS),
+            "store_count": self.rng.randint(0, 40),
+        }
+
+    def proxy(self):
+        lat, lon = self.location()
+        return {
+            "cx": lon,
+            "cy": lat,
+            "radius": self.rng.choice(RADII),
+            "indsMclsCd": self.rng.choice(INDUSTRY_CODES),
+        }
+
+    def mixed(self, predict_ratio=0.3):
+        if self.rng.random() < predict_ratio:
+            return "predict", self.predict()
+        return "proxy", self.proxy()
@@ -0,0 +1,120 @@
+"""
+🔎 적응형 주변 탐색 vs 전수 격자 탐색 비교
+
+무작위 위치마다 두 방식의 상위 3개 그룹(순위, 매출, 추천지 좌표)이 같은지와
+모델에 넣은 행 수(grid 는 점, adaptive 는 칸), 걸린 시간을 비교한다.
+
+    python -m bench.search_parity --samples 200 --radius 300
+    python -m bench.search_parity --samples 40 --radius 1000
+"""
+import argparse
+import json
+import time
+
+import predictor
+from bench.load import save
+from bench.requests_gen import RequestGenerator
+from predictor import (
+    adaptive_neighbours, change_encoder_for, find_nearest_area, rank_recommendations, score_neighbours
+)
+from registry import INDUSTRY_CODE_MAP, ModelRegistry
+
+
+def ranking_signature(results, base_sales):
+    _, ranked = rank_recommendations(results, base_sales)
+    return [
+        (group["순위"], group["매출"], [(loc["lat"], loc["lon"]) for loc in group["추천지"]])
+        for group in ranked
+    ]
+
+
+class PointCounter:
+    """predictor.predict_unique 를 감싸서 모델에 넣은 행 수를 센다"""
+
+    def __init__(self):
+        self.points = 0
+        self._predict_unique = predictor.predict_unique
+
+    def __call__(self, model, store, X):
+        self.points += len(X)
+        return self._predict_unique(model, store, X)
+
+    def take(self):
+        points, self.points = self.points, 0
+        return points
+
+
+def run(args):
+    snap = ModelRegistry(reload_interval=0).get()
+    gen = RequestGenerator(seed=args.seed)
+    # 모델 분기 기준 색인은 처음 쓸 때 만들어지므로 측정 전에 준비
+    for category in set(INDUSTRY_CODE_MAP.values()):
+        snap.split_index_for(category)
+    counter = PointCounter()
+    predictor.predict_unique = counter
+
+    mismatches = []
+    grid_s = adaptive_s = 0.0
+    grid_points = adaptive_points = 0
+    checked = 0
+    for _ in range(args.samples):
+        req = gen.predict()
+        category = INDUSTRY_CODE_MAP[req["indsMclsCd"]]
+        start_time, end_time = (int(t) for t in req["time_range"].split("-"))
+        weights = snap.bojeong.temporal_weights(req["day_of_week"], start_time, end_time)
+        nearest, _ = find_nearest_area(snap, req["lat"], req["lon"])
+        if snap.profiles.count(nearest["상권_코드_명"], category) == 0:
+            continue
+        model = snap.model_for(category)
+        change_encoder = change_encoder_for(snap, category)
+        base_sales = 1e7
+
+        started = time.perf_counter()
+        grid = score_neighbours(snap, model, change_encoder, category, req["lat"], req["lon"], base_sales, weights,
+                                radius=args.radius, step=args.step)
+        grid_s += time.perf_counter() - started
+        grid_points += counter.take()
+
+        started = time.perf_counter()
+        adaptive = adaptive_neighbours(snap, model, change_encoder, category, req["lat"], req["lon"], base_sales,
+                                       weights, radius=args.radius, min_step=args.step, budget=args.budget)
+        adaptive_s += time.perf_counter() - started
+        adaptive_points += counter.take()
+
+        checked += 1
+        if ranking_signature(grid, base_sales) != ranking_signature(adaptive, base_sales):
+            mismatches.append({"lat": req["lat"], "lon": req["lon"], "업종": category})
+
+    result = {
+        "kind": "search_parity",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "checked": checked,
+        "mismatches": len(mismatches),
+        "grid_ms": round(grid_s / max(checked, 1) * 1000, 3),
+        "adaptive_ms": round(adaptive_s / max(checked, 1) * 1000, 3),
+        "grid_points": round(grid_points / max(checked, 1), 1),
+        "adaptive_points": round(adaptive_points / max(checked, 1), 1),
+        "mismatch_samples": mismatches[:20],
+    }
+    predictor.predict_unique = counter._predict_unique
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="적응형 주변 탐색 순위 비교")
+    parser.add_argument("--samples", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--radius", type=int, default=300)
+    parser.add_argument("--step", type=int, default=30)
+    parser.add_argument("--budget", type=int, default=None)
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본: bench/results/)")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    print(json.dumps({k: v for k, v in result.items() if k != "mismatch_samples"}, ensure_ascii=False, indent=2))
+    print(f"💾 결과 저장: {save(result, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+🚀 콜드 스타트: 원본 CSV/pkl 로드 vs 산출물(artifacts) 로드
+
+모드마다 새 프로세스를 띄워 스냅샷을 만들고, 프로세스 시작부터 준비 완료까지의 시간과
+로드 단계별 시간을 잰 뒤 같은 요청들의 /api/predict 결과가 두 경로에서 같은지 비교한다.
+
+    python -m bench.startup --data-dir /tmp/flask-proxy-data --runs 3 --samples 50
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.load import ROOT_DIR, save
+
+MODES = ("source", "artifacts")
+
+
+def child(args):
+    """한 번의 콜드 스타트 (자식 프로세스): 결과를 JSON 한 줄로 출력"""
+    started = time.perf_counter()
+    from metrics import process_uptime
+    from registry import BASE_DIR, INDUSTRY_CODE_MAP, build_snapshot
+    imported = time.perf_counter()
+
+    snap = build_snapshot(BASE_DIR, 1, artifact_dir=args.artifact_dir)
+    ready = process_uptime()
+    loaded = time.perf_counter()
+
+    from bench.requests_gen import RequestGenerator
+    from predictor import predict_location
+
+    gen = RequestGenerator(seed=args.seed)
+    predictions = []
+    for _ in range(args.samples):
+        req = gen.predict()
+        start_time, end_time = (int(t) for t in req["time_range"].split("-"))
+        try:
+            body, status = predict_location(
+                snap, req["lat"], req["lon"], INDUSTRY_CODE_MAP[req["indsMclsCd"]], req["day_of_week"],
+                start_time, end_time, req["store_count"],
+            )
+        except ValueError as e:
+            body, status = {"error": str(e)}, 500
+        predictions.append([status, body])
+
+    print(json.dumps({
+        "source": snap.source,
+        "ready_s": ready,
+        "import_s": imported - started,
+        "load_s": loaded - imported,
+        "timings": snap.timings,
+        "predictions": predictions,
+    }, ensure_ascii=False, default=str))
+
+
+def cold_start(mode, artifact_dir, args):
+    cmd = [sys.executable, "-m", "bench.startup", "--child", "--samples", str(args.samples), "--seed", str(args.seed),
+           "--artifact-dir", artifact_dir]
+    env = dict(os.environ, DATA_DIR=args.data_dir) if args.data_dir else None
+    out = subprocess.run(cmd, cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    if result["source"] != mode:
+        raise RuntimeError(f"{mode} 경로로 로드되지 않았습니다: {result['source']}")
+    return result
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def run(args):
+    from artifacts import build_artifacts
+    from registry import BASE_DIR
+
+    base_dir = args.data_dir or BASE_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact_dir = os.path.join(tmp, "artifacts")
+        build_artifacts(base_dir, artifact_dir)
+        dirs = {"source": os.path.join(tmp, "none"), "artifacts": artifact_dir}
+
+        runs = {mode: [] for mode in MODES}
+        # 모드를 번갈아 실행해서 페이지 캐시 상태가 한쪽에만 유리하지 않게
+        for _ in range(args.runs):
+            for mode in MODES:
+                runs[mode].append(cold_start(mode, dirs[mode], args))
+
+    summary = {}
+    for mode, results in runs.items():
+        summary[mode] = {
+            "ready_s": round(median([r["ready_s"] for r in results]), 3),
+            "import_s": round(median([r["import_s"] for r in results]), 3),
+            "load_s": round(median([r["load_s"] for r in results]), 3),
+            "phases_s": {name: round(median([r["timings"][name] for r in results]), 4)
+                         for name in results[0]["timings"]},
+        }
+
+    source_predictions = runs["source"][0]["predictions"]
+    artifact_predictions = runs["artifacts"][0]["predictions"]
+    mismatches = [i for i, (a, b) in enumerate(zip(source_predictions, artifact_predictions)) if a != b]
+    return {
+        "kind": "startup",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "summary": summary,
+        "predictions": len(source_predictions),
+        "ok_predictions": sum(status == 200 for status, _ in source_predictions),
+        "mismatches": len(mismatches),
+        "mismatch_samples": [[source_predictions[i], artifact_predictions[i]] for i in mismatches[:5]],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="원본 vs 산출물 콜드 스타트 시간 / 예측 일치 비교")
+    parser.add_argument("--data-dir", default=None, help="DATA_DIR (기본: 저장소 디렉터리)")
+    parser.add_argument("--runs", type=int, default=3, help="모드별 콜드 스타트 횟수 (중앙값 보고)")
+    parser.add_argument("--samples", type=int, default=50, help="비교할 예측 요청 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본: bench/results/)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--artifact-dir", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args)
+        return
+    result = run(args)
+    print(json.dumps({k: v for k, v in result.items() if k != "mismatch_samples"}, ensure_ascii=False, indent=2))
+    print(f"💾 결과 저장: {save(result, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
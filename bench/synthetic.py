@@ -0,0 +1,99 @@
+"""
+🧪 합성 상권 데이터
+
+상권 통합 CSV(0510_광진구 상권, 지하철 통합 완성본.csv)는 저장소에 없으므로, 벤치마크/테스트용으로
+같은 컬럼 구조의 데이터를 시드 고정으로 만든다. 상권 코드는 예측 입력 벡터 CSV 의 코드를 그대로 쓰고,
+위치는 광진구 경계 안에 흩뿌린다. 매출 데이터가 없는 조합, 3개 이하인 조합,
+입력 벡터에 없는 상권 코드도 섞어서 예외 경로까지 타게 한다.
+
+    python -m bench.synthetic --out /tmp/flask-proxy-data
+    DATA_DIR=/tmp/flask-proxy-data gunicorn --preload proxy:app
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from bench.load import ROOT_DIR
+from bench.requests_gen import DISTRICT_BOUNDS
+from registry import AREA_PATH, BOJEONG_PATH, ENCODER_PATH, FEATURE_PATH, MODEL_PATHS, SUBWAY_PATH
+
+CATEGORIES = ["커피-음료", "한식음식점", "중식음식점"]
+CHANGE_LABELS = ["다이나믹", "상권축소", "상권확장", "정체"]
+QUARTERS = [20241, 20242, 20243, 20244]
+WEEKDAYS = ["월", "화", "수", "목", "금", "토", "일"]
+TIME_SLOTS = ["00_06", "06_11", "11_14", "14_17", "17_21", "21_24"]
+
+
+def synthetic_area(feature_df, seed=0, extra_areas=3):
+    """상권_코드 × 분기 × 업종 행으로 된 상권 DataFrame (load_dataframe 결과와 같은 컬럼)"""
+    rng = np.random.default_rng(seed)
+    b = DISTRICT_BOUNDS
+    codes = list(dict.fromkeys(int(code) for code in feature_df["상권_코드"]))
+    # 입력 벡터에 없는 상권 (피처 저장소 조회 실패 경로)
+    codes += [max(codes) + 1000 + k for k in range(extra_areas)]
+
+    rows = []
+    for k, code in enumerate(codes):
+        lat = rng.uniform(b["lat_min"], b["lat_max"])
+        lon = rng.uniform(b["lon_min"], b["lon_max"])
+        change = CHANGE_LABELS[rng.integers(len(CHANGE_LABELS))]
+        competitors = int(rng.integers(0, 40))
+        scale = rng.lognormal(mean=17, sigma=0.6)
+        for category in CATEGORIES:
+            # 조합별 매출 데이터 수: 대부분 분기 전체, 일부는 없음(0) 또는 3개 이하
+            kind = rng.random()
+            n_rows = 0 if kind < 0.08 else int(rng.integers(1, 4)) if kind < 0.18 else len(QUARTERS)
+            for quarter in QUARTERS[len(QUARTERS) - n_rows:]:
+                day_share = rng.dirichlet(np.ones(len(WEEKDAYS)) * 4)
+                time_share = rng.dirichlet(np.ones(len(TIME_SLOTS)) * 2)
+                total = scale * rng.uniform(0.7, 1.3)
+                row = {
+                    "기준_년분기_코드": quarter,
+                    "상권_코드": code,
+                    "상권_코드_명": f"광진 상권 {k:03d}",
+                    "서비스_업종_코드_명": category,
+                    "위도": lat,
+                    "경도": lon,
+                    "상권_변화_지표_명": change,
+                    "300m내_경쟁_업종_수": competitors,
+                    "점포_당_매출_금액": np.nan if rng.random() < 0.05 else total / max(competitors, 1),
+                    "운영_영업_개월_평균": rng.uniform(30, 120),
+                    "폐업_영업_개월_평균": rng.uniform(20, 80),
+                    "서울_운영_영업_개월_평균": 106.0,
+                    "서울_폐업_영업_개월_평균": 52.0,
+                }
+                for day, share in zip(WEEKDAYS, day_share):
+                    row[f"{day}요일_매출_금액"] = total * share
+                for slot, share in zip(TIME_SLOTS, time_share):
+                    row[f"시간대_{slot}_매출_금액"] = total * share
+                rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def write_data_dir(out_dir, seed=0):
+    """
+    DATA_DIR 로 쓸 수 있는 디렉터리: 저장소의 모델/인코더/입력 벡터/지하철 CSV/보정 로직은 심볼릭 링크,
+    상권 CSV 만 합성 데이터 (원본과 같은 cp949)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    for name in {ENCODER_PATH, FEATURE_PATH, SUBWAY_PATH, BOJEONG_PATH, *MODEL_PATHS.values()}:
+        link = os.path.join(out_dir, name)
+        if not os.path.lexists(link):
+            os.symlink(os.path.join(ROOT_DIR, name), link)
+    df = synthetic_area(pd.read_csv(os.path.join(ROOT_DIR, FEATURE_PATH)), seed=seed)
+    df.to_csv(os.path.join(out_dir, AREA_PATH), index=False, encoding="cp949")
+    return out_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="합성 상권 데이터로 DATA_DIR 만들기")
+    parser.add_argument("--out", required=True, help="출력 디렉터리")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    print(f"🧪 합성 데이터 디렉터리: {write_data_dir(args.out, args.seed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+🧪 storeListInRadius 로컬 스텁 서버
+
+공공데이터 API 와 같은 header/body 구조로 가짜 상가 목록을 돌려준다.
+응답 지연, 전체 건수, 항목당 크기를 조절해서 /api/proxy 를 오프라인으로 측정할 때 쓴다.
+
+    python -m bench.upstream_stub --port 8089 --latency 0.05 --total 350
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HEADER = {
+    "description": "소상공인시장진흥공단 상가(상권)정보",
+    "stdrYm": "202503",
+    "resultCode": "00",
+    "resultMsg": "NORMAL SERVICE.",
+}
+
+
+def make_item(i, cx, cy, inds_mcls_cd, item_bytes, rng):
+    item = {
+        "bizesId": f"MA{i:012d}",
+        "bizesNm": f"테스트상가{i}",
+        "indsLclsCd": "I2",
+        "indsLclsNm": "음식",
+        "indsMclsCd": inds_mcls_cd or "I201",
+        "indsMclsNm": "음식점",
+        "rdnmAdr": f"서울특별시 광진구 테스트로 {i}",
+        "lon": round(cx + rng.uniform(-0.003, 0.003), 7),
+        "lat": round(cy + rng.uniform(-0.003, 0.003), 7),
+    }
+    if item_bytes:
+        item["padding"] = "x" * item_bytes
+    return item
+
+
+class StubConfig:
+    def __init__(self, latency=0.05, jitter=0.0, total=350, item_bytes=0, error_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.total = total
+        self.item_bytes = item_bytes
+        self.error_rate = error_rate
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            with config.lock:
+                config.requests += 1
+            query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            time.sleep(max(0.0, config.latency + random.uniform(-config.jitter, config.jitter)))
+
+            if config.error_rate and random.random() < config.error_rate:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            page_no = int(query.get("pageNo", 1))
+            num_rows = int(query.get("numOfRows", 100))
+            cx = float(query.get("cx") or 127.07)
+            cy = float(query.get("cy") or 37.54)
+            # 같은 조회는 항상 같은 결과가 나오도록 조회 조건으로 시드 고정
+            rng = random.Random(f"{query.get('cx')}|{query.get('cy')}|{query.get('indsMclsCd')}|{page_no}")
+            start = (page_no - 1) * num_rows
+            end = min(config.total, start + num_rows)
+            items = [make_item(i, cx, cy, query.get("indsMclsCd"), config.item_bytes, rng) for i in range(start, end)]
+
+            body = json.dumps({
+                "header": HEADER,
+                "body": {"items": items, "numOfRows": num_rows, "pageNo": page_no, "totalCount": config.total},
+            }, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json;charset=UTF-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_stub(host="127.0.0.1", port=0, **kwargs):
+    """백그라운드 스레드로 스텁 실행 → (server, config, base_url)"""
+    config = StubConfig(**kwargs)
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://{host}:{server.server_address[1]}/B553077/api/open/sdsc2/storeListInRadius"
+    return server, config, base_url
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="storeListInRadius 로컬 스텁")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.05, help="응답 지연 (초)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="지연 편차 (초)")
+    parser.add_argument("--total", type=int, default=350, help="totalCount")
+    parser.add_argument("--item-bytes", type=int, default=0, help="항목당 추가 패딩 크기")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 응답 비율")
+    args = parser.parse_args(argv)
+
+    server, _, base_url = start_stub(
+        args.host, args.port, latency=args.latency, jitter=args.jitter,
+        total=args.total, item_bytes=args.item_bytes, error_rate=args.error_rate,
+    )
+    print(f"🧪 스텁 실행 중: STORE_LIST_URL={base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
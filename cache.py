@@ -0,0 +1,203 @@
+"""
+🗃️ 프로세스 내 응답 캐시 / 중복 요청 합치기
+
+- ResponseCache: 바이트 크기 상한 + LRU 제거 + 항목별 TTL (만료 후 stale 기간 동안은 stale 로 제공 가능)
+- VersionedCache: 버전 태그가 올라가면 전체를 비우는 ResponseCache
+- SingleFlight: 같은 키로 동시에 들어온 요청은 한 번만 실행하고 결과를 나눠 가진다
+"""
+import threading
+import time
+from collections import OrderedDict
+
+HIT = "hit"
+STALE = "stale"
+MISS = "miss"
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at", "stale_until", "tag")
+
+    def __init__(self, value, size, expires_at, stale_until, tag):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.tag = tag
+
+
+class ResponseCache:
+    def __init__(self, max_bytes, ttl=None, stale_ttl=0, name="cache"):
+        """
+        max_bytes: 항목 크기 합 상한 (0 이면 캐시 비활성화)
+        ttl: 항목 유효 시간(초), None 이면 만료 없음
+        stale_ttl: 만료 후 stale 로 제공할 수 있는 추가 시간(초)
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def get(self, key, tag=None):
+        """
+        (value, state) 반환. state 는 HIT / STALE / MISS.
+        tag 가 주어지면 저장 당시 tag 와 다른 항목은 무효로 본다 (모델/데이터 버전 등).
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and tag is not None and entry.tag != tag:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None, MISS
+            if entry.expires_at is None or now < entry.expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value, HIT
+            if now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                return entry.value, STALE
+            self._remove(key)
+            self.misses += 1
+            return None, MISS
+
+    def set(self, key, value, size, ttl=None, tag=None):
+        if not self.enabled or size > self.max_bytes:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        now = time.monotonic()
+        expires_at = None if ttl is None else now + ttl
+        stale_until = None if ttl is None else expires_at + self.stale_ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, size, expires_at, stale_until, tag)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+            }
+
+
+class VersionedCache(ResponseCache):
+    """
+    tag(모델/데이터 버전 등)가 올라가면 이전 버전 항목을 한 번에 비우는 캐시.
+    리로드 직전에 시작한 요청이 옛 tag 로 들어오면 캐시를 건드리지 않고 miss 로만 처리한다
+    (옛 요청이 새 버전 항목을 지우거나 옛 결과를 저장하지 않도록).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tag = None
+
+    def _is_current(self, tag):
+        """tag 가 현재 버전이면 True (더 새 tag 면 비우고 올린다), 옛 tag 면 False"""
+        if tag is None or tag == self.tag:
+            return True
+        with self._lock:
+            if self.tag is not None and tag < self.tag:
+                return False
+            if tag != self.tag:
+                self._entries.clear()
+                self._bytes = 0
+                self.tag = tag
+            return True
+
+    def get(self, key, tag=None):
+        if not self._is_current(tag):
+            with self._lock:
+                self.misses += 1
+            return None, MISS
+        return super().get(key, tag=tag)
+
+    def set(self, key, value, size, ttl=None, tag=None):
+        if not self._is_current(tag):
+            return
+        super().set(key, value, size, ttl=ttl, tag=tag)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn):
+        """
+        같은 key 의 fn 이 이미 실행 중이면 그 결과를 기다렸다가 돌려준다 (예외도 그대로 전달)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
@@ -0,0 +1,101 @@
+"""
+🧮 상권 코드별 입력 피처 저장소
+
+로드 시점에 업종별로 model.feature_names_in_ 순서에 맞춘 float32 행렬을 만들어 둔다.
+각 행은 20252_input_vector_0521.csv 의 상권 행(상권 코드당 첫 행)에 최근 분기 운영/폐업
+개월 평균과 상권 단위 파생 피처를 미리 합친 것이다. 요청 시에는 행을 골라 복사한 뒤
+위치마다 달라지는 컬럼(지하철역, 변화 지표, 경쟁 업종 수)과 그 파생 피처만 덮어쓴다.
+
+XGBoost 는 입력을 float32 로 바꿔서 쓰므로, float64 로 계산한 뒤 float32 로 저장해도
+예측 결과는 기존 DataFrame 입력과 같다.
+"""
+import numpy as np
+
+from predictor import LATEST_QUARTER, NEEDED_COLS, SEASONAL_FEATURES, add_derived_features
+
+# 위치(후보 좌표)마다 달라지는 컬럼
+LOCATION_COLS = ["역까지_거리_m", "가장_가까운_역_승하차_인원_수", "상권_변화_지표_명", "300m내_경쟁_업종_수"]
+
+
+class FeatureStore:
+    def __init__(self, feature_names, codes, matrix, total_pop):
+        self.feature_names = list(feature_names)
+        self.columns = {name: j for j, name in enumerate(self.feature_names)}
+        self.index = {int(code): i for i, code in enumerate(codes)}
+        self.matrix = matrix
+        self.total_pop = total_pop
+
+    def row_of(self, area_code):
+        return self.index.get(int(area_code))
+
+    def row_for(self, area_code):
+        row = self.row_of(area_code)
+        if row is None:
+            raise ValueError(f"❌ 상권 코드 {area_code} 에 해당하는 예측 피처 없음")
+        return row
+
+    def _set(self, X, name, values):
+        j = self.columns.get(name)
+        if j is not None:
+            X[:, j] = values
+
+    def assemble(self, rows, station_dist, station_traffic, change_encoded, competitors, seasonal=False):
+        """
+        상권 행 gather + 위치별 컬럼 덮어쓰기로 (N, n_features) float32 입력 행렬 구성
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        X = self.matrix[rows]
+        station_dist = np.asarray(station_dist, dtype=np.float64)
+        station_traffic = np.asarray(station_traffic, dtype=np.float64)
+        competitors = np.asarray(competitors, dtype=np.float64)
+
+        self._set(X, "역까지_거리_m", station_dist)
+        self._set(X, "가장_가까운_역_승하차_인원_수", station_traffic)
+        self._set(X, "상권_변화_지표_명", np.asarray(change_encoded, dtype=np.float64))
+        self._set(X, "300m내_경쟁_업종_수", competitors)
+        self._set(X, "경쟁_밀집도", competitors / (self.total_pop[rows] + 1))
+        self._set(X, "역_접근성", station_traffic / (station_dist + 1))
+        if seasonal:
+            for name, value in SEASONAL_FEATURES.items():
+                self._set(X, name, value)
+        return X
+
+    def frame(self, X):
+        """모델이 학습 때의 컬럼명을 검증하므로 이름만 붙여서 넘긴다 (복사 없음)"""
+        import pandas as pd
+
+        return pd.DataFrame(X, columns=self.feature_names, copy=False)
+
+
+def build_feature_store(feature_df, df, feature_names, category):
+    # 상권 코드당 첫 행 (기존 load_predicted_vector 와 동일한 선택)
+    base = feature_df.drop_duplicates(subset=["상권_코드"], keep="first").reset_index(drop=True)
+    codes = base["상권_코드"].astype(int).to_numpy()
+
+    # ✅ 누락 피처 보완: 최근 분기 상권+업종 첫 행의 운영/폐업 개월 평균
+    recent = df[(df["기준분기"] == LATEST_QUARTER) & (df["서비스_업종_코드_명"] == category)]
+    recent = recent.assign(_code=recent["상권_코드"].astype(int)).drop_duplicates("_code", keep="first").set_index("_code")
+    has_recent = np.isin(codes, recent.index.to_numpy())
+    for col in NEEDED_COLS:
+        if col in base.columns:
+            base[col] = np.where(has_recent, base[col], np.nan)
+        elif col in recent.columns:
+            base[col] = recent[col].reindex(codes).to_numpy()
+        else:
+            base[col] = np.nan
+
+    # 위치별 컬럼은 자리만 잡아 두고 요청 시 덮어쓴다
+    for col in LOCATION_COLS:
+        base[col] = 0.0
+    base = add_derived_features(base)
+
+    matrix = base.reindex(columns=list(feature_names)).to_numpy(dtype=np.float32)
+    total_pop = base["총_유동인구_수"].to_numpy(dtype=np.float64)
+    return FeatureStore(feature_names, codes, np.ascontiguousarray(matrix), total_pop)
+
+
+def build_feature_stores(feature_df, df, models):
+    return {
+        category: build_feature_store(feature_df, df, model.feature_names_in_, category)
+        for category, model in models.items()
+    }
@@ -0,0 +1,26 @@
+"""
+gunicorn 설정 (gunicorn 은 실행 디렉터리의 이 파일을 자동으로 읽는다)
+
+요청 스레드 수는 예측 풀이 잡을 수 있는 요청 수 상한(REQUEST_THREADS - PROXY_RESERVED_THREADS)과
+같은 REQUEST_THREADS 환경 변수에서 읽어서, 예측이 몰려도 /api/proxy 몫의 스레드가 남게 한다.
+예측 상한은 PREDICT_WORKERS + PREDICT_MIN_QUEUE 아래로 내려가지 않으므로 스레드는 최소
+그 값 + PROXY_RESERVED_THREADS 개로 올린다 (예: 1 CPU 면 1 + 2 + 2 = 5).
+"""
+import os
+
+from workers import PROXY_RESERVED_THREADS, REQUEST_THREADS, predict_pool
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+preload_app = True
+threads = max(REQUEST_THREADS, predict_pool.max_pending + PROXY_RESERVED_THREADS)
+
+
+def post_fork(server, worker):
+    # --threads 로 이 값을 덮어쓴 경우: 실제 스레드 수로 예측 상한을 다시 잡는다
+    predict_pool.set_request_slots(worker.cfg.threads - PROXY_RESERVED_THREADS)
+    if worker.cfg.threads < predict_pool.max_pending + PROXY_RESERVED_THREADS:
+        server.log.warning(
+            "요청 스레드 %d개로는 예측 상한 %d개 + /api/proxy 몫 %d개를 둘 수 없습니다 (threads >= %d 권장)",
+            worker.cfg.threads, predict_pool.max_pending, PROXY_RESERVED_THREADS,
+            predict_pool.max_pending + PROXY_RESERVED_THREADS,
+        )
@@ -0,0 +1,327 @@
+"""
+🗺️ 업종별 매출 히트맵 래스터
+
+상권 데이터와 모델은 분기 단위로만 바뀌므로, 구 전체를 고정 격자로 나눠 각 셀의
+100% 기준 예측 매출(요일/시간대 보정 전)과 최근접 상권/지하철역을 오프라인으로 계산해
+memory-mapped .npy 파일로 저장해 둔다. 서버는 이 파일을 mmap 으로 열어서
+/api/heatmap 타일과 주변 추천(use_heatmap) 에 보정만 곱해서 쓴다.
+
+빌드:
+    python heatmap.py build [--step 30] [--margin 300] [--out heatmap]
+"""
+import argparse
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+from artifacts import staging_dir, swap_dir
+from predictor import MIN_BASIS_ROWS, change_encoder_for, find_nearest_areas, surface_distance_m
+from registry import BASE_DIR, INDUSTRY_CODE_MAP, registry
+
+HEATMAP_DIR = os.environ.get("HEATMAP_DIR", os.path.join(BASE_DIR, "heatmap"))
+DEFAULT_STEP_M = 30
+DEFAULT_MARGIN_M = 300
+TILE_SIZE = 64
+
+
+def heatmap_categories():
+    # 업종 코드 순서대로, 중복 업종명 제거
+    return list(dict.fromkeys(INDUSTRY_CODE_MAP.values()))
+
+
+def score_cells(snap, category, area_idx, stat_dist, stat_traffic):
+    """
+    셀들의 100% 기준 예측 매출 (피처 저장소에 없는 상권, 인코더가 모르는 변화 지표는 NaN)
+    """
+    df = snap.df
+    store = snap.feature_stores[category]
+    model = snap.model_for(category)
+    encoder = change_encoder_for(snap, category)
+
+    sales = np.full(len(area_idx), np.nan, dtype=np.float32)
+    unique_rows, inverse = np.unique(area_idx, return_inverse=True)
+    near_rows = df.iloc[unique_rows]
+
+    store_rows = np.array(
+        [-1 if row is None else row for row in map(store.row_of, near_rows["상권_코드"])], dtype=np.intp
+    )
+    labels = near_rows["상권_변화_지표_명"].to_numpy()
+    known = np.isin(labels, encoder.classes_)
+    encoded = np.zeros(len(labels), dtype=int)
+    if known.any():
+        encoded[known] = encoder.transform(labels[known])
+
+    valid_area = (store_rows >= 0) & known
+    cells = np.flatnonzero(valid_area[inverse])
+    if len(cells) == 0:
+        return sales
+
+    u = inverse[cells]
+    X = store.assemble(
+        store_rows[u],
+        station_dist=stat_dist[cells],
+        station_traffic=stat_traffic[cells],
+        change_encoded=encoded[u],
+        competitors=near_rows["300m내_경쟁_업종_수"].to_numpy(dtype=float)[u],
+        seasonal=True,
+    )
+    sales[cells] = model.predict(store.frame(X))
+    return sales
+
+
+def build_heatmap(snap, out_dir=HEATMAP_DIR, step_m=DEFAULT_STEP_M, margin_m=DEFAULT_MARGIN_M, chunk_rows=32):
+    df = snap.df
+    categories = heatmap_categories()
+
+    # 📐 구 전체 경계 + 여백을 step_m 격자로 분할
+    lat_min, lat_max = float(df["위도"].min()), float(df["위도"].max())
+    lon_min, lon_max = float(df["경도"].min()), float(df["경도"].max())
+    lat0 = (lat_min + lat_max) / 2
+    dlat = step_m / 111000
+    dlon = step_m / (111000 * math.cos(math.radians(lat0)))
+    lat_min -= margin_m / 111000
+    lon_min -= margin_m / (111000 * math.cos(math.radians(lat0)))
+    height = int(math.ceil((lat_max + margin_m / 111000 - lat_min) / dlat)) + 1
+    width = int(math.ceil((lon_max + margin_m / (111000 * math.cos(math.radians(lat0))) - lon_min) / dlon)) + 1
+
+    # 실행 중인 서버가 기존 파일을 mmap 으로 열고 있으므로 제자리에 쓰지 않고 임시 디렉터리에 빌드
+    tmp_dir = staging_dir(out_dir)
+    open_memmap = np.lib.format.open_memmap
+    sales = open_memmap(os.path.join(tmp_dir, "sales.npy"), mode="w+", dtype=np.float32,
+                        shape=(len(categories), height, width))
+    area = open_memmap(os.path.join(tmp_dir, "area.npy"), mode="w+", dtype=np.int32, shape=(height, width))
+    station = open_memmap(os.path.join(tmp_dir, "station.npy"), mode="w+", dtype=np.int16, shape=(height, width))
+    station_dist = open_memmap(os.path.join(tmp_dir, "station_dist.npy"), mode="w+", dtype=np.float32,
+                               shape=(height, width))
+
+    started = time.time()
+    cols = np.arange(width)
+    for r0 in range(0, height, chunk_rows):
+        r1 = min(height, r0 + chunk_rows)
+        rows = np.arange(r0, r1)
+        lats = np.repeat(lat_min + rows * dlat, width)
+        lons = np.tile(lon_min + cols * dlon, len(rows))
+
+        area_idx, _ = find_nearest_areas(snap, lats, lons)
+        stat_idx, stat_dist = snap.stations.query(lats, lons)
+        stat_traffic = snap.stations.traffic[stat_idx]
+
+        area[r0:r1] = area_idx.reshape(len(rows), width)
+        station[r0:r1] = stat_idx.reshape(len(rows), width)
+        station_dist[r0:r1] = stat_dist.reshape(len(rows), width)
+        for ci, category in enumerate(categories):
+            sales[ci, r0:r1] = score_cells(snap, category, area_idx, stat_dist, stat_traffic).reshape(len(rows), width)
+        print(f"🗺️ {r1}/{height} 행 완료")
+
+    for arr in (sales, area, station, station_dist):
+        arr.flush()
+    del sales, area, station, station_dist
+
+    meta = {
+        "digest": snap.digest,
+        "categories": categories,
+        "lat_min": lat_min,
+        "lon_min": lon_min,
+        "dlat": dlat,
+        "dlon": dlon,
+        "step_m": step_m,
+        "height": height,
+        "width": width,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    # 디렉터리째 교체: 서버는 meta.json 이 바뀐 것을 보고 새 파일을 다시 연다
+    swap_dir(tmp_dir, out_dir)
+    print(f"✅ 히트맵 빌드 완료: {len(categories)}개 업종, {height}x{width} 셀, {time.time() - started:.1f}s")
+    return meta
+
+
+class Heatmap:
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.categories = self.meta["categories"]
+        self.lat_min = self.meta["lat_min"]
+        self.lon_min = self.meta["lon_min"]
+        self.dlat = self.meta["dlat"]
+        self.dlon = self.meta["dlon"]
+        self.height = self.meta["height"]
+        self.width = self.meta["width"]
+        self.sales = np.load(os.path.join(path, "sales.npy"), mmap_mode="r")
+        self.area = np.load(os.path.join(path, "area.npy"), mmap_mode="r")
+        self.station = np.load(os.path.join(path, "station.npy"), mmap_mode="r")
+        self.station_dist = np.load(os.path.join(path, "station_dist.npy"), mmap_mode="r")
+
+    def compatible(self, snap):
+        """현재 로드된 모델/데이터로 만든 래스터인지 (상권 행 번호가 같은 df 를 가리키는지)"""
+        return self.meta.get("digest") == snap.digest
+
+    def category_index(self, category):
+        return self.categories.index(category) if category in self.categories else None
+
+    def cell_lat(self, rows):
+        return self.lat_min + np.asarray(rows) * self.dlat
+
+    def cell_lon(self, cols):
+        return self.lon_min + np.asarray(cols) * self.dlon
+
+    def cells_within(self, lat, lon, radius):
+        """(lat, lon) 에서 radius(m) 안의 셀 (행, 열, 거리) — 입력 지점이 속한 셀은 제외"""
+        r_c = (lat - self.lat_min) / self.dlat
+        c_c = (lon - self.lon_min) / self.dlon
+        span_r = int(math.ceil(radius / 111000 / self.dlat))
+        span_c = int(math.ceil(radius / (111000 * math.cos(math.radians(lat))) / self.dlon))
+        r_lo, r_hi = max(0, int(round(r_c)) - span_r), min(self.height - 1, int(round(r_c)) + span_r)
+        c_lo, c_hi = max(0, int(round(c_c)) - span_c), min(self.width - 1, int(round(c_c)) + span_c)
+        if r_lo > r_hi or c_lo > c_hi:
+            return np.array([], dtype=int), np.array([], dtype=int), np.array([])
+
+        rows = np.repeat(np.arange(r_lo, r_hi + 1), c_hi - c_lo + 1)
+        cols = np.tile(np.arange(c_lo, c_hi + 1), r_hi - r_lo + 1)
+        dist = surface_distance_m(lat, lon, self.cell_lat(rows), self.cell_lon(cols))
+        own_cell = (rows == int(round(r_c))) & (cols == int(round(c_c)))
+        keep = (dist <= radius) & ~own_cell
+        return rows[keep], cols[keep], dist[keep]
+
+    def tile_bounds(self, tile_row, tile_col, size=TILE_SIZE):
+        r0, c0 = tile_row * size, tile_col * size
+        if r0 < 0 or c0 < 0 or r0 >= self.height or c0 >= self.width:
+            return None
+        return r0, min(self.height, r0 + size), c0, min(self.width, c0 + size)
+
+    def score_neighbours(self, snap, category, lat, lon, base_sales, weights, radius=300):
+        """
+        score_neighbours 와 같은 형식의 추천 후보를 래스터 조회 + 보정 배율 곱으로 만든다
+        """
+        ci = self.category_index(category)
+        if ci is None:
+            return []
+        rows, cols, dist = self.cells_within(lat, lon, radius)
+        if len(rows) == 0:
+            return []
+
+        raw = np.asarray(self.sales[ci, rows, cols], dtype=np.float64)
+        area_rows = np.asarray(self.area[rows, cols])
+        sales = raw * temporal_factors(snap, category, area_rows, weights, min_rows=MIN_BASIS_ROWS)
+        keep = np.flatnonzero(~np.isnan(sales))
+
+        stations = snap.stations
+        stat_idx = np.asarray(self.station[rows, cols])
+        stat_dist = np.asarray(self.station_dist[rows, cols])
+        area_names = snap.df["상권_코드_명"].to_numpy()
+        results = []
+        for k in keep:
+            results.append({
+                "lat": float(self.cell_lat(rows[k])), "lon": float(self.cell_lon(cols[k])),
+                "dist": int(dist[k]), "sales": int(sales[k]),
+                "percent": round(sales[k] / base_sales * 100) if base_sales else None,
+                "상권명": area_names[area_rows[k]],
+                "지하철역": stations.names[stat_idx[k]], "지하철역거리": int(stat_dist[k]),
+                "승하차": int(stations.traffic[stat_idx[k]])
+            })
+        return results
+
+
+def temporal_factors(snap, category, area_rows, weights, min_rows=1):
+    """
+    상권 행 배열 → 요일/시간대 보정 배율 (매출 데이터가 min_rows 미만인 상권은 NaN)
+    """
+    df = snap.df
+    profiles = snap.profiles
+    apply_temporal_profile = snap.bojeong.apply_temporal_profile
+    unique_rows, inverse = np.unique(area_rows, return_inverse=True)
+    factors = np.full(len(unique_rows), np.nan)
+    for k, name in enumerate(df["상권_코드_명"].to_numpy()[unique_rows]):
+        profile_idx = profiles.lookup(name, category)
+        if profile_idx is not None and profiles.counts[profile_idx] >= min_rows:
+            factors[k] = apply_temporal_profile(1.0, profiles, profile_idx, weights)
+    return factors[inverse]
+
+
+def parse_tile_params(args):
+    """
+    /api/heatmap 쿼리 → (tile_row, tile_col, (start_time, end_time) 또는 None) (잘못된 값은 ValueError)
+    """
+    try:
+        tile_row = int(args["tile_row"])
+        tile_col = int(args["tile_col"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("tile_row, tile_col 은 정수여야 합니다.") from None
+
+    time_range = args.get("time_range")
+    if not time_range:
+        return tile_row, tile_col, None
+    try:
+        start_time, end_time = (int(t) for t in time_range.split("-"))
+    except ValueError:
+        raise ValueError(f"time_range 는 시작-끝 시각(예: 6-14) 이어야 합니다: {time_range}") from None
+    if not 0 <= start_time < end_time <= 24:
+        raise ValueError(f"time_range 는 0~24 사이의 시작-끝 시각이어야 합니다: {time_range}")
+    return tile_row, tile_col, (start_time, end_time)
+
+
+def heatmap_tile(heatmap, snap, category, tile_row, tile_col, weights=None):
+    """
+    타일 하나 (weights 가 있으면 요일/시간대 보정 적용, 값 없는 셀은 None)
+    """
+    ci = heatmap.category_index(category)
+    bounds = heatmap.tile_bounds(tile_row, tile_col)
+    if ci is None or bounds is None:
+        return None
+    r0, r1, c0, c1 = bounds
+    values = np.asarray(heatmap.sales[ci, r0:r1, c0:c1], dtype=np.float64)
+    if weights is not None:
+        area_rows = np.asarray(heatmap.area[r0:r1, c0:c1]).ravel()
+        values = values * temporal_factors(snap, category, area_rows, weights).reshape(values.shape)
+
+    return {
+        "업종": category,
+        "tile": [tile_row, tile_col],
+        "origin": {"lat": float(heatmap.cell_lat(r0)), "lon": float(heatmap.cell_lon(c0))},
+        "step": {"lat": heatmap.dlat, "lon": heatmap.dlon},
+        "shape": [r1 - r0, c1 - c0],
+        "corrected": weights is not None,
+        "sales": [[None if np.isnan(v) else int(v) for v in row] for row in values],
+    }
+
+
+_heatmap = None
+_heatmap_mtime = None
+_heatmap_lock = threading.Lock()
+
+
+def get_heatmap(path=HEATMAP_DIR):
+    """빌드된 래스터 (없으면 None). meta.json 이 바뀌면 다시 연다"""
+    global _heatmap, _heatmap_mtime
+    try:
+        mtime = os.stat(os.path.join(path, "meta.json")).st_mtime_ns
+    except OSError:
+        return None
+    if _heatmap is None or mtime != _heatmap_mtime:
+        with _heatmap_lock:
+            if _heatmap is None or mtime != _heatmap_mtime:
+                _heatmap = Heatmap(path)
+                _heatmap_mtime = mtime
+    return _heatmap
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="업종별 매출 히트맵 래스터 빌드")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="구 전체 격자 예측 래스터 생성")
+    build.add_argument("--step", type=float, default=DEFAULT_STEP_M, help="격자 간격 (m)")
+    build.add_argument("--margin", type=float, default=DEFAULT_MARGIN_M, help="구 경계 바깥 여백 (m)")
+    build.add_argument("--out", default=HEATMAP_DIR, help="출력 디렉터리")
+    args = parser.parse_args(argv)
+
+    snap = registry.get()
+    build_heatmap(snap, args.out, step_m=args.step, margin_m=args.margin)
+
+
+if __name__ == "__main__":
+    main()
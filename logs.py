@@ -0,0 +1,103 @@
+"""
+📝 레벨별 구조화 로깅
+
+요청 스레드는 레코드를 큐에 넣기만 하고, 실제 출력(stdout)은 별도 스레드가 한다.
+gunicorn --preload 로 fork 된 워커에는 부모의 출력 스레드가 없으므로 pid 가 바뀌면 새로 띄운다.
+
+    LOG_LEVEL=INFO     (요청별 상세 내역과 추천 목록은 DEBUG)
+    LOG_FORMAT=text    (json 이면 한 줄에 JSON 객체 하나)
+
+추가 필드는 logger.info("메시지", extra={"fields": {...}}) 로 넘긴다.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+# 이 시간 이상 걸린 요청은 INFO 로 남긴다 (나머지 요청 로그는 DEBUG)
+LOG_SLOW_MS = float(os.environ.get("LOG_SLOW_MS", "1000"))
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "pid": record.process,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """레코드를 큐에 넣고, 프로세스마다 한 번 출력 스레드(QueueListener)를 띄운다"""
+
+    def __init__(self, target):
+        super().__init__(queue.SimpleQueue())
+        self.target = target
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._start_lock:
+            if self._pid != pid:
+                # fork 전에 쌓인 레코드는 부모 출력 스레드 몫이므로 새 큐로 시작
+                self.queue = queue.SimpleQueue()
+                self._listener = logging.handlers.QueueListener(self.queue, self.target)
+                self._listener.start()
+                self._pid = pid
+
+    def emit(self, record):
+        self._ensure_listener()
+        super().emit(record)
+
+    def flush_and_stop(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._pid = None
+
+
+_configured = False
+
+
+def configure_logging(level=LOG_LEVEL, fmt=LOG_FORMAT):
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    target = logging.StreamHandler(sys.stdout)
+    target.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    handler = BackgroundQueueHandler(target)
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(level)
+    # 종료 시 큐에 남은 레코드까지 출력
+    atexit.register(handler.flush_and_stop)
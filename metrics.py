@@ -0,0 +1,308 @@
+"""
+📈 요청 단계별 시간 측정과 Prometheus 지표
+
+- stage(name): 코드 구간을 감싸면 단계별 지연 히스토그램에 기록하고,
+  요청 중이면 그 요청의 단계 합계(Server-Timing 헤더)에도 더한다
+- Histogram / Counter: 라벨별 누적 값 (스레드 안전), render() 로 Prometheus 텍스트 형식 출력
+- SamplingProfiler: 한 요청 스레드의 스택을 주기적으로 떠서 folded stack 으로 모은다 (옵트인)
+
+지표는 프로세스(gunicorn 워커) 단위로 쌓인다.
+"""
+import contextvars
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+
+# 지연 히스토그램 버킷 (초)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 🔬 샘플링 프로파일러: 요청 중 이 비율만 프로파일링 (0 이면 끔),
+# 프로파일링한 요청이 PROFILE_SLOW_MS 이상 걸렸을 때만 PROFILE_DIR 에 저장
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", "500"))
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.005"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"))
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs) + "}"
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{format_labels(self.labels, key)} {format_value(v)}" for key, v in items]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = entry[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, key, ('le', format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class CallbackMetric(Metric):
+    """
+    스크레이프 시점에 fn() 을 불러 값을 채우는 지표 (fn → [(라벨 dict, 값), ...]).
+    캐시/커넥션 풀처럼 이미 자체 통계를 가진 객체를 그대로 내보낼 때 쓴다.
+    """
+
+    def __init__(self, name, help, labels, fn, kind="gauge"):
+        super().__init__(name, help, labels)
+        self.fn = fn
+        self.kind = kind
+
+    def render(self):
+        lines = self.header()
+        for labels, value in self.fn():
+            if value is None:
+                continue
+            lines.append(f"{self.name}{format_labels(self.labels, self._key(labels))} {format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.add(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.add(Histogram(name, help, labels, buckets))
+
+    def callback(self, name, help, labels, fn, kind="gauge"):
+        return self.add(CallbackMetric(name, help, labels, fn, kind))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                # 콜백 지표 하나가 실패해도 나머지 지표는 내보낸다
+                continue
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "app_stage_seconds", "요청 처리 단계별 소요 시간", labels=("stage",)
+)
+REQUEST_SECONDS = metrics.histogram(
+    "app_request_seconds", "엔드포인트별 요청 처리 시간 (응답 헤더까지)", labels=("endpoint", "status")
+)
+REQUESTS_TOTAL = metrics.counter(
+    "app_requests_total", "엔드포인트별 요청 수", labels=("endpoint", "status")
+)
+
+
+class Trace:
+    """한 요청의 단계별 누적 시간"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        # 이 요청을 샘플링 중인 프로파일러 (작업 풀 스레드도 따라가도록)
+        self.profiler = None
+        # 페이지 조회 스레드들이 같은 요청의 trace 에 동시에 더한다
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def totals(self):
+        """단계별 누적 시간 복사본 (다른 스레드가 더하는 중에도 안전)"""
+        with self._lock:
+            return dict(self.stages)
+
+    def server_timing(self):
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.totals().items())
+
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+
+
+def start_trace():
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+
+def end_trace():
+    _current_trace.set(None)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def record_stage(name, seconds):
+    STAGE_SECONDS.observe(seconds, stage=name)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+@contextmanager
+def stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def process_uptime():
+    """프로세스 시작(인터프리터 기동 전 exec 시점)부터 지금까지의 초 (/proc 이 없으면 None)"""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            system_uptime = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    return max(0.0, system_uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """
+    대상 스레드들의 현재 스택을 interval 마다 떠서 세는 샘플링 프로파일러.
+    결과는 folded stack (flamegraph.pl, speedscope 에서 바로 열림) 으로 저장한다.
+    요청이 작업 풀에 일을 넘기면 follow()/unfollow() 로 그 스레드도 함께 샘플링한다.
+    """
+
+    def __init__(self, thread_id=None, interval=PROFILE_INTERVAL):
+        self.thread_ids = {thread_id if thread_id is not None else threading.get_ident()}
+        self.interval = interval
+        self.samples = StackCounter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="sampling-profiler")
+
+    def follow(self, thread_id):
+        with self._lock:
+            self.thread_ids.add(thread_id)
+
+    def unfollow(self, thread_id):
+        with self._lock:
+            self.thread_ids.discard(thread_id)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                thread_ids = tuple(self.thread_ids)
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame))
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def dump(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
@@ -0,0 +1,963 @@
+"""
+🔮 매출 예측 엔진
+
+입력 위치 예측에 쓰는 조회/피처 구성 함수와, 주변 300m 탐색 격자를
+한 번에 채점하는 배치 엔진을 담는다. 모든 함수는 registry 의 스냅샷을 받아서
+동작하므로 요청 간에 상태를 공유하지 않는다.
+"""
+import logging
+import math
+import os
+
+import numpy as np
+
+from metrics import stage
+from workers import Deadline
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371000
+
+# WGS84 타원체 (geopy geodesic 과 같은 기준)
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+
+# 누락 피처 보완용 최근 분기 컬럼
+LATEST_QUARTER = 20244
+NEEDED_COLS = [
+    "운영_영업_개월_평균", "폐업_영업_개월_평균",
+    "서울_운영_영업_개월_평균", "서울_폐업_영업_개월_평균"
+]
+
+# 🔹 계절성 피처 (2025년 2분기 기준)
+SEASONAL_FEATURES = {
+    "연도": 2025,
+    "분기": 2,
+    "분기_sin": np.sin(2 * np.pi * 2 / 4),
+    "분기_cos": np.cos(2 * np.pi * 2 / 4),
+}
+
+# 주변 추천 후보로 인정할 최소 매출 데이터 수
+MIN_BASIS_ROWS = 4
+
+# 🏅 추천 순위: 상위 그룹 수, 이 금액 이내 차이는 공동 순위
+RANK_GROUPS = 3
+RANK_GROUP_TOLERANCE = 1_000_000
+
+# 🔎 주변 탐색 설정 (요청의 search/radius/min_step/budget 으로 바꿀 수 있음)
+# search: grid = 전수 격자 탐색 (기존 방식), adaptive = 같은 격자를 모델 예측이 달라지는 칸 단위로 채점
+#   (budget/마감에 걸리지 않으면 추천 순위는 grid 와 같다). bench.search_parity (합성 데이터, step 30m):
+#   300m grid 15.5ms / adaptive 13.7ms, 1000m 123 / 55ms, 1500m 277 / 107ms (상위 3개 그룹 불일치 0)
+NEIGHBOUR_SEARCH = os.environ.get("NEIGHBOUR_SEARCH", "grid")
+NEIGHBOUR_RADIUS = 300
+NEIGHBOUR_STEP = 30
+NEIGHBOUR_MIN_STEP = 10
+NEIGHBOUR_MAX_RADIUS = int(os.environ.get("NEIGHBOUR_MAX_RADIUS", "2000"))
+# 한 요청에서 채점할 수 있는 최대 점 수 (grid 는 격자 크기 상한, adaptive 는 budget(채점 칸 수) 상한)
+NEIGHBOUR_MAX_POINTS = int(os.environ.get("NEIGHBOUR_MAX_POINTS", "10000"))
+# adaptive: 최근접 상권/지하철역을 조회할 격자 점 수 상한 (채점은 칸 단위라 grid 보다 크게 둔다)
+NEIGHBOUR_MAX_LATTICE = int(os.environ.get("NEIGHBOUR_MAX_LATTICE", "40000"))
+# 한 번에 채점할 점(adaptive 는 칸) 수. 덩어리마다 모델 채점 직전에 마감을 확인해서 넓은 격자도 마감에 맞춰 끊는다
+# (기본 격자 반경 300m/30m 는 283점이라 한 덩어리지만 최근접 조회/피처 조립 뒤 채점 전에 한 번 확인한다.
+#  덩어리를 작게 나누면 덩어리마다 predict 고정 비용이 붙는다: 기본 격자 128점씩이면 원본 경로 13.8 → 26.4ms)
+NEIGHBOUR_CHUNK_POINTS = int(os.environ.get("NEIGHBOUR_CHUNK_POINTS", "1024"))
+
+
+# 🔹 위도/경도 기준 거리 이동 보정 함수 (dy_m, dx_m 은 배열도 가능)
+def offset_latlon(lat, lon, dy_m, dx_m):
+    delta_lat = dy_m / 111000
+    delta_lon = dx_m / (111000 * math.cos(math.radians(lat)))
+    return lat + delta_lat, lon + delta_lon
+
+
+def surface_distance_m(lat, lon, lats, lons):
+    """
+    기준점에서 여러 점까지의 타원체 거리(m)를 벡터로 계산
+    (짧은 거리용 국소 근사, 정수 경계에 아주 가까운 값만 geodesic 으로 재계산해 int() 결과를 맞춘다)
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    phi_m = np.radians((lats + lat) / 2)
+    w = 1 - WGS84_E2 * np.sin(phi_m) ** 2
+    meridian = WGS84_A * (1 - WGS84_E2) / w ** 1.5
+    normal = WGS84_A / np.sqrt(w)
+    dist = np.hypot(meridian * np.radians(lats - lat), normal * np.cos(phi_m) * np.radians(lons - lon))
+
+    near_integer = np.flatnonzero(np.abs(dist - np.round(dist)) < 1e-4)
+    if len(near_integer):
+        # geopy 는 이 경우에만 쓰므로 시작 시 import 하지 않는다
+        from geopy.distance import geodesic
+    for i in near_integer:
+        dist[i] = geodesic((lat, lon), (lats[i], lons[i])).meters
+    return dist
+
+
+class SphereIndex:
+    """
+    📍 최근접 좌표 색인 (haversine, 거리 = 대원거리 × 6371km)
+
+    광진구 상권/지하철역은 고유 좌표가 수십 곳뿐이라 전수 비교가 BallTree 보다 빠르고 sklearn 이 필요 없다.
+    같은 좌표의 행(상권별 분기/업종 행)은 첫 행을 돌려준다 (BallTree 는 질의 위치에 따라 그중 아무 행이나 골랐다).
+    """
+
+    # 한 번에 비교하는 질의 좌표 수 (질의 × 고유 좌표 거리 행렬 크기 제한)
+    QUERY_CHUNK = 4096
+
+    def __init__(self, lats, lons):
+        coords = np.radians(np.column_stack([lats, lons]).astype(np.float64))
+        _, first = np.unique(coords, axis=0, return_index=True)
+        self.rows = np.sort(first)
+        self.lat = coords[self.rows, 0]
+        self.lon = coords[self.rows, 1]
+        self.cos_lat = np.cos(self.lat)
+
+    def query(self, lats, lons):
+        """좌표 N개 → (가장 가까운 행 번호, 거리 m) 배열"""
+        query_rad = np.radians(np.column_stack([lats, lons]).astype(np.float64))
+        idx = np.empty(len(query_rad), dtype=np.intp)
+        dist = np.empty(len(query_rad), dtype=np.float64)
+        for start in range(0, len(query_rad), self.QUERY_CHUNK):
+            chunk = query_rad[start:start + self.QUERY_CHUNK]
+            q_lat, q_lon = chunk[:, :1], chunk[:, 1:]
+            # sklearn haversine 과 같은 식: sin²(Δφ/2) + cosφ₁·cosφ₂·sin²(Δλ/2) 최소 → 2·asin(√·)
+            sin_lat = np.sin(0.5 * (q_lat - self.lat))
+            sin_lon = np.sin(0.5 * (q_lon - self.lon))
+            reduced = sin_lat * sin_lat + np.cos(q_lat) * self.cos_lat * sin_lon * sin_lon
+            nearest = np.argmin(reduced, axis=1)
+            idx[start:start + len(chunk)] = self.rows[nearest]
+            dist[start:start + len(chunk)] = 2 * np.arcsin(np.sqrt(reduced[np.arange(len(chunk)), nearest]))
+        return idx, dist * EARTH_RADIUS_M
+
+
+# 🔹 가장 가까운 상권 탐색 (N개 좌표를 한 번에 조회)
+def find_nearest_areas(snap, lats, lons):
+    return snap.area_index.query(lats, lons)
+
+
+def find_nearest_area(snap, lat, lon):
+    idx, dist = find_nearest_areas(snap, [lat], [lon])
+    return snap.df.iloc[idx[0]], dist[0]
+
+
+class StationIndex:
+    """
+    🚇 지하철역 공간 인덱스 (상권 탐색과 같은 haversine 색인)
+    """
+
+    def __init__(self, df_subway):
+        self.names = np.array(
+            [f"{name} ({line})" for name, line in zip(df_subway["역명"], df_subway["노선명"])], dtype=object
+        )
+        self.traffic = df_subway["일일_평균_승하차_인원_수"].to_numpy(dtype=np.float64)
+        self.index = SphereIndex(df_subway["위도"].to_numpy(dtype=np.float64),
+                                 df_subway["경도"].to_numpy(dtype=np.float64))
+
+    def query(self, lats, lons):
+        return self.index.query(lats, lons)
+
+
+# 🔹 가장 가까운 지하철역 찾기 (N개 좌표 → 역명, 거리, 일일 승하차 인원 배열)
+def find_nearest_stations(snap, lats, lons):
+    stations = snap.stations
+    idx, dist = stations.query(lats, lons)
+    return stations.names[idx], dist, stations.traffic[idx]
+
+
+def find_nearest_station(snap, lat, lon):
+    names, dist, traffic = find_nearest_stations(snap, [lat], [lon])
+    return names[0], dist[0], traffic[0]
+
+
+def change_encoder_for(snap, category):
+    return (
+        snap.label_encoders["상권_변화_지표_명"]["커피_음료"]
+        if "커피" in category else snap.label_encoders["상권_변화_지표_명"]["한식중식_통합"]
+    )
+
+
+# ✅ 파생 피처 생성 함수 (안전 버전)
+def add_derived_features(df):
+    df = df.copy()
+    df["남성_비율"] = df["남성_유동인구_수"] / (df["총_유동인구_수"] + 1)
+    df["여성_비율"] = df["여성_유동인구_수"] / (df["총_유동인구_수"] + 1)
+    df["연령대_중심값"] = (
+        df["연령대_10_유동인구_수"] * 10 +
+        df["연령대_20_유동인구_수"] * 20 +
+        df["연령대_30_유동인구_수"] * 30 +
+        df["연령대_40_유동인구_수"] * 40 +
+        df["연령대_50_유동인구_수"] * 50 +
+        df["연령대_60_이상_유동인구_수"] * 65
+    ) / (df["총_유동인구_수"] + 1)
+    df["상주대비_유동비"] = df["총_유동인구_수"] / (df["총_상주인구_수"] + 1)
+    df["직장대비_유동비"] = df["총_유동인구_수"] / (df["총_직장_인구_수"] + 1)
+    if "운영_영업_개월_평균" in df.columns and "서울_운영_영업_개월_평균" in df.columns:
+        df["상권_vs_서울_운영차"] = df["운영_영업_개월_평균"] - df["서울_운영_영업_개월_평균"]
+    else:
+        df["상권_vs_서울_운영차"] = np.nan
+
+    if "폐업_영업_개월_평균" in df.columns and "서울_폐업_영업_개월_평균" in df.columns:
+        df["상권_vs_서울_폐업차"] = df["폐업_영업_개월_평균"] - df["서울_폐업_영업_개월_평균"]
+    else:
+        df["상권_vs_서울_폐업차"] = np.nan
+    df["경쟁_밀집도"] = df["300m내_경쟁_업종_수"] / (df["총_유동인구_수"] + 1)
+    df["역_접근성"] = df["가장_가까운_역_승하차_인원_수"] / (df["역까지_거리_m"] + 1)
+    return df
+
+
+def predict_unique(model, store, X):
+    """
+    피처가 완전히 같은 행은 한 번만 모델에 넣고 결과를 다시 펼친다
+    """
+    X = np.ascontiguousarray(X)
+    row_keys = X.view(np.dtype((np.void, X.dtype.itemsize * X.shape[1]))).ravel()
+    _, first, inverse = np.unique(row_keys, return_index=True, return_inverse=True)
+    return model.predict(store.frame(X[first]))[inverse]
+
+
+def prepare_points(snap, change_encoder, category, lats, lons):
+    """
+    좌표 N개의 최근접 상권/지하철역 조회 + 채점할 점의 피처 행렬 조립 (모델 채점 전 단계)
+    → (area_idx, stat_names, stat_dist, stat_traffic, sel, X, profile_rows)
+
+    - 최근접 상권/지하철역은 각각 색인 한 번 조회
+    - 상권 단위 작업(피처 저장소 행 조회)은 고유 상권당 한 번
+    sel 은 채점할 수 있는 점(매출 데이터가 충분하고 피처 저장소에 있는 상권)의 인덱스, X 는 sel 순서의 행,
+    profile_rows 는 상권 행 → 매출 분포 프로필 인덱스.
+    """
+    df = snap.df
+    profiles = snap.profiles
+    store = snap.feature_stores[category]
+
+    with stage("nearest_area"):
+        area_idx, _ = find_nearest_areas(snap, lats, lons)
+    with stage("station"):
+        stat_names, stat_dist, stat_traffic = find_nearest_stations(snap, lats, lons)
+
+    # 🔹 고유 상권 단위로 피처 저장소 행/매출 분포 프로필 준비
+    store_rows = {}
+    profile_rows = {}
+    for row_idx in np.unique(area_idx):
+        near = df.iloc[row_idx]
+        profile_idx = profiles.lookup(near["상권_코드_명"], category)
+        if profile_idx is None or profiles.counts[profile_idx] < MIN_BASIS_ROWS:
+            continue
+        store_row = store.row_of(near["상권_코드"])
+        if store_row is None:
+            continue
+        store_rows[row_idx] = store_row
+        profile_rows[row_idx] = profile_idx
+
+    sel = np.flatnonzero([row_idx in store_rows for row_idx in area_idx])
+    if len(sel) == 0:
+        return area_idx, stat_names, stat_dist, stat_traffic, sel, None, profile_rows
+
+    near_rows = df.iloc[area_idx[sel]]
+    change_labels = near_rows["상권_변화_지표_명"].to_numpy()
+    labels, label_inverse = np.unique(change_labels, return_inverse=True)
+    change_encoded = change_encoder.transform(labels)[label_inverse]
+
+    # ✅ 피처 행렬 구성 (저장소 행 gather + 위치별 컬럼 덮어쓰기)
+    with stage("feature_assembly"):
+        X = store.assemble(
+            [store_rows[row_idx] for row_idx in area_idx[sel]],
+            station_dist=stat_dist[sel],
+            station_traffic=stat_traffic[sel],
+            change_encoded=change_encoded.astype(int),
+            competitors=near_rows["300m내_경쟁_업종_수"].to_numpy(dtype=float),
+            seasonal=True,
+        )
+    return area_idx, stat_names, stat_dist, stat_traffic, sel, X, profile_rows
+
+
+def score_points(snap, model, change_encoder, category, lats, lons, weights, deadline=None):
+    """
+    좌표 N개를 한 번에 채점 → (area_idx, stat_names, stat_dist, stat_traffic, sales)
+
+    - 최근접 상권/지하철역 조회와 피처 조립은 prepare_points
+    - 요일/시간대 보정은 미리 계산된 프로필 인덱스 조회 (weights = temporal_weights(...))
+    - 피처 행렬 하나로 model.predict 한 번 (동일 피처 행은 중복 채점하지 않음)
+    매출 데이터가 부족하거나 피처 저장소에 없는 상권에 속한 점은 sales 가 None.
+    모델 채점 전에 deadline 이 지났으면 채점하지 않고 (모든 sales 가 None) deadline.cut() 으로 표시한다.
+    """
+    profiles = snap.profiles
+    store = snap.feature_stores[category]
+    apply_temporal_profile = snap.bojeong.apply_temporal_profile
+
+    area_idx, stat_names, stat_dist, stat_traffic, sel, X, profile_rows = prepare_points(
+        snap, change_encoder, category, lats, lons
+    )
+    sales = [None] * len(area_idx)
+    if len(sel) == 0:
+        return area_idx, stat_names, stat_dist, stat_traffic, sales
+    if deadline is not None and deadline.expired():
+        # ⏰ 마감: 조회/조립까지만 하고 모델 채점은 건너뜀
+        deadline.cut()
+        return area_idx, stat_names, stat_dist, stat_traffic, sales
+
+    with stage("inference"):
+        predictions = predict_unique(model, store, X)
+
+    with stage("temporal"):
+        for k, i in enumerate(sel):
+            sales[i] = apply_temporal_profile(predictions[k], profiles, profile_rows[area_idx[i]], weights)
+    return area_idx, stat_names, stat_dist, stat_traffic, sales
+
+
+def neighbour_result(lat, lon, dist, area_name, station_name, station_dist, station_traffic, sales, base_sales):
+    percent = round(sales / base_sales * 100) if base_sales else None
+    return {
+        "lat": float(lat), "lon": float(lon), "dist": int(dist), "sales": int(sales),
+        "percent": percent, "상권명": area_name,
+        "지하철역": station_name, "지하철역거리": int(station_dist), "승하차": int(station_traffic)
+    }
+
+
+def neighbour_grid(lat, lon, radius, step):
+    """
+    주변 탐색 격자: (adj_lat, adj_lon, dist, cand)
+    기존 dy → dx 이중 루프와 같은 좌표/순서, cand 는 반경 안이면서 입력 위치 자신이 아닌 점의 인덱스
+    """
+    offsets = np.arange(-radius, radius + 1, step)
+    dy = np.repeat(offsets, len(offsets))
+    dx = np.tile(offsets, len(offsets))
+    adj_lat, adj_lon = offset_latlon(lat, lon, dy, dx)
+    dist = surface_distance_m(lat, lon, adj_lat, adj_lon)
+    is_origin = (np.abs(adj_lat - lat) < 1e-6) & (np.abs(adj_lon - lon) < 1e-6)
+    cand = np.flatnonzero((dist <= radius) & ~is_origin)
+    return adj_lat, adj_lon, dist, cand
+
+
+def score_neighbours(snap, model, change_encoder, category, lat, lon, base_sales,
+                     weights, radius=300, step=30, deadline=None, chunk_points=NEIGHBOUR_CHUNK_POINTS):
+    """
+    입력 위치 주변 격자 후보를 전부 채점해서 추천 후보 목록을 돌려준다 (전수 탐색)
+
+    후보 좌표/반경 필터는 배열 연산, 채점은 가까운 점부터 chunk_points 개씩 score_points 로.
+    덩어리 사이나 덩어리의 모델 채점 직전에 deadline 이 지났으면 멈추고 그때까지 채점한 (가까운) 점만 돌려준다.
+    후보 순서는 기존 dy → dx 이중 루프와 같아서 동률 정렬 결과도 동일하다.
+    """
+    # 📍 후보 좌표 생성 + 반경 필터 (입력 위치 자신은 제외)
+    adj_lat, adj_lon, dist, cand = neighbour_grid(lat, lon, radius, step)
+    if len(cand) == 0:
+        return []
+
+    # 🔹 가까운 점부터 덩어리로 채점 (한 덩어리면 기존처럼 score_points 한 번)
+    chunk_points = max(1, chunk_points)
+    by_dist = cand[np.argsort(dist[cand], kind="stable")]
+    scored = {}
+    for c0 in range(0, len(by_dist), chunk_points):
+        if c0 and deadline is not None and deadline.expired():
+            # ⏰ 마감: 지금까지 채점한 점만으로 순위 구성
+            deadline.cut()
+            break
+        chunk = by_dist[c0:c0 + chunk_points]
+        area_idx, stat_names, stat_dist, stat_traffic, sales = score_points(
+            snap, model, change_encoder, category, adj_lat[chunk], adj_lon[chunk], weights, deadline
+        )
+        for k, i in enumerate(chunk):
+            scored[i] = (area_idx[k], stat_names[k], stat_dist[k], stat_traffic[k], sales[k])
+
+    results = []
+    area_names = snap.df["상권_코드_명"].to_numpy()
+    for i in cand:
+        if i not in scored or scored[i][4] is None:
+            continue
+        area, station_name, station_dist, station_traffic, sales = scored[i]
+        results.append(neighbour_result(
+            adj_lat[i], adj_lon[i], dist[i], area_names[area],
+            station_name, station_dist, station_traffic, sales, base_sales
+        ))
+    return results
+
+
+def top_group_cut(sales_values, groups=RANK_GROUPS):
+    """
+    rank_recommendations 와 같은 방식으로 묶었을 때 마지막(기본 3번째) 그룹의 시작 매출.
+    그룹이 그만큼 안 되면 -inf (어떤 점이든 순위에 들어갈 수 있음)
+    """
+    values = sorted(sales_values, reverse=True)
+    starts = []
+    i = 0
+    while i < len(values) and len(starts) < groups:
+        start = values[i]
+        starts.append(start)
+        i += 1
+        while i < len(values) and abs(values[i] - start) <= RANK_GROUP_TOLERANCE:
+            i += 1
+    return starts[-1] if len(starts) == groups else -math.inf
+
+
+def adaptive_neighbours(snap, model, change_encoder, category, lat, lon, base_sales,
+                        weights, radius=300, min_step=30, budget=None, deadline=None,
+                        chunk_points=NEIGHBOUR_CHUNK_POINTS):
+    """
+    적응형 주변 탐색: 전수 탐색과 같은 격자를 모델 예측이 실제로 달라지는 칸으로 나눠 칸마다 한 번만 채점한다
+
+    1. 반경 안 격자 점(score_neighbours 와 같은 점)의 최근접 상권/지하철역을 조회하고 피처 행을 조립
+    2. 최근접 상권이 같고 위치별 피처가 모델의 모든 분기 기준에 대해 같은 쪽에 있는 점들을 한 칸으로 묶는다
+       (상권/지하철역이 바뀌거나 역 거리가 분기 기준을 넘는 곳에서만 칸이 나뉨). 한 칸의 점들은 모든 트리에서
+       같은 잎을 지나므로 대표 점 하나만 가까운 칸부터 chunk_points 개씩 채점
+    3. 칸의 매출을 점마다 펼쳐서 상위 3개 그룹에 들 수 있는 점(3번째 그룹 시작 - 공동 순위 폭 이상)만 결과로 만든다
+    budget(채점할 칸 수) 이나 deadline 에 걸리면 그때까지 채점한 (가까운) 칸의 점만 쓰고,
+    걸리지 않으면 추천 순위(추천지/매출/순서)는 전수 탐색과 같다. 결과 형식/순서(dy → dx)도 같다.
+    """
+    adj_lat, adj_lon, dist, cand = neighbour_grid(lat, lon, radius, min_step)
+    if len(cand) == 0:
+        return []
+    area_idx, stat_names, stat_dist, stat_traffic, sel, X, profile_rows = prepare_points(
+        snap, change_encoder, category, adj_lat[cand], adj_lon[cand]
+    )
+    if len(sel) == 0:
+        return []
+
+    # 🔹 칸 = (최근접 상권, 점마다 달라지는 피처의 분기 구간). 열을 하나씩 합치면서 번호를 다시 매겨 정수 키 하나로
+    varying = np.flatnonzero(~(X == X[0]).all(axis=0))
+    cell = area_idx[sel].astype(np.int64)
+    for column in snap.split_index_for(category).path_keys(X, varying).T:
+        _, cell = np.unique(cell * (column.max() + 2) + column + 1, return_inverse=True)
+    _, first, inverse = np.unique(cell, return_index=True, return_inverse=True)
+    cell_dist = np.full(len(first), np.inf)
+    np.minimum.at(cell_dist, inverse, dist[cand[sel]])
+    order = np.argsort(cell_dist, kind="stable")
+    if budget is not None:
+        order = order[:budget]
+
+    # 🔹 가까운 칸부터 대표 점 채점
+    profiles = snap.profiles
+    store = snap.feature_stores[category]
+    apply_temporal_profile = snap.bojeong.apply_temporal_profile
+    cell_sales = np.full(len(first), np.nan)
+    chunk_points = max(1, chunk_points)
+    for c0 in range(0, len(order), chunk_points):
+        # 첫 덩어리도 확인 (격자 전체의 최근접 조회/피처 조립이 끝난 시점)
+        if deadline is not None and deadline.expired():
+            # ⏰ 마감: 지금까지 채점한 칸만으로 순위 구성
+            deadline.cut()
+            break
+        cells = order[c0:c0 + chunk_points]
+        with stage("inference"):
+            predictions = predict_unique(model, store, X[first[cells]])
+        with stage("temporal"):
+            for k, cell in enumerate(cells):
+                profile_idx = profile_rows[area_idx[sel[first[cell]]]]
+                cell_sales[cell] = apply_temporal_profile(predictions[k], profiles, profile_idx, weights)
+
+    # 🔹 상위 3개 그룹에 들 수 있는 점만 결과로 (순위는 int 매출로 묶으므로 같은 값으로 비교)
+    sales = cell_sales[inverse]
+    scored = ~np.isnan(sales)
+    int_sales = np.trunc(np.where(scored, sales, 0))
+    cut = top_group_cut(int_sales[scored].tolist())
+    keep = np.flatnonzero(scored & (int_sales >= cut - RANK_GROUP_TOLERANCE))
+
+    logger.debug("🔎 적응형 주변 탐색", extra={"fields": {
+        "radius": radius, "min_step": min_step, "격자점": len(cand), "칸": len(first),
+        "채점칸": int(np.count_nonzero(~np.isnan(cell_sales))), "결과점": len(keep),
+    }})
+
+    results = []
+    area_names = snap.df["상권_코드_명"].to_numpy()
+    for k in keep:
+        i = sel[k]
+        results.append(neighbour_result(
+            adj_lat[cand[i]], adj_lon[cand[i]], dist[cand[i]], area_names[area_idx[i]],
+            stat_names[i], stat_dist[i], stat_traffic[i], sales[k], base_sales
+        ))
+    return results
+
+
+def rank_recommendations(results, base_sales):
+    """
+    예상 매출 내림차순으로 100만원 이내 차이는 공동 순위로 묶어 상위 3개 그룹 구성
+    """
+    final_recommendations = []
+    ranked_output = []
+    verbose = logger.isEnabledFor(logging.DEBUG)
+    if results:
+        results_sorted = sorted(results, key=lambda x: -x["sales"])
+        rank = 1
+        i = 0
+        printed_ranks = 0
+
+        while i < len(results_sorted) and printed_ranks < RANK_GROUPS:
+            current_group = [results_sorted[i]]
+            current_sales = results_sorted[i]["sales"]
+            i += 1
+            while i < len(results_sorted) and abs(results_sorted[i]["sales"] - current_sales) <= RANK_GROUP_TOLERANCE:
+                current_group.append(results_sorted[i])
+                i += 1
+
+            group_percent = (
+                f"(입력 위치 대비: {round(current_sales / base_sales * 100)}%)"
+                if base_sales else ""
+            )
+            if verbose:
+                title = (
+                    f"🔸 공동 {rank}위 (약 {int(current_sales):,}원 {group_percent})"
+                    if len(current_group) > 1 else
+                    f"{rank}위 (약 {int(current_sales):,}원 {group_percent})"
+                )
+                logger.debug(title)
+
+            group_result = {
+                "순위": rank,
+                "매출": int(current_sales),
+                "퍼센트": group_percent,
+                "공동": len(current_group) > 1,
+                "추천지": []
+            }
+
+            for loc in current_group[:3]:
+                if verbose:
+                    logger.debug(
+                        f"🛍️ 상권: {loc['상권명']} / 📍 위치: 위도 {loc['lat']:.6f}, 경도 {loc['lon']:.6f}, "
+                        f"거리 {loc['dist']}m / 🚇 지하철: {loc['지하철역']} / 거리: {loc['지하철역거리']}m / "
+                        f"승하차: {loc['승하차']:,}명"
+                    )
+
+                group_result["추천지"].append({
+                    "상권명": loc["상권명"],
+                    "lat": loc["lat"],
+                    "lon": loc["lon"],
+                    "거리": loc["dist"],
+                    "지하철역": loc["지하철역"],
+                    "지하철역거리": loc["지하철역거리"],
+                    "승하차": loc["승하차"],
+                    "예상매출": loc["sales"]
+                })
+            final_recommendations.append(loc)
+            ranked_output.append(group_result)
+            printed_ranks += 1
+            rank += 1
+    else:
+        logger.debug("✅ 주변에 더 나은 위치는 없습니다.")
+    return final_recommendations, ranked_output
+
+
+def predict_location(snap, lat, lon, category, selected_days, start_time, end_time, store_count, heatmap=None,
+                     search=None, deadline=None):
+    """
+    /api/predict 파이프라인: 입력 위치 예측 + 주변 추천 순위. (응답 dict, HTTP 상태 코드) 반환
+    heatmap 이 주어지면 주변 후보는 미리 계산된 래스터 조회 + 요일/시간대 보정만으로 채점한다.
+    search 는 parse_search_params 결과 (없으면 기본 전수 격자 탐색).
+    deadline(workers.Deadline) 이 지나서 주변 탐색을 줄였으면 응답에 "주변탐색중단": true 를 붙인다.
+    """
+    profiles = snap.profiles
+    apply_temporal_profile = snap.bojeong.apply_temporal_profile
+    # 🕒 요일/시간대 보정 가중치 (요청당 한 번)
+    weights = snap.bojeong.temporal_weights(selected_days, start_time, end_time)
+
+    # 📍 입력 위치 기준 상권/지하철 분석
+    with stage("nearest_area"):
+        nearest, _ = find_nearest_area(snap, lat, lon)
+    with stage("station"):
+        station_name, station_dist, station_traffic = find_nearest_station(snap, lat, lon)
+
+    change_encoder = change_encoder_for(snap, category)
+    change_encoded = change_encoder.transform([nearest["상권_변화_지표_명"]])[0]
+
+    model = snap.model_for(category)
+    profile_idx = profiles.lookup(nearest["상권_코드_명"], category)
+    basis_count = profiles.count(nearest["상권_코드_명"], category)
+
+    # 📌 예측 불가능한 조건 처리
+    if basis_count == 0:
+        logger.info(
+            "❌ 예측 불가: 해당 상권+업종 조합에 대한 매출 데이터가 존재하지 않아 예측할 수 없습니다.",
+            extra={"fields": {"상권": nearest["상권_코드_명"], "업종": category}},
+        )
+        return {
+            "error": "해당 상권+업종 조합에 대한 매출 데이터가 없어 예측할 수 없습니다."
+        }, 400
+
+    if basis_count <= 3:
+        logger.info(
+            "⚠️ 참고: 해당 상권+업종 조합은 매출 데이터가 3개 이하로, 예측 결과의 신뢰도가 낮을 수 있습니다.",
+            extra={"fields": {"상권": nearest["상권_코드_명"], "업종": category, "데이터수": basis_count}},
+        )
+
+    # ✅ 입력 피처 구성 (피처 저장소 행 + 위치별 컬럼 덮어쓰기)
+    store = snap.feature_stores[category]
+    store_row = store.row_for(nearest["상권_코드"])
+    if store_count is not None:
+        competitors = store_count
+    else:
+        competitors = nearest["300m내_경쟁_업종_수"]  # fallback
+    with stage("feature_assembly"):
+        X = store.assemble(
+            [store_row],
+            station_dist=[station_dist],
+            station_traffic=[station_traffic],
+            change_encoded=[int(change_encoded)],
+            competitors=[competitors],
+        )
+
+    with stage("inference"):
+        predicted_sales = model.predict(store.frame(X))[0]
+    with stage("temporal"):
+        predicted_sales = apply_temporal_profile(predicted_sales, profiles, profile_idx, weights)
+    base_sales = predicted_sales
+
+    base_result = {"lat": lat, "lon": lon, "sales": int(predicted_sales),
+                   "상권명": nearest["상권_코드_명"],
+                   "지하철역": station_name,
+                   "지하철역거리": int(station_dist),
+                   "승하차": int(station_traffic)
+                   }
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("💰 입력 위치 예측", extra={"fields": {
+            "상권": nearest["상권_코드_명"],
+            "지하철역": station_name,
+            "지하철역거리": f"{station_dist:.1f}m",
+            "승하차": int(station_traffic),
+            "영업시간": f"{start_time}-{end_time}",
+            "영업요일": ",".join(selected_days),
+            "예측매출": int(predicted_sales),
+        }})
+
+    final_recommendations, ranked_output = recommend_neighbours(
+        snap, model, change_encoder, category, lat, lon, base_sales, weights, heatmap, search, deadline
+    )
+
+    result = {
+        "입력위치": base_result,
+        "추천위치": final_recommendations,
+        "추천순위": ranked_output
+    }
+    if deadline is not None and deadline.was_cut:
+        result["주변탐색중단"] = True
+    return result, 200
+
+
+def recommend_neighbours(snap, model, change_encoder, category, lat, lon, base_sales, weights, heatmap=None,
+                         search=None, deadline=None):
+    """
+    입력 위치 주변 후보 채점 + 추천 순위 구성 → (추천위치, 추천순위)
+    """
+    search = search or DEFAULT_SEARCH
+    with stage("neighbours"):
+        if deadline is not None and deadline.expired():
+            # ⏰ 대기열/입력 위치 예측 중에 마감이 지났으면 주변 탐색 없이 입력 위치 결과만
+            deadline.cut()
+            results = []
+        elif heatmap is not None:
+            # 🗺️ 오프라인 래스터에서 주변 셀 조회
+            results = heatmap.score_neighbours(snap, category, lat, lon, base_sales, weights, radius=search["radius"])
+        elif search["search"] == "adaptive":
+            # 🔎 거친 격자부터 필요한 곳만 세분화해서 채점
+            results = adaptive_neighbours(
+                snap, model, change_encoder, category, lat, lon, base_sales,
+                weights, radius=search["radius"], min_step=search["min_step"], budget=search["budget"],
+                deadline=deadline
+            )
+        else:
+            # 🔹 주변 격자 후보 일괄 채점 (최근접 조회/predict 한 번씩)
+            results = score_neighbours(
+                snap, model, change_encoder, category, lat, lon, base_sales,
+                weights, radius=search["radius"], step=search["min_step"], deadline=deadline
+            )
+
+    # 🔹 추천 순위 구성
+    with stage("ranking"):
+        final_recommendations, ranked_output = rank_recommendations(results, base_sales)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("📍 추천 결과", extra={"fields": {
+            "후보수": len(results), "추천위치": len(final_recommendations), "추천순위": len(ranked_output),
+        }})
+    return final_recommendations, ranked_output
+
+
+def predict_batch(snap, items, neighbours=True, heatmap=None, search=None, deadline=None, item_deadline_ms=0):
+    """
+    여러 입력 위치를 한 번에 예측해서 입력 순서대로 (응답 dict, HTTP 상태 코드) 를 내보내는 제너레이터
+
+    items: {"lat", "lon", "category", "selected_days", "start_time", "end_time", "store_count"} 목록
+    - 최근접 상권/지하철역은 배치 전체를 한 번씩 조회
+    - 피처 행은 업종별로 한 번에 조립하고, 같은 모델을 쓰는 업종끼리 모아 model.predict 한 번
+    - neighbours=True 면 항목마다 주변 추천을 붙여서 /api/predict 와 같은 응답을 만든다
+      (입력 위치 예측은 배치 단계에서 끝나 있고, 주변 탐색만 스트리밍하면서 항목별로 수행)
+    - deadline 이 지나면 그 뒤 항목은 주변 탐색 없이 입력 위치만 (해당 항목에 "주변탐색중단": true)
+    - item_deadline_ms 를 주면 항목마다 주변 탐색을 시작할 때 그만큼의 마감을 따로 잡는다
+      (배치 전체가 마감 하나를 나눠 쓰면 뒤쪽 항목은 주변 탐색을 못 한다)
+    항목 하나가 실패해도 나머지는 계속 처리한다 (실패한 항목은 {"error": ...}).
+    """
+    n = len(items)
+    if n == 0:
+        return
+
+    df = snap.df
+    profiles = snap.profiles
+    apply_temporal_profile = snap.bojeong.apply_temporal_profile
+    outcomes = [None] * n
+
+    # 📍 입력 위치 전체의 최근접 상권/지하철역
+    lats = np.array([item["lat"] for item in items], dtype=float)
+    lons = np.array([item["lon"] for item in items], dtype=float)
+    with stage("nearest_area"):
+        area_idx, _ = find_nearest_areas(snap, lats, lons)
+    with stage("station"):
+        stat_names, stat_dist, stat_traffic = find_nearest_stations(snap, lats, lons)
+
+    # 🔹 항목별 피처 저장소 행/보정 프로필 준비 (업종별로 모음)
+    by_category = {}
+    prepared = {}
+    for i, item in enumerate(items):
+        category = item["category"]
+        try:
+            nearest = df.iloc[area_idx[i]]
+            change_encoder = change_encoder_for(snap, category)
+            change_encoded = change_encoder.transform([nearest["상권_변화_지표_명"]])[0]
+            if profiles.count(nearest["상권_코드_명"], category) == 0:
+                outcomes[i] = ({"error": "해당 상권+업종 조합에 대한 매출 데이터가 없어 예측할 수 없습니다."}, 400)
+                continue
+            store_row = snap.feature_stores[category].row_for(nearest["상권_코드"])
+        except Exception as e:
+            outcomes[i] = ({"error": f"❌ 예측 중 오류 발생: {str(e)}"}, 500)
+            continue
+
+        store_count = item["store_count"]
+        prepared[i] = {
+            "nearest": nearest,
+            "change_encoder": change_encoder,
+            "profile_idx": profiles.lookup(nearest["상권_코드_명"], category),
+            "weights": snap.bojeong.temporal_weights(item["selected_days"], item["start_time"], item["end_time"]),
+        }
+        rows = by_category.setdefault(category, {"index": [], "rows": [], "change": [], "competitors": []})
+        rows["index"].append(i)
+        rows["rows"].append(store_row)
+        rows["change"].append(int(change_encoded))
+        rows["competitors"].append(store_count if store_count is not None else nearest["300m내_경쟁_업종_수"])
+
+    # ✅ 업종별 피처 행렬 → 같은 모델끼리 묶어서 predict 한 번
+    by_model = {}
+    for category, rows in by_category.items():
+        store = snap.feature_stores[category]
+        index = np.array(rows["index"])
+        with stage("feature_assembly"):
+            X = store.assemble(
+                rows["rows"],
+                station_dist=stat_dist[index],
+                station_traffic=stat_traffic[index],
+                change_encoded=rows["change"],
+                competitors=rows["competitors"],
+            )
+        model = snap.model_for(category)
+        group = by_model.setdefault(id(model), {"model": model, "store": store, "index": [], "X": []})
+        group["index"].extend(rows["index"])
+        group["X"].append(X)
+
+    predicted = {}
+    for group in by_model.values():
+        try:
+            with stage("inference"):
+                predictions = group["model"].predict(group["store"].frame(np.vstack(group["X"])))
+        except Exception as e:
+            for i in group["index"]:
+                outcomes[i] = ({"error": f"❌ 예측 중 오류 발생: {str(e)}"}, 500)
+            continue
+        predicted.update(zip(group["index"], predictions))
+
+    # 🕒 요일/시간대 보정 + 입력 위치 결과
+    base = {}
+    with stage("temporal"):
+        for i, raw_sales in predicted.items():
+            entry = prepared[i]
+            sales = apply_temporal_profile(raw_sales, profiles, entry["profile_idx"], entry["weights"])
+            base[i] = sales
+            outcomes[i] = {
+                "lat": items[i]["lat"], "lon": items[i]["lon"], "sales": int(sales),
+                "상권명": entry["nearest"]["상권_코드_명"],
+                "지하철역": stat_names[i],
+                "지하철역거리": int(stat_dist[i]),
+                "승하차": int(stat_traffic[i])
+            }
+
+    for i, item in enumerate(items):
+        outcome = outcomes[i]
+        if isinstance(outcome, tuple):
+            yield outcome
+            continue
+        if not neighbours:
+            yield {"입력위치": outcome}, 200
+            continue
+
+        entry = prepared[i]
+        category = item["category"]
+        item_deadline = Deadline.after_ms(item_deadline_ms) if item_deadline_ms else deadline
+        try:
+            final_recommendations, ranked_output = recommend_neighbours(
+                snap, snap.model_for(category), entry["change_encoder"], category,
+                item["lat"], item["lon"], base[i], entry["weights"], heatmap, search, item_deadline
+            )
+        except Exception as e:
+            yield {"error": f"❌ 예측 중 오류 발생: {str(e)}"}, 500
+            continue
+        result = {
+            "입력위치": outcome,
+            "추천위치": final_recommendations,
+            "추천순위": ranked_output
+        }
+        if item_deadline is not None and item_deadline.was_cut:
+            result["주변탐색중단"] = True
+        yield result, 200
+
+
+def predict_industries(snap, lat, lon, industries, selected_days, start_time, end_time, store_counts=None):
+    """
+    한 위치에서 여러 업종의 예상 매출을 한 번에 계산해 매출 순으로 → (응답 dict, HTTP 상태 코드)
+
+    industries: [(업종코드, 업종명), ...], store_counts: {업종코드: 경쟁 점포 수} (없으면 상권 기본값)
+    같은 위치 항목을 업종별로 predict_batch 에 넣으므로 최근접 상권/지하철역 조회는 한 번,
+    같은 모델 파일을 쓰는 업종(한식/중식)은 predict 한 번으로 묶이고,
+    상권 변화 지표 인코더/요일·시간대 보정은 업종별로 적용된다.
+    """
+    store_counts = store_counts or {}
+    items = [{
+        "lat": lat, "lon": lon, "category": category, "selected_days": selected_days,
+        "start_time": start_time, "end_time": end_time, "store_count": store_counts.get(code),
+    } for code, category in industries]
+
+    location = None
+    scored = []
+    unavailable = []
+    for (code, category), (result, status) in zip(industries, predict_batch(snap, items, neighbours=False)):
+        if status != 200:
+            unavailable.append({"업종코드": code, "업종": category, "status": status, "error": result["error"]})
+            continue
+        base = result["입력위치"]
+        if location is None:
+            location = {key: value for key, value in base.items() if key != "sales"}
+        scored.append((code, category, base["sales"]))
+
+    if not scored:
+        status = 400 if all(entry["status"] == 400 for entry in unavailable) else 500
+        return {"error": "예측할 수 있는 업종이 없습니다.", "예측불가": unavailable}, status
+
+    # 🏆 예상 매출 내림차순 (같으면 요청한 업종 순서)
+    scored.sort(key=lambda entry: -entry[2])
+    top_sales = scored[0][2]
+    ranked = [{
+        "순위": rank,
+        "업종코드": code,
+        "업종": category,
+        "매출": sales,
+        "퍼센트": f"(1위 대비: {round(sales / top_sales * 100)}%)" if top_sales else "",
+    } for rank, (code, category, sales) in enumerate(scored, 1)]
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🏷️ 업종별 예측", extra={"fields": {
+            "상권": location["상권명"], "순위": ",".join(f"{entry['업종']}={entry['매출']}" for entry in ranked),
+        }})
+    return {"입력위치": location, "업종순위": ranked, "예측불가": unavailable}, 200
+
+
+def parse_industries_input(data, industry_codes):
+    """
+    /api/predict/industries 입력 dict → (lat, lon, codes, selected_days, start_time, end_time, store_counts)
+    industries 를 주지 않으면 industry_codes 전체, 지원하지 않는 코드가 있으면 ValueError
+    """
+    lat = float(data["lat"])
+    lon = float(data["lon"])
+    start_time_str, end_time_str = data["time_range"].split("-")
+    start_time = int(start_time_str)
+    end_time = int(end_time_str)
+    selected_days = data["day_of_week"]
+
+    codes = data.get("industries") or list(industry_codes)
+    if not isinstance(codes, list):
+        raise ValueError("industries 는 업종 코드 목록이어야 합니다.")
+    codes = list(dict.fromkeys(codes))
+    unknown = [code for code in codes if code not in industry_codes]
+    if unknown:
+        raise ValueError(f"지원하지 않는 업종 코드입니다: {', '.join(map(str, unknown))}")
+
+    store_counts = {code: int(count) for code, count in (data.get("store_counts") or {}).items() if code in codes}
+    return lat, lon, codes, selected_days, start_time, end_time, store_counts
+
+
+def parse_predict_input(data):
+    """
+    /api/predict 입력 dict → (lat, lon, indsMclsCd, selected_days, start_time, end_time, store_count)
+    """
+    lat = float(data["lat"])
+    lon = float(data["lon"])
+    indsMclsCd = data["indsMclsCd"]
+
+    time_range = data["time_range"]  # 예: "6-14"
+    start_time_str, end_time_str = time_range.split("-")
+    start_time = int(start_time_str)
+    end_time = int(end_time_str)
+    selected_days = data["day_of_week"]
+    store_count = int(data["store_count"])
+    return lat, lon, indsMclsCd, selected_days, start_time, end_time, store_count
+
+
+def parse_flag(data, name, default=False):
+    """
+    요청의 참/거짓 옵션: JSON true/false 또는 "true"/"false"/"1"/"0" (그 밖의 값은 ValueError)
+    bool("false") 처럼 문자열이 참으로 바뀌지 않도록 엄격하게 읽는다
+    """
+    value = data.get(name)
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ("true", "1", "false", "0"):
+        return value.strip().lower() in ("true", "1")
+    raise ValueError(f"{name} 은 true 또는 false 여야 합니다: {value!r}")
+
+
+DEFAULT_SEARCH = {"search": "grid", "radius": NEIGHBOUR_RADIUS, "min_step": NEIGHBOUR_STEP, "budget": None}
+
+
+def parse_search_params(data):
+    """
+    요청의 search/radius/min_step/budget → 주변 탐색 설정 dict (잘못된 값은 ValueError)
+    """
+    search = data.get("search") or NEIGHBOUR_SEARCH
+    if search not in ("grid", "adaptive"):
+        raise ValueError(f"search 는 grid 또는 adaptive 여야 합니다: {search}")
+    radius = int(data.get("radius") or NEIGHBOUR_RADIUS)
+    min_step = int(data.get("min_step") or NEIGHBOUR_STEP)
+    if not 0 < radius <= NEIGHBOUR_MAX_RADIUS:
+        raise ValueError(f"radius 는 1 ~ {NEIGHBOUR_MAX_RADIUS}m 여야 합니다: {radius}")
+    if not NEIGHBOUR_MIN_STEP <= min_step <= radius:
+        raise ValueError(f"min_step 은 {NEIGHBOUR_MIN_STEP}m 이상, radius 이하여야 합니다: {min_step}")
+
+    lattice = (2 * (radius // min_step) + 1) ** 2
+    if search == "grid":
+        if lattice > NEIGHBOUR_MAX_POINTS:
+            raise ValueError("격자 점이 너무 많습니다. radius 를 줄이거나 min_step 을 늘리거나 search=adaptive 를 쓰세요.")
+        budget = None
+    else:
+        if lattice > NEIGHBOUR_MAX_LATTICE:
+            raise ValueError("격자 점이 너무 많습니다. radius 를 줄이거나 min_step 을 늘리세요.")
+        budget = min(int(data.get("budget") or NEIGHBOUR_MAX_POINTS), NEIGHBOUR_MAX_POINTS)
+    return {"search": search, "radius": radius, "min_step": min_step, "budget": budget}
+
+
+def search_key(search):
+    if search is None or search == DEFAULT_SEARCH:
+        return None
+    return (search["search"], search["radius"], search["min_step"], search["budget"])
+
+
+def snap_coord(value, step):
+    if not step:
+        return value
+    return round(round(value / step) * step, 7)
+
+
+def predict_cache_key(lat, lon, indsMclsCd, selected_days, start_time, end_time, store_count, step=0, mode=None,
+                      search=None):
+    """
+    /api/predict 결과 캐시 키: 격자에 맞춘 좌표 + 정렬된 요일 + 나머지 입력 + 주변 탐색 설정
+    """
+    return (
+        snap_coord(lat, step), snap_coord(lon, step), indsMclsCd,
+        start_time, end_time, tuple(sorted(selected_days)), store_count, mode, search_key(search),
+    )
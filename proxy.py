@@ -1,31 +1,168 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-import pandas as pd
-import numpy as np
-from urllib.parse import urlencode
-from geopy.distance import geodesic
-from sklearn.neighbors import BallTree
-import importlib.util
-import urllib3
-import math
-import ssl
 import json
-import joblib
+import logging
 import os
+import random
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from logs import LOG_SLOW_MS, configure_logging
+from metrics import (
+    PROFILE_DIR, PROFILE_SAMPLE_RATE, PROFILE_SLOW_MS, REQUEST_SECONDS, REQUESTS_TOTAL,
+    SamplingProfiler, end_trace, metrics, process_uptime, stage, start_trace
+)
+from registry import registry, INDUSTRY_CODE_MAP
+from upstream import SERVICE_KEY, UpstreamError, get_client
+from store_list import (
+    AllPages, PROXY_COORD_STEP, fetch_store_page, project_items, proxy_cache, proxy_flight, quantize_coord, dump_json
+)
+from cache import VersionedCache
+from heatmap import TILE_SIZE, get_heatmap, heatmap_tile, parse_tile_params
+from predictor import (
+    parse_flag, parse_industries_input, parse_predict_input, parse_search_params, predict_batch, predict_cache_key,
+    predict_industries, predict_location, snap_coord
+)
+from workers import (
+    PREDICT_BATCH_ITEM_DEADLINE_MS, PREDICT_DEADLINE_MS, Deadline, Overloaded, predict_pool, wait_timeout
+)
+
+# 📝 로그는 큐에 넣고 별도 스레드가 출력 (LOG_LEVEL, LOG_FORMAT)
+configure_logging()
+logger = logging.getLogger("proxy")
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
+# 📦 모델/데이터 사전 로드 (gunicorn --preload 시 워커들이 공유)
+registry.warm()
+# 🚀 프로세스 시작부터 요청을 받을 준비가 될 때까지 (import + 사전 로드)
+READY_SECONDS = process_uptime()
+if READY_SECONDS is not None:
+    logger.info("🚀 준비 완료 (%.2fs)", READY_SECONDS)
+
+# 🗃️ /api/predict 결과 캐시 (바이트 상한 LRU, TTL 0 이면 만료 없음, 모델/데이터 버전이 바뀌면 비움)
+PREDICT_CACHE_MAX_BYTES = int(os.environ.get("PREDICT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+PREDICT_CACHE_TTL = float(os.environ.get("PREDICT_CACHE_TTL", "0")) or None
+# 좌표 격자 (경위도 단위, 예: 0.0001 ≈ 10m), 0 이면 좌표 그대로 사용
+PREDICT_COORD_STEP = float(os.environ.get("PREDICT_COORD_STEP", "0"))
+# /api/predict/batch 한 번에 받을 최대 항목 수
+PREDICT_BATCH_MAX_ITEMS = int(os.environ.get("PREDICT_BATCH_MAX_ITEMS", "1000"))
+# neighbours=true 면 항목마다 주변 탐색(기본 격자 ~15ms, 마감 PREDICT_BATCH_ITEM_DEADLINE_MS)을 하므로
+# 배치 하나가 예측 풀 워커를 오래 잡지 않게 항목 수를 따로 제한한다
+PREDICT_BATCH_MAX_NEIGHBOUR_ITEMS = int(os.environ.get("PREDICT_BATCH_MAX_NEIGHBOUR_ITEMS", "100"))
+
+predict_cache = VersionedCache(PREDICT_CACHE_MAX_BYTES, ttl=PREDICT_CACHE_TTL, name="predict")
+
+
+# 📈 캐시/업스트림 풀/모델 버전은 각자 가진 통계를 스크레이프 시점에 읽어서 내보낸다
+def cache_samples(field):
+    return [({"cache": cache.name}, cache.stats()[field]) for cache in (proxy_cache, predict_cache)]
+
+
+def upstream_samples(field):
+    return [({"host": pool["host"]}, pool[field]) for pool in get_client().stats()["pools"]]
+
+
+for field, kind, help_text in (
+    ("entries", "gauge", "캐시 항목 수"),
+    ("bytes", "gauge", "캐시 사용 바이트"),
+    ("hits", "counter", "캐시 적중 수"),
+    ("stale_hits", "counter", "만료 후 유예 기간 적중 수"),
+    ("misses", "counter", "캐시 미스 수"),
+    ("evictions", "counter", "용량 초과로 밀려난 항목 수"),
+):
+    name = f"app_cache_{field}_total" if kind == "counter" else f"app_cache_{field}"
+    metrics.callback(name, help_text, ("cache",), lambda field=field: cache_samples(field), kind)
+
+for field, kind, help_text in (
+    ("requests", "counter", "업스트림 요청 수"),
+    ("new_connections", "counter", "업스트림에 새로 맺은 커넥션 수"),
+    ("idle_connections", "gauge", "풀에 대기 중인 업스트림 커넥션 수"),
+):
+    name = f"app_upstream_{field}_total" if kind == "counter" else f"app_upstream_{field}"
+    metrics.callback(name, help_text, ("host",), lambda field=field: upstream_samples(field), kind)
+
+metrics.callback("app_proxy_coalesced_total", "합쳐진 중복 상가 목록 요청 수", (), lambda: [({}, proxy_flight.coalesced)], "counter")
+for field, kind, help_text in (
+    ("running", "gauge", "예측 풀에서 실행 중인 작업 수"),
+    ("queued", "gauge", "예측 풀 대기열 길이"),
+    ("rejected", "counter", "대기열이 가득 차서 503 으로 돌려보낸 예측 요청 수"),
+    ("deadline_cuts", "counter", "마감 시간이 지나 주변 탐색을 줄인 예측 요청 수"),
+    ("timeouts", "counter", "마감 + 여유 시간 안에 결과가 안 나와 503 으로 끝낸 예측 요청 수"),
+):
+    name = f"app_predict_pool_{field}_total" if kind == "counter" else f"app_predict_pool_{field}"
+    metrics.callback(name, help_text, (), lambda field=field: [({}, predict_pool.stats()[field])], kind)
+
+metrics.callback("app_model_version", "현재 모델/데이터 스냅샷 버전", (), lambda: [({}, registry.version)])
+
+
+def startup_phase_samples():
+    snap = registry.current
+    if snap is None:
+        return []
+    return [({"phase": phase, "source": snap.source}, seconds) for phase, seconds in snap.timings.items()]
+
+
+metrics.callback("app_startup_ready_seconds", "프로세스 시작부터 준비 완료까지 걸린 시간", (), lambda: [({}, READY_SECONDS)])
+metrics.callback("app_model_load_phase_seconds", "현재 스냅샷 로드 단계별 소요 시간", ("phase", "source"), startup_phase_samples)
+
+
+@app.before_request
+def begin_request():
+    # ⏱️ 요청 단계별 시간 측정 시작, 옵트인 샘플링 프로파일러
+    g.trace = start_trace()
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        g.profiler = g.trace.profiler = SamplingProfiler().start()
+
+
+@app.after_request
+def finish_request(response):
+    trace = g.get("trace")
+    if trace is None:
+        return response
+
+    elapsed = trace.elapsed()
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    REQUEST_SECONDS.observe(elapsed, endpoint=endpoint, status=response.status_code)
+    REQUESTS_TOTAL.inc(endpoint=endpoint, status=response.status_code)
+    if trace.stages:
+        response.headers["Server-Timing"] = trace.server_timing()
+
+    elapsed_ms = elapsed * 1000
+    level = logging.INFO if elapsed_ms >= LOG_SLOW_MS else logging.DEBUG
+    if logger.isEnabledFor(level):
+        fields = {"method": request.method, "path": request.path, "status": response.status_code,
+                  "ms": round(elapsed_ms, 1)}
+        fields.update({f"{name}_ms": round(seconds * 1000, 2) for name, seconds in trace.totals().items()})
+        logger.log(level, "요청 처리", extra={"fields": fields})
+
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.stop()
+        if elapsed_ms >= PROFILE_SLOW_MS:
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{request.endpoint}.folded"
+            path = profiler.dump(os.path.join(PROFILE_DIR, name))
+            logger.warning("🔬 느린 요청 프로파일 저장: %s", path,
+                           extra={"fields": {"path": request.path, "ms": round(elapsed_ms, 1)}})
+    return response
+
+
+@app.teardown_request
+def end_request(exc):
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.stop()
+    end_trace()
+
+
 @app.route("/api/proxy", methods=["GET"])
 def proxy():
-    service_key = "rA86OMjx7TmsRL+UAjovPORxHyyDJZxd6dIPJyKlqbPZzNo5fetvxLXhZ/MPki0fWIgUPGXq0thGIvFG5BmTZg=="
-    base_url = "https://apis.data.go.kr/B553077/api/open/sdsc2/storeListInRadius"
-
     params = {
-        "serviceKey": service_key,
+        "serviceKey": SERVICE_KEY,
         "radius": request.args.get("radius"),
-        "cx": request.args.get("cx"),
-        "cy": request.args.get("cy"),
+        "cx": quantize_coord(request.args.get("cx"), PROXY_COORD_STEP),
+        "cy": quantize_coord(request.args.get("cy"), PROXY_COORD_STEP),
         "indsLclsCd": "I2",  # 전체 음식점
         "indsMclsCd": request.args.get("indsMclsCd"),  # 필터링용 중분류 업종코드
         "numOfRows": 100,
@@ -33,360 +170,373 @@ def proxy():
         "type": "json"
     }
 
-    try:
-        ctx = ssl.create_default_context()
-        ctx.set_ciphers("DEFAULT:@SECLEVEL=1")
-
-        encoded_params = urlencode(params)
-        full_url = f"{base_url}?{encoded_params}"
-        print("[요청 URL]", full_url)
+    # 📄 all=1: totalCount 기준 전체 페이지 병합, fields=a,b,c: 필요한 필드만 응답
+    fields = [f for f in request.args.get("fields", "").split(",") if f]
 
-        http = urllib3.PoolManager(ssl_context=ctx)
-        response = http.request("GET", full_url)
-
-        if response.status != 200:
-            return jsonify({"error": "외부 API 요청에 실패했습니다."}), 500
-
-        data = json.loads(response.data.decode("utf-8"))
-        return jsonify(data)
+    try:
+        if request.args.get("all") == "1":
+            pages = AllPages(params, fields)
+            if request.args.get("format") == "ndjson":
+                response = Response(pages.iter_ndjson(), mimetype="application/x-ndjson")
+            else:
+                response = Response(pages.iter_json(), mimetype="application/json")
+            response.headers["X-Total-Count"] = str(pages.total_count)
+            response.headers["X-Truncated"] = "1" if pages.truncated else "0"
+            return response
+
+        body, state = fetch_store_page(params)
+        if fields:
+            with stage("serialize"):
+                data = json.loads(body)
+                if isinstance(data.get("body"), dict) and "items" in data["body"]:
+                    data["body"]["items"] = project_items(data["body"]["items"] or [], fields)
+                body = dump_json(data)
+
+        response = app.response_class(body, mimetype="application/json")
+        response.headers["X-Cache"] = state.upper()
+        return response
+
+    except UpstreamError:
+        return jsonify({"error": "외부 API 요청에 실패했습니다."}), 500
 
     except Exception as e:
-        print("예외 발생:", e)
+        logger.exception("예외 발생: %s", e)
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/proxy/stats", methods=["GET"])
+def proxy_stats():
+    stats = get_client().stats()
+    stats["cache"] = proxy_cache.stats()
+    stats["coalesced"] = proxy_flight.coalesced
+    return jsonify(stats)
+
+def deadline_exceeded():
+    """마감 + 여유 시간 안에 작업 결과가 안 나온 경우 (작업은 풀에서 마감을 보고 곧 끝난다)"""
+    predict_pool.record_timeout()
+    logger.warning("⏰ 예측 마감 시간 초과로 요청 종료", extra={"fields": predict_pool.stats()})
+    return (jsonify({"error": "예측이 제한 시간 안에 끝나지 않았습니다. 잠시 후 다시 시도해 주세요."}), 503,
+            {"Retry-After": str(predict_pool.retry_after)})
+
 @app.route("/api/predict", methods=["POST"])
 def predicted_sales():
-    # 📦 보정 로직 불러오기
-    spec = importlib.util.spec_from_file_location("bojeong", "보정로직_서비스구조_정합버전.py")
-    bojeong = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(bojeong)
-    get_sales_distribution_basis = bojeong.get_sales_distribution_basis
-    apply_temporal_corrections = bojeong.apply_temporal_corrections
-
-    # 📂 모델 및 입력 피처 예측값 불러오기
-    model_paths = {
-        "한식음식점": "0520_model_Korean_Chinese.pkl",
-        "중식음식점": "0520_model_Korean_Chinese.pkl",
-        "커피-음료": "0520_model_Cafe_Beverage.pkl"
-    }
-    label_encoders = joblib.load("0520_encoders.pkl")
-    feature_df = pd.read_csv("20252_input_vector_0521.csv")
-
-    # 📂 데이터셋 로드 함수 정의
-    def load_dataframe(path):
-        try:
-            return pd.read_csv(path, encoding='cp949')
-        except UnicodeDecodeError:
-            return pd.read_csv(path, encoding='utf-8-sig')
-
-    # 📂 데이터 로딩
-    df = load_dataframe("0510_광진구 상권, 지하철 통합 완성본.csv")
-    df_subway = load_dataframe("광진구 지하철 평균 승하차 인원 수.csv").dropna(subset=["위도", "경도"])
-
-    # 📌 기준분기 추가 (예: 20244)
-    df["기준분기"] = df["기준_년분기_코드"].astype(str).str[:4].astype(int) * 10 + df["기준_년분기_코드"].astype(str).str[-1].astype(int)
-
-    # 📍 BallTree 구축 (위치 기반 최근 상권 탐색용)
-    coords_rad = np.radians(df[["위도", "경도"]])
-    tree = BallTree(coords_rad, metric="haversine")
-
-    # 🔹 위도/경도 기준 거리 이동 보정 함수
-    def offset_latlon(lat, lon, dy_m, dx_m):
-        delta_lat = dy_m / 111000
-        delta_lon = dx_m / (111000 * math.cos(math.radians(lat)))
-        return lat + delta_lat, lon + delta_lon
-
-    # 🔹 가장 가까운 지하철역 찾기
-    def find_nearest_station(lat, lon):
-        best_row = df_subway.iloc[((df_subway["위도"] - lat) ** 2 + (df_subway["경도"] - lon) ** 2).idxmin()]
-        dist = geodesic((lat, lon), (best_row["위도"], best_row["경도"])).meters
-        name = f"{best_row['역명']} ({best_row['노선명']})"
-        traffic = best_row["일일_평균_승하차_인원_수"]
-        return name, dist, traffic
-
-    # 🔹 가장 가까운 상권 탐색
-    def find_nearest_area(lat, lon):
-        query_rad = np.radians([[lat, lon]])
-        dist, idx = tree.query(query_rad, k=1)
-        nearest = df.iloc[idx[0][0]]
-        return nearest, dist[0][0] * 6371000
-
-    # 🔹 상권 코드로 입력 피처 예측 벡터 불러오기
-    def load_predicted_vector(area_code: int) -> dict:
-        row = feature_df[feature_df["상권_코드"] == area_code]
-        if row.empty:
-            raise ValueError(f"❌ 상권 코드 {area_code} 에 해당하는 예측 피처 없음")
-        return row.iloc[0].to_dict()
-
-    # ✅ 파생 피처 생성 함수 (안전 버전)
-    def add_derived_features(df):
-        df = df.copy()
-        df["남성_비율"] = df["남성_유동인구_수"] / (df["총_유동인구_수"] + 1)
-        df["여성_비율"] = df["여성_유동인구_수"] / (df["총_유동인구_수"] + 1)
-        df["연령대_중심값"] = (
-            df["연령대_10_유동인구_수"] * 10 +
-            df["연령대_20_유동인구_수"] * 20 +
-            df["연령대_30_유동인구_수"] * 30 +
-            df["연령대_40_유동인구_수"] * 40 +
-            df["연령대_50_유동인구_수"] * 50 +
-            df["연령대_60_이상_유동인구_수"] * 65
-        ) / (df["총_유동인구_수"] + 1)
-        df["상주대비_유동비"] = df["총_유동인구_수"] / (df["총_상주인구_수"] + 1)
-        df["직장대비_유동비"] = df["총_유동인구_수"] / (df["총_직장_인구_수"] + 1)
-        if "운영_영업_개월_평균" in df.columns and "서울_운영_영업_개월_평균" in df.columns:
-            df["상권_vs_서울_운영차"] = df["운영_영업_개월_평균"] - df["서울_운영_영업_개월_평균"]
-        else:
-            df["상권_vs_서울_운영차"] = np.nan
-
-        if "폐업_영업_개월_평균" in df.columns and "서울_폐업_영업_개월_평균" in df.columns:
-            df["상권_vs_서울_폐업차"] = df["폐업_영업_개월_평균"] - df["서울_폐업_영업_개월_평균"]
-        else:
-            df["상권_vs_서울_폐업차"] = np.nan
-        df["경쟁_밀집도"] = df["300m내_경쟁_업종_수"] / (df["총_유동인구_수"] + 1)
-        df["역_접근성"] = df["가장_가까운_역_승하차_인원_수"] / (df["역까지_거리_m"] + 1)
-        return df
+    # 📦 시작 시 로드된 모델/데이터 스냅샷 사용 (파일 변경 시 자동 교체)
+    with stage("acquire"):
+        snap = registry.get()
 
     # 입력된 데이터
     data = request.get_json()
-    lat = float(data["lat"])
-    lon = float(data["lon"])
-    indsMclsCd = data["indsMclsCd"]
-
-    time_range = data["time_range"]  # 예: "6-14"
-    start_time_str, end_time_str = time_range.split("-")
-    start_time = int(start_time_str)
-    end_time = int(end_time_str)
-    selected_days = data["day_of_week"]
-    store_count = int(data["store_count"])
-
-    # 코드 → 업종명 매핑
-    industry_code_map = {
-        "I212": "커피-음료",
-        "I201": "한식음식점",
-        "I202": "중식음식점",
-        # 필요 시 계속 추가
-    }
-    # ✅ 업종 코드 → 업종명 변환
-    category = industry_code_map.get(indsMclsCd)
+    lat, lon, indsMclsCd, selected_days, start_time, end_time, store_count = parse_predict_input(data)
+
+    # 📍 캐시 격자를 쓰면 격자점 기준으로 예측해서 같은 키는 항상 같은 결과
+    lat = snap_coord(lat, PREDICT_COORD_STEP)
+    lon = snap_coord(lon, PREDICT_COORD_STEP)
 
-    print(lat, lon, start_time, end_time, selected_days, category, indsMclsCd)
+    # ✅ 업종 코드 → 업종명 변환 (모르는 코드는 배치 항목과 같이 400)
+    category = INDUSTRY_CODE_MAP.get(indsMclsCd)
+    if category is None:
+        return jsonify({"error": f"지원하지 않는 업종 코드입니다: {indsMclsCd}"}), 400
 
+    # 🔎 주변 탐색 설정: search(grid|adaptive), radius(m), min_step(m), budget(adaptive 채점 칸 수)
     try:
-        # 📍 입력 위치 기준 상권/지하철 분석
-        nearest, _ = find_nearest_area(lat, lon)
-        station_name, station_dist, station_traffic = find_nearest_station(lat, lon)
+        search = parse_search_params(data)
+        use_heatmap = parse_flag(data, "use_heatmap")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # 🗺️ use_heatmap: 빌드된 래스터가 현재 데이터와 맞을 때만 사용 (아니면 기존 격자 탐색)
+    heatmap = None
+    if use_heatmap:
+        heatmap = get_heatmap()
+        if heatmap is not None and not heatmap.compatible(snap):
+            heatmap = None
+
+    logger.debug("예측 요청", extra={"fields": {
+        "lat": lat, "lon": lon, "start_time": start_time, "end_time": end_time,
+        "selected_days": ",".join(selected_days), "category": category, "indsMclsCd": indsMclsCd,
+    }})
+
+    # 🗃️ 같은 입력 + 같은 모델/데이터 버전이면 저장된 결과 그대로 반환
+    key = predict_cache_key(
+        lat, lon, indsMclsCd, selected_days, start_time, end_time, store_count,
+        mode="heatmap" if heatmap is not None else None, search=search,
+    )
+    cached, state = predict_cache.get(key, tag=snap.version)
+    if cached is not None:
+        status, body = cached
+        response = app.response_class(body, status=status, mimetype="application/json")
+        response.headers["X-Cache"] = state.upper()
+        return response
+
+    # 🧵 계산은 예측 풀에서 (가득 차 있으면 503, 마감이 지나면 주변 탐색을 줄여서 응답)
+    deadline = Deadline.after_ms(PREDICT_DEADLINE_MS)
+    try:
+        future = predict_pool.submit(
+            predict_location, snap, lat, lon, category, selected_days, start_time, end_time, store_count,
+            heatmap=heatmap, search=search, deadline=deadline
+        )
+    except Overloaded as e:
+        logger.warning("🚦 예측 대기열 초과로 요청 거절", extra={"fields": predict_pool.stats()})
+        return jsonify({"error": "요청이 많아 잠시 후 다시 시도해 주세요."}), 503, {"Retry-After": str(e.retry_after)}
 
-        change_encoder = (
-            label_encoders["상권_변화_지표_명"]["커피_음료"]
-            if "커피" in category else label_encoders["상권_변화_지표_명"]["한식중식_통합"]
+    try:
+        result, status = future.result(timeout=wait_timeout(deadline))
+    except FutureTimeoutError:
+        return deadline_exceeded()
+    except Exception as e:
+        logger.exception("❌ 예측 중 오류 발생")
+        return jsonify({"error": f"❌ 예측 중 오류 발생: {str(e)}"}), 500
+
+    with stage("serialize"):
+        response = jsonify(result)
+        response.status_code = status
+        body = response.get_data()
+    if deadline is not None and deadline.was_cut:
+        # 줄어든 결과는 캐시하지 않는다 (다음 요청은 전체 탐색)
+        predict_pool.record_cut()
+        response.headers["X-Deadline-Exceeded"] = "1"
+    else:
+        predict_cache.set(key, (status, body), len(body), tag=snap.version)
+    response.headers["X-Cache"] = state.upper()
+    return response
+
+@app.route("/api/predict/batch", methods=["POST"])
+def predicted_sales_batch():
+    """
+    여러 입력 위치 일괄 예측: {"items": [/api/predict 입력, ...], "neighbours": true, "use_heatmap": false}
+    주변 탐색 설정(search, radius, min_step, budget)은 배치 전체에 같이 적용된다.
+    결과는 입력 순서대로 한 줄에 하나씩 NDJSON 으로 스트리밍한다.
+    성공: {"index", "status": 200, "result": /api/predict 응답}, 실패: {"index", "status", "error"}
+    neighbours=false 면 주변 추천 없이 입력위치만 반환.
+    계산은 /api/predict 와 같은 예측 풀에서 배치당 작업 하나로 돈다 (가득 차 있으면 503).
+    주변 탐색은 항목마다 마감(PREDICT_BATCH_ITEM_DEADLINE_MS)을 따로 두고, 넘기면 그 항목만 줄인 결과
+    ("주변탐색중단": true). 첫 결과는 PREDICT_DEADLINE_MS, 그 뒤로는 항목 마감 + 여유 시간 안에
+    다음 결과가 안 나오면 남은 항목은 status 503 으로 끝낸다.
+    neighbours=true 면 최대 PREDICT_BATCH_MAX_NEIGHBOUR_ITEMS 개 (넘으면 413).
+    """
+    with stage("acquire"):
+        snap = registry.get()
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("items"), list):
+        return jsonify({"error": "items 목록이 필요합니다."}), 400
+    items = data["items"]
+    try:
+        neighbours = parse_flag(data, "neighbours", default=True)
+        use_heatmap = parse_flag(data, "use_heatmap")
+        search = parse_search_params(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    max_items = PREDICT_BATCH_MAX_NEIGHBOUR_ITEMS if neighbours else PREDICT_BATCH_MAX_ITEMS
+    if len(items) > max_items:
+        hint = " (neighbours=false 면 더 많이)" if neighbours else ""
+        return jsonify({"error": f"한 번에 최대 {max_items}개까지 예측할 수 있습니다{hint}."}), 413
+
+    heatmap = None
+    if neighbours and use_heatmap:
+        heatmap = get_heatmap()
+        if heatmap is not None and not heatmap.compatible(snap):
+            heatmap = None
+
+    # 📋 항목별 입력 검증 (잘못된 항목은 그 줄만 에러)
+    errors = {}
+    valid_index = []
+    valid_items = []
+    for i, item in enumerate(items):
+        try:
+            lat, lon, indsMclsCd, selected_days, start_time, end_time, store_count = parse_predict_input(item)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            errors[i] = f"입력 형식 오류: {e!r}"
+            continue
+        category = INDUSTRY_CODE_MAP.get(indsMclsCd)
+        if category is None:
+            errors[i] = f"지원하지 않는 업종 코드입니다: {indsMclsCd}"
+            continue
+        valid_index.append(i)
+        valid_items.append({
+            "lat": snap_coord(lat, PREDICT_COORD_STEP),
+            "lon": snap_coord(lon, PREDICT_COORD_STEP),
+            "category": category,
+            "selected_days": selected_days,
+            "start_time": start_time,
+            "end_time": end_time,
+            "store_count": store_count,
+        })
+
+    # 🧵 스트리밍 응답을 만들기 전에 제출해야 가득 찼을 때 503 으로 응답할 수 있다
+    # 첫 결과까지는 대기열 + 배치 단계(입력 위치 전체 채점)를 포함해 요청 마감, 그 뒤로는 항목마다 항목 마감
+    deadline = Deadline.after_ms(PREDICT_DEADLINE_MS)
+    try:
+        job = predict_pool.submit_stream(
+            predict_batch, snap, valid_items, neighbours=neighbours, heatmap=heatmap, search=search,
+            item_deadline_ms=PREDICT_BATCH_ITEM_DEADLINE_MS
         )
-        change_encoded = change_encoder.transform([nearest["상권_변화_지표_명"]])[0]
-
-        model = joblib.load(model_paths[category])
-        df_basis = get_sales_distribution_basis(df, nearest["상권_코드_명"], category)
-        df_basis = df_basis.dropna(subset=["점포_당_매출_금액"])
-
-        # 📌 예측 불가능한 조건 처리
-        if len(df_basis) == 0:
-            print(f"\n📍 가장 가까운 상권: {nearest['상권_코드_명']}")
-            print(f"🧾 업종: {category}")
-            print("\n❌ 예측 불가: 해당 상권+업종 조합에 대한 매출 데이터가 존재하지 않아 예측할 수 없습니다.")
-            print("\n📍 신뢰할 수 있는 주변 위치 분석 중...")
-            base_sales = None
-            return jsonify({
-                "error": "해당 상권+업종 조합에 대한 매출 데이터가 없어 예측할 수 없습니다."
-            }), 400
-
-        else:
-            if len(df_basis) <= 3:
-                print(f"\n📍 가장 가까운 상권: {nearest['상권_코드_명']}")
-                print(f"🧾 업종: {category}")
-                print("\n⚠️ 참고: 해당 상권+업종 조합은 매출 데이터가 3개 이하로, 예측 결과의 신뢰도가 낮을 수 있습니다.")
-
-            # ✅ 입력 피처 구성
-            input_vec = load_predicted_vector(nearest["상권_코드"])
-            input_vec["역까지_거리_m"] = station_dist
-            input_vec["가장_가까운_역_승하차_인원_수"] = station_traffic
-            input_vec["상권_변화_지표_명"] = int(change_encoded)
-            if store_count is not None:
-                input_vec["300m내_경쟁_업종_수"] = store_count
-            else:
-                input_vec["300m내_경쟁_업종_수"] = nearest["300m내_경쟁_업종_수"]  # fallback
-
-            # ✅ 누락 피처 보완
-            needed_cols = [
-                "운영_영업_개월_평균", "폐업_영업_개월_평균",
-                "서울_운영_영업_개월_평균", "서울_폐업_영업_개월_평균"
-            ]
-            recent_row = df[
-                (df["기준분기"] == 20244) &
-                (df["상권_코드"].astype(int) == int(nearest["상권_코드"])) &
-                (df["서비스_업종_코드_명"] == category)
-                ]
-            if not recent_row.empty:
-                for col in needed_cols:
-                    if col not in input_vec:
-                        input_vec[col] = recent_row.iloc[0].get(col, np.nan)
-            else:
-                for col in needed_cols:
-                    input_vec[col] = np.nan
-
-            # ✅ 파생 피처 포함 입력 데이터프레임 구성 및 예측
-            input_df = pd.DataFrame([input_vec])
-            input_df = add_derived_features(input_df)
-            input_df = input_df[model.feature_names_in_]
-
-            predicted_sales = model.predict(input_df)[0]
-            predicted_sales = apply_temporal_corrections(predicted_sales, df_basis, selected_days, start_time, end_time)
-            base_sales = predicted_sales
-
-            base_result = {"lat": lat, "lon": lon, "sales": int(predicted_sales),
-                           "상권명": nearest["상권_코드_명"],
-                           "지하철역": station_name,
-                           "지하철역거리": int(station_dist),
-                           "승하차": int(station_traffic)
-                           }
-
-            print(f"\n📍 가장 가까운 상권: {nearest['상권_코드_명']}")
-            print(f"🚇 가장 가까운 지하철역: {station_name} (거리: {station_dist:.1f}m, 일일 승하차: {int(station_traffic):,}명)")
-            print(f"🕒 영업 시간: {start_time}시 ~ {end_time}시")
-            print(f"📆 영업 요일: {', '.join(selected_days)}")
-            print(f"💰 예측 월 매출: 약 {int(predicted_sales):,}원 (기준 100%)")
-            print("\n📍 신뢰할 수 있는 주변 위치 분석 중...")
-
-        results = []
-
-        if base_sales is not None:
-            for dy in range(-300, 301, 30):
-                for dx in range(-300, 301, 30):
-                    adj_lat, adj_lon  = offset_latlon(lat, lon, dy, dx)
-                    dist = geodesic((lat, lon), (adj_lat, adj_lon )).meters
-                    if dist <= 300:
-                        if abs(adj_lat - lat) < 1e-6 and abs(adj_lon - lon) < 1e-6:
-                            continue
-
-                        near, _ = find_nearest_area(adj_lat, adj_lon)
-                        try:
-                            input_vec = load_predicted_vector(near["상권_코드"])
-                        except Exception:
-                            continue
-
-                        df_basis_near = get_sales_distribution_basis(df, near["상권_코드_명"], category)
-                        df_basis_near = df_basis_near.dropna(subset=["점포_당_매출_금액"])
-                        if len(df_basis_near) < 4:
-                            continue
-
-                        stat_name, stat_d, stat_t = find_nearest_station(adj_lat, adj_lon)
-                        chg_enc = change_encoder.transform([near["상권_변화_지표_명"]])[0]
-
-                        input_vec["역까지_거리_m"] = stat_d
-                        input_vec["가장_가까운_역_승하차_인원_수"] = stat_t
-                        input_vec["상권_변화_지표_명"] = int(chg_enc)
-                        input_vec["300m내_경쟁_업종_수"] = near["300m내_경쟁_업종_수"]
-
-                        # ✅ 누락 피처 보완
-                        recent_row = df[
-                            (df["기준분기"] == 20244) &
-                            (df["상권_코드"].astype(int) == int(near["상권_코드"])) &
-                            (df["서비스_업종_코드_명"] == category)
-                            ]
-                        if not recent_row.empty:
-                            for col in needed_cols:
-                                if col not in input_vec:
-                                    input_vec[col] = recent_row.iloc[0].get(col, np.nan)
+    except Overloaded as e:
+        logger.warning("🚦 예측 대기열 초과로 요청 거절", extra={"fields": predict_pool.stats()})
+        return jsonify({"error": "요청이 많아 잠시 후 다시 시도해 주세요."}), 503, {"Retry-After": str(e.retry_after)}
+
+    def generate():
+        failure = None
+        timed_out = False
+        waiting = deadline
+        try:
+            for index in range(len(items)):
+                if index in errors:
+                    line = {"index": index, "status": 400, "error": errors[index]}
+                elif failure is not None:
+                    line = {"index": index, "status": 500, "error": failure}
+                elif timed_out:
+                    line = {"index": index, "status": 503, "error": "예측이 제한 시간 안에 끝나지 않았습니다."}
+                else:
+                    try:
+                        result, status = job.next(timeout=wait_timeout(waiting))
+                        waiting = Deadline.after_ms(PREDICT_BATCH_ITEM_DEADLINE_MS)
+                    except FutureTimeoutError:
+                        # ⏰ 마감 + 여유 시간 초과: 작업을 멈추고 남은 항목은 503
+                        job.cancel()
+                        predict_pool.record_timeout()
+                        timed_out = True
+                        line = {"index": index, "status": 503, "error": "예측이 제한 시간 안에 끝나지 않았습니다."}
+                    except Exception as e:
+                        # 배치 단계 자체가 실패하면 남은 항목은 모두 같은 에러로 끝낸다
+                        logger.error("❌ 일괄 예측 중 오류 발생", exc_info=e)
+                        failure = f"❌ 예측 중 오류 발생: {str(e)}"
+                        line = {"index": index, "status": 500, "error": failure}
+                    else:
+                        line = {"index": index, "status": status}
+                        if status == 200:
+                            line["result"] = result
+                            if result.get("주변탐색중단"):
+                                predict_pool.record_cut()
                         else:
-                            for col in needed_cols:
-                                input_vec[col] = np.nan
-
-                        # 🔹 계절성 피처 삽입
-                        input_vec["연도"] = 2025
-                        input_vec["분기"] = 2
-                        input_vec["분기_sin"] = np.sin(2 * np.pi * 2 / 4)
-                        input_vec["분기_cos"] = np.cos(2 * np.pi * 2 / 4)
-
-                        input_df = pd.DataFrame([input_vec])
-                        input_df = add_derived_features(input_df)
-                        input_df = input_df[model.feature_names_in_]
-
-                        sales = model.predict(input_df)[0]
-                        sales = apply_temporal_corrections(sales, df_basis_near, selected_days, start_time, end_time)
-                        percent = round(sales / base_sales * 100) if base_sales else None
-
-                        results.append({
-                            "lat": adj_lat, "lon": adj_lon, "dist": int(dist), "sales": int(sales),
-                            "percent": percent, "상권명": near["상권_코드_명"],
-                            "지하철역": stat_name, "지하철역거리": int(stat_d), "승하차": int(stat_t)
-                        })
-
-        # 🔹 추천 결과 출력
-        final_recommendations = []
-        ranked_output = []
-        if results:
-            results_sorted = sorted(results, key=lambda x: -x["sales"])
-            rank = 1
-            i = 0
-            printed_ranks = 0
-
-            while i < len(results_sorted) and printed_ranks < 3:
-                current_group = [results_sorted[i]]
-                current_sales = results_sorted[i]["sales"]
-                i += 1
-                while i < len(results_sorted) and abs(results_sorted[i]["sales"] - current_sales) <= 1_000_000:
-                    current_group.append(results_sorted[i])
-                    i += 1
-
-                group_percent = (
-                    f"(입력 위치 대비: {round(current_sales / base_sales * 100)}%)"
-                    if base_sales else ""
-                )
-                title = (
-                    f"🔸 공동 {rank}위 (약 {int(current_sales):,}원 {group_percent})"
-                    if len(current_group) > 1 else
-                    f"{rank}위 (약 {int(current_sales):,}원 {group_percent})"
-                )
-                print(f"\n{title}\n")
-
-                group_result = {
-                    "순위": rank,
-                    "매출": int(current_sales),
-                    "퍼센트": group_percent,
-                    "공동": len(current_group) > 1,
-                    "추천지": []
-                }
-
-                for loc in current_group[:3]:
-                    print(f"🛍️ 상권: {loc['상권명']}")
-                    print(f"📍 위치: 위도 {loc['lat']:.6f}, 경도 {loc['lon']:.6f}, 거리 {loc['dist']}m")
-                    print(f"🚇 지하철: {loc['지하철역']} / 거리: {loc['지하철역거리']}m / 승하차: {loc['승하차']:,}명\n")
-
-                    group_result["추천지"].append({
-                        "상권명": loc["상권명"],
-                        "lat": loc["lat"],
-                        "lon": loc["lon"],
-                        "거리": loc["dist"],
-                        "지하철역": loc["지하철역"],
-                        "지하철역거리": loc["지하철역거리"],
-                        "승하차": loc["승하차"],
-                        "예상매출": loc["sales"]
-                    })
-                final_recommendations.append(loc)
-                ranked_output.append(group_result)
-                printed_ranks += 1
-                rank += 1
-        else:
-            print("\n✅ 주변에 더 나은 위치는 없습니다.")
-
-        print("입력위치", base_result)
-        print("추천위치", len(final_recommendations), ranked_output)
-        print("추천순위", len(ranked_output), ranked_output)
-
-        return jsonify({
-            "입력위치": base_result,
-            "추천위치": final_recommendations,
-            "추천순위": ranked_output
-            })
+                            line["error"] = result["error"]
+                with stage("serialize"):
+                    chunk = json.dumps(line, ensure_ascii=False) + "\n"
+                yield chunk
+        finally:
+            # 클라이언트가 끊어도 풀 작업은 남은 항목을 계산하지 않고 끝낸다
+            job.cancel()
+
+    response = Response(generate(), mimetype="application/x-ndjson")
+    response.headers["X-Batch-Size"] = str(len(items))
+    return response
+
+@app.route("/api/predict/industries", methods=["POST"])
+def predicted_sales_industries():
+    """
+    한 위치에서 업종별 예상 매출 순위: {"lat", "lon", "time_range", "day_of_week",
+    "industries": [업종코드, ...] (없으면 전체), "store_counts": {업종코드: 경쟁 점포 수} (선택)}
+    주변 추천 없이 입력 위치만 예측하고, 같은 모델 파일을 쓰는 업종은 한 번에 predict 한다.
+    """
+    with stage("acquire"):
+        snap = registry.get()
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "JSON 입력이 필요합니다."}), 400
+    try:
+        lat, lon, codes, selected_days, start_time, end_time, store_counts = parse_industries_input(
+            data, INDUSTRY_CODE_MAP
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except (KeyError, TypeError, AttributeError) as e:
+        return jsonify({"error": f"입력 형식 오류: {e!r}"}), 400
+
+    lat = snap_coord(lat, PREDICT_COORD_STEP)
+    lon = snap_coord(lon, PREDICT_COORD_STEP)
+
+    key = predict_cache_key(
+        lat, lon, tuple(codes), selected_days, start_time, end_time,
+        tuple(store_counts.get(code) for code in codes), mode="industries",
+    )
+    cached, state = predict_cache.get(key, tag=snap.version)
+    if cached is not None:
+        status, body = cached
+        response = app.response_class(body, status=status, mimetype="application/json")
+        response.headers["X-Cache"] = state.upper()
+        return response
+
+    deadline = Deadline.after_ms(PREDICT_DEADLINE_MS)
+    try:
+        future = predict_pool.submit(
+            predict_industries, snap, lat, lon, [(code, INDUSTRY_CODE_MAP[code]) for code in codes],
+            selected_days, start_time, end_time, store_counts
+        )
+    except Overloaded as e:
+        logger.warning("🚦 예측 대기열 초과로 요청 거절", extra={"fields": predict_pool.stats()})
+        return jsonify({"error": "요청이 많아 잠시 후 다시 시도해 주세요."}), 503, {"Retry-After": str(e.retry_after)}
+
+    try:
+        result, status = future.result(timeout=wait_timeout(deadline))
+    except FutureTimeoutError:
+        return deadline_exceeded()
     except Exception as e:
-        return jsonify({'message': f"❌ 예측 중 오류 발생: {str(e)}"})
+        logger.exception("❌ 업종별 예측 중 오류 발생")
+        return jsonify({"error": f"❌ 예측 중 오류 발생: {str(e)}"}), 500
+
+    with stage("serialize"):
+        response = jsonify(result)
+        response.status_code = status
+        body = response.get_data()
+    predict_cache.set(key, (status, body), len(body), tag=snap.version)
+    response.headers["X-Cache"] = state.upper()
+    return response
+
+@app.route("/api/predict/stats", methods=["GET"])
+def predict_stats():
+    stats = predict_cache.stats()
+    stats["version"] = registry.version
+    stats["pool"] = predict_pool.stats()
+    snap = registry.current
+    stats["startup"] = {
+        "ready_s": READY_SECONDS,
+        "source": snap.source if snap is not None else None,
+        "load_phases_s": snap.timings if snap is not None else {},
+    }
+    return jsonify(stats)
+
+@app.route("/api/metrics", methods=["GET"])
+def metrics_export():
+    """
+    Prometheus 텍스트 형식 지표 (단계별/엔드포인트별 지연 히스토그램, 캐시/업스트림 통계).
+    gunicorn 워커마다 따로 쌓이므로 응답한 워커의 값이다.
+    """
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+@app.route("/api/heatmap", methods=["GET"])
+def heatmap_tiles():
+    """
+    업종별 예측 매출 래스터 타일. tile_row/tile_col 이 없으면 격자 메타 정보만 반환.
+    time_range(예: 6-14) 와 day_of_week(예: 월,화) 를 주면 요일/시간대 보정을 적용한다.
+    """
+    heatmap = get_heatmap()
+    if heatmap is None:
+        return jsonify({"error": "히트맵이 아직 빌드되지 않았습니다. (python heatmap.py build)"}), 404
+
+    snap = registry.get()
+    if not heatmap.compatible(snap):
+        return jsonify({"error": "히트맵이 현재 모델/데이터와 맞지 않습니다. 다시 빌드해 주세요."}), 409
+
+    if request.args.get("tile_row") is None or request.args.get("tile_col") is None:
+        meta = dict(heatmap.meta)
+        meta["tile_size"] = TILE_SIZE
+        return jsonify(meta)
+
+    try:
+        tile_row, tile_col, time_range = parse_tile_params(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    category = INDUSTRY_CODE_MAP.get(request.args.get("indsMclsCd"))
+    weights = None
+    if time_range is not None and request.args.get("day_of_week"):
+        selected_days = [d for d in request.args["day_of_week"].split(",") if d]
+        weights = snap.bojeong.temporal_weights(selected_days, *time_range)
+
+    tile = heatmap_tile(heatmap, snap, category, tile_row, tile_col, weights)
+    if tile is None:
+        return jsonify({"error": "해당 업종 또는 타일이 없습니다."}), 404
+    return jsonify(tile)
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
@@ -0,0 +1,325 @@
+"""
+📦 모델/인코더/데이터셋 레지스트리
+
+프로세스 시작 시 한 번만 모델, 인코더, 데이터셋, 공간 색인을 만들어 두고
+모든 요청이 같은 스냅샷을 공유한다. gunicorn --preload 로 띄우면 워커가
+fork 되기 전에 로드되므로 워커들이 copy-on-write 로 메모리를 공유한다.
+
+모델/CSV 파일이 디스크에서 바뀌면 새 스냅샷을 통째로 만든 뒤 참조만 교체하므로
+요청 처리 중에 반쯤 갱신된 상태를 보는 일이 없다.
+
+artifacts.py 로 만든 산출물(.npy, 트리 노드 배열)이 원본과 같은 digest 면 그걸 mmap 으로 읽고,
+없거나 다르면 원본 CSV/pkl 을 읽는다. 무거운 모듈은 실제로 쓰는 경로에서만 import 하고
+(산출물 경로는 xgboost/sklearn 없이 pandas 만) 로드 단계별 소요 시간을 스냅샷에 남긴다.
+"""
+import hashlib
+import importlib
+import importlib.util
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from artifacts import ARTIFACT_DIR, open_artifacts
+from feature_store import build_feature_stores
+from predictor import SphereIndex, StationIndex
+
+# 모델/데이터 파일 위치 (기본: 이 파일이 있는 디렉터리, 벤치마크는 bench.synthetic 으로 만든 디렉터리)
+BASE_DIR = os.environ.get("DATA_DIR", os.path.dirname(os.path.abspath(__file__)))
+
+# 📂 모델 및 데이터 파일 경로
+MODEL_PATHS = {
+    "한식음식점": "0520_model_Korean_Chinese.pkl",
+    "중식음식점": "0520_model_Korean_Chinese.pkl",
+    "커피-음료": "0520_model_Cafe_Beverage.pkl"
+}
+ENCODER_PATH = "0520_encoders.pkl"
+FEATURE_PATH = "20252_input_vector_0521.csv"
+AREA_PATH = "0510_광진구 상권, 지하철 통합 완성본.csv"
+SUBWAY_PATH = "광진구 지하철 평균 승하차 인원 수.csv"
+BOJEONG_PATH = "보정로직_서비스구조_정합버전.py"
+
+# 코드 → 업종명 매핑
+INDUSTRY_CODE_MAP = {
+    "I212": "커피-음료",
+    "I201": "한식음식점",
+    "I202": "중식음식점",
+    # 필요 시 계속 추가
+}
+
+# 변경 감시 주기 (초), 0 이면 핫 리로드 비활성화
+RELOAD_INTERVAL = float(os.environ.get("MODEL_RELOAD_INTERVAL", "5"))
+
+logger = logging.getLogger(__name__)
+
+
+def watched_names():
+    names = {BOJEONG_PATH, ENCODER_PATH, FEATURE_PATH, AREA_PATH, SUBWAY_PATH}
+    names.update(MODEL_PATHS.values())
+    return sorted(names)
+
+
+def data_digest(base_dir):
+    """모델/데이터 파일 내용 해시 (오프라인 산출물이 어떤 데이터로 만들어졌는지 확인용)"""
+    h = hashlib.sha1()
+    for name in watched_names():
+        h.update(name.encode("utf-8"))
+        with open(os.path.join(base_dir, name), "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def source_fingerprint(base_dir):
+    """모델/데이터 파일의 [이름, 크기, mtime_ns] 목록 (해시 없이 변경 여부만 빠르게 확인)"""
+    fingerprint = []
+    for name in watched_names():
+        st = os.stat(os.path.join(base_dir, name))
+        fingerprint.append([name, st.st_size, st.st_mtime_ns])
+    return fingerprint
+
+
+def load_dataframe(path):
+    import pandas as pd
+
+    try:
+        return pd.read_csv(path, encoding='cp949')
+    except UnicodeDecodeError:
+        return pd.read_csv(path, encoding='utf-8-sig')
+
+
+def load_bojeong(path):
+    spec = importlib.util.spec_from_file_location("bojeong", path)
+    bojeong = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(bojeong)
+    return bojeong
+
+
+class Snapshot:
+    """한 시점에 로드된 모델/데이터 묶음 (읽기 전용으로 취급)"""
+
+    def __init__(self, version, digest, bojeong, label_encoders, models, feature_df, df, df_subway, area_index,
+                 profiles, feature_stores, stations, source="source", timings=None):
+        self.version = version
+        self.digest = digest
+        self.bojeong = bojeong
+        self.label_encoders = label_encoders
+        self.models = models
+        self.feature_df = feature_df
+        self.df = df
+        self.df_subway = df_subway
+        self.area_index = area_index
+        self.profiles = profiles
+        self.feature_stores = feature_stores
+        self.stations = stations
+        # 어디서 읽었는지 (artifacts / source), 로드 단계별 소요 시간 (초)
+        self.source = source
+        self.timings = timings or {}
+        self.loaded_at = time.time()
+        self._split_indexes = {}
+
+    def model_for(self, category):
+        return self.models[category]
+
+    def split_index_for(self, category):
+        """적응형 주변 탐색용 모델 분기 기준 색인 (처음 쓸 때 모델별로 한 번 만든다)"""
+        model = self.model_for(category)
+        index = self._split_indexes.get(id(model))
+        if index is None:
+            from tree_splits import SplitIndex
+
+            index = self._split_indexes.setdefault(id(model), SplitIndex.from_model(model))
+        return index
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(time.perf_counter() - started, 4)
+
+
+def build_snapshot(base_dir, version, artifact_dir=ARTIFACT_DIR):
+    def path(name):
+        return os.path.join(base_dir, name)
+
+    timer = PhaseTimer()
+    artifacts = open_artifacts(artifact_dir)
+    with timer.phase("digest"):
+        # 원본 파일이 산출물 빌드 때와 (크기, mtime) 까지 같으면 기록된 digest 를 쓰고, 아니면 내용 해시
+        digest = None
+        if artifacts is not None:
+            digest = artifacts.recorded_digest(source_fingerprint(base_dir))
+        if digest is None:
+            digest = data_digest(base_dir)
+
+    if artifacts is not None and not artifacts.compatible(digest):
+        logger.warning("⚠️ 산출물이 현재 모델/데이터와 달라서 원본 파일에서 로드합니다 (python artifacts.py build-artifacts)")
+        artifacts = None
+    source = "artifacts" if artifacts is not None else "source"
+
+    with timer.phase("import"):
+        # 산출물 경로는 모델을 numpy 로 채점하므로 xgboost(+ sklearn/scipy)를 import 하지 않는다
+        for name in ("pandas",) if artifacts is not None else ("pandas", "joblib", "xgboost"):
+            importlib.import_module(name)
+
+    with timer.phase("bojeong"):
+        bojeong = load_bojeong(path(BOJEONG_PATH))
+
+    # 같은 파일을 쓰는 업종(한식/중식)은 모델을 한 번만 로드해서 공유
+    model_files = sorted(set(MODEL_PATHS.values()))
+    if artifacts is not None:
+        with timer.phase("encoders"):
+            label_encoders = artifacts.encoders()
+        with timer.phase("models"):
+            loaded = {model_path: artifacts.model(model_path) for model_path in model_files}
+        with timer.phase("tables"):
+            feature_df = artifacts.table("features")
+            df = artifacts.table("area")
+            df_subway = artifacts.table("subway")
+    else:
+        import joblib
+        import pandas as pd
+
+        with timer.phase("encoders"):
+            label_encoders = joblib.load(path(ENCODER_PATH))
+        with timer.phase("models"):
+            loaded = {model_path: joblib.load(path(model_path)) for model_path in model_files}
+        with timer.phase("tables"):
+            feature_df = pd.read_csv(path(FEATURE_PATH))
+            df = load_dataframe(path(AREA_PATH))
+            df_subway = load_dataframe(path(SUBWAY_PATH))
+    models = {category: loaded[model_path] for category, model_path in MODEL_PATHS.items()}
+    df_subway = df_subway.dropna(subset=["위도", "경도"]).reset_index(drop=True)
+
+    with timer.phase("indexes"):
+        # 📌 기준분기 추가 (예: 20244)
+        df["기준분기"] = df["기준_년분기_코드"].astype(str).str[:4].astype(int) * 10 + df["기준_년분기_코드"].astype(str).str[-1].astype(int)
+
+        # 📍 상권 좌표 색인 (위치 기반 최근 상권 탐색용)
+        area_index = SphereIndex(df["위도"].to_numpy(dtype=np.float64), df["경도"].to_numpy(dtype=np.float64))
+
+        # 🚇 지하철역 색인 (상권과 같은 haversine 거리)
+        stations = StationIndex(df_subway)
+
+    # 🕒 상권+업종별 요일/시간대 매출 합계 인덱스
+    with timer.phase("profiles"):
+        profiles = bojeong.build_temporal_profiles(df)
+
+    # 🧮 업종별 입력 피처 저장소 (model.feature_names_in_ 순서의 float32 행렬)
+    with timer.phase("feature_stores"):
+        feature_stores = build_feature_stores(feature_df, df, models)
+
+    return Snapshot(
+        version=version, digest=digest, bojeong=bojeong, label_encoders=label_encoders, models=models,
+        feature_df=feature_df, df=df, df_subway=df_subway, area_index=area_index,
+        profiles=profiles, feature_stores=feature_stores, stations=stations,
+        source=source, timings=timer.phases,
+    )
+
+
+class ModelRegistry:
+    """
+    현재 스냅샷을 들고 있다가 감시 대상 파일이 바뀌면 원자적으로 교체한다.
+    get() 은 락 없이 현재 참조를 돌려주고, 리로드는 한 스레드만 수행한다.
+    """
+
+    def __init__(self, base_dir=BASE_DIR, reload_interval=RELOAD_INTERVAL, artifact_dir=ARTIFACT_DIR):
+        self.base_dir = base_dir
+        self.artifact_dir = artifact_dir
+        self.reload_interval = reload_interval
+        self._snapshot = None
+        self._fingerprint = None
+        self._version = 0
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def watched_files(self):
+        # 산출물을 새로 빌드하면 meta.json 이 바뀌므로 원본이 그대로여도 다시 로드한다
+        files = [os.path.join(self.base_dir, name) for name in watched_names()]
+        return files + [os.path.join(self.artifact_dir, "meta.json")]
+
+    def fingerprint(self):
+        result = []
+        for path in self.watched_files():
+            try:
+                st = os.stat(path)
+                result.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                result.append((path, None, None))
+        return tuple(result)
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def current(self):
+        """로드된 스냅샷 (아직 없으면 None, 로드를 유발하지 않음)"""
+        return self._snapshot
+
+    def get(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._load(self.fingerprint())
+                return self._snapshot
+
+        if self.reload_interval > 0 and time.monotonic() - self._last_check >= self.reload_interval:
+            self._maybe_reload()
+        return self._snapshot
+
+    def reload(self):
+        """파일 변경 여부와 상관없이 강제로 다시 로드"""
+        with self._lock:
+            self._load(self.fingerprint())
+        return self._snapshot
+
+    def warm(self):
+        """시작 시 미리 로드 (실패해도 프록시 등 다른 엔드포인트는 계속 동작)"""
+        try:
+            self.get()
+        except Exception as e:
+            logger.warning("⚠️ 모델/데이터 사전 로드 실패: %s", e)
+
+    def _maybe_reload(self):
+        # 다른 스레드가 이미 확인/리로드 중이면 기존 스냅샷으로 계속 서비스
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._last_check = time.monotonic()
+            fp = self.fingerprint()
+            if fp == self._fingerprint:
+                return
+            try:
+                self._load(fp)
+                logger.info("🔄 모델/데이터 리로드 완료 (version %d)", self._version)
+            except Exception as e:
+                # 파일 교체 도중일 수 있으므로 기존 스냅샷 유지, 다음 주기에 재시도
+                logger.warning("⚠️ 모델/데이터 리로드 실패, 기존 버전 유지: %s", e)
+        finally:
+            self._lock.release()
+
+    def _load(self, fp):
+        snapshot = build_snapshot(self.base_dir, self._version + 1, self.artifact_dir)
+        logger.info(
+            "📦 모델/데이터 로드 (%s, %.0fms)", snapshot.source, sum(snapshot.timings.values()) * 1000,
+            extra={"fields": {f"{name}_ms": round(seconds * 1000, 1) for name, seconds in snapshot.timings.items()}},
+        )
+        self._version += 1
+        self._fingerprint = fp
+        self._snapshot = snapshot
+        self._last_check = time.monotonic()
+
+
+registry = ModelRegistry()
@@ -0,0 +1,217 @@
+"""
+🏪 상가 목록(storeListInRadius) 조회: 응답 캐시, 중복 요청 합치기, 전체 페이지 모드
+
+- 페이지 단위로 캐시/SingleFlight 를 거쳐 업스트림을 호출한다
+- all 모드는 1페이지의 totalCount 로 나머지 페이지를 요청마다 정해진 동시성 안에서 미리 받아 두고,
+  페이지 순서대로 항목을 스트리밍한다 (메모리에는 동시성 개수만큼의 페이지만 올라간다)
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import ResponseCache, SingleFlight, STALE
+from logs import LOG_SLOW_MS
+from metrics import current_trace, stage
+from upstream import STORE_LIST_URL, UpstreamError, get_client
+
+logger = logging.getLogger(__name__)
+
+# 🗃️ 상가 목록 응답 캐시 (바이트 상한 LRU + TTL, 0 이면 비활성화)
+PROXY_CACHE_MAX_BYTES = int(os.environ.get("PROXY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+PROXY_CACHE_TTL = float(os.environ.get("PROXY_CACHE_TTL", "600"))
+# 만료 후 이 시간 동안은 기존 응답을 주면서 백그라운드로 갱신 (0 이면 사용 안 함)
+PROXY_CACHE_STALE_TTL = float(os.environ.get("PROXY_CACHE_STALE_TTL", "0"))
+# 캐시 키 좌표 격자 (경위도 단위, 예: 0.0005 ≈ 50m), 0 이면 좌표 그대로 사용
+PROXY_COORD_STEP = float(os.environ.get("PROXY_COORD_STEP", "0"))
+
+# 📄 전체 페이지 모드 설정
+PROXY_PAGE_SIZE = int(os.environ.get("PROXY_PAGE_SIZE", "1000"))
+# all 요청 하나가 동시에 받는 페이지 수 (요청마다 따로 적용)
+PROXY_PAGE_CONCURRENCY = int(os.environ.get("PROXY_PAGE_CONCURRENCY", "4"))
+PROXY_MAX_PAGES = int(os.environ.get("PROXY_MAX_PAGES", "50"))
+
+proxy_cache = ResponseCache(PROXY_CACHE_MAX_BYTES, ttl=PROXY_CACHE_TTL, stale_ttl=PROXY_CACHE_STALE_TTL, name="proxy")
+proxy_flight = SingleFlight()
+
+
+def dump_json(obj):
+    # Flask 기본 jsonify 와 같은 출력 (ASCII 이스케이프, 키 정렬, compact, 끝 줄바꿈)
+    return (json.dumps(obj, ensure_ascii=True, sort_keys=True, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def quantize_coord(value, step):
+    if not step or value is None:
+        return value
+    try:
+        return f"{round(float(value) / step) * step:.7f}"
+    except ValueError:
+        return value
+
+
+def store_list_key(params):
+    return (params["cx"], params["cy"], params["radius"], params["indsMclsCd"], params["numOfRows"], params["pageNo"])
+
+
+def load_store_list(key, params):
+    """업스트림 호출 → 응답 본문(JSON bytes)을 캐시에 저장하고 반환"""
+    with stage("upstream_fetch"):
+        full_url, response = get_client().get(STORE_LIST_URL, params)
+    logger.debug("[요청 URL] %s", full_url)
+
+    if response.status != 200:
+        logger.warning("업스트림 응답 오류", extra={"fields": {"status": response.status}})
+        raise UpstreamError(response.status)
+
+    with stage("serialize"):
+        data = json.loads(response.data.decode("utf-8"))
+        body = dump_json(data)
+    proxy_cache.set(key, body, len(body))
+    return body
+
+
+def refresh_in_background(key, params):
+    if proxy_flight.in_flight(key):
+        return
+
+    def run():
+        try:
+            proxy_flight.do(key, lambda: load_store_list(key, params))
+        except Exception as e:
+            logger.warning("⚠️ 상가 목록 백그라운드 갱신 실패: %s", e)
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def fetch_store_page(params):
+    """캐시 → (stale 이면 백그라운드 갱신) → SingleFlight 업스트림 순으로 한 페이지 조회"""
+    key = store_list_key(params)
+    body, state = proxy_cache.get(key)
+    if state == STALE:
+        refresh_in_background(key, params)
+    if body is None:
+        # 같은 조회가 동시에 몰리면 업스트림 호출은 한 번만
+        body = proxy_flight.do(key, lambda: load_store_list(key, params))
+    return body, state
+
+
+def project_items(items, fields):
+    if not fields:
+        return items
+    return [{field: item.get(field) for field in fields} for item in items]
+
+
+def page_items(data):
+    body = data.get("body") or {}
+    return body.get("items") or []
+
+
+def iter_remaining_pages(params, total_pages, concurrency=PROXY_PAGE_CONCURRENCY, context=None):
+    """
+    2페이지부터 마지막 페이지까지 동시성 창 안에서 미리 받아 순서대로 반환.
+    스레드 풀은 요청마다 따로 만들어서 한 all 요청이 다른 요청의 페이지 조회를 막지 않는다.
+    context: 페이지 조회를 실행할 contextvars (기본: 처음 읽기 시작할 때의 context).
+    """
+    if total_pages < 2:
+        return
+    if context is None:
+        context = contextvars.copy_context()
+    pages = iter(range(2, total_pages + 1))
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="store-page")
+
+    def submit(page_no):
+        page_params = dict(params, pageNo=page_no)
+        # 요청의 contextvars 안에서 실행해야 upstream_fetch 시간이 그 요청의 trace 에 쌓인다
+        # (한 Context 는 한 스레드에서만 run 할 수 있으므로 페이지마다 복사본)
+        pending.append(executor.submit(context.copy().run, lambda: fetch_store_page(page_params)[0]))
+
+    try:
+        for page_no in pages:
+            submit(page_no)
+            if len(pending) >= concurrency:
+                break
+
+        while pending:
+            body = pending.popleft().result()
+            page_no = next(pages, None)
+            if page_no is not None:
+                submit(page_no)
+            yield json.loads(body)
+    finally:
+        # 클라이언트가 끊었거나 실패하면 아직 시작 안 한 페이지는 버린다
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AllPages:
+    """
+    all 모드 결과: 1페이지는 미리 받아 두고(실패 시 바로 에러 응답),
+    나머지는 스트리밍 중에 받는다
+    """
+
+    def __init__(self, params, fields=None):
+        self.params = dict(params, numOfRows=PROXY_PAGE_SIZE, pageNo=1)
+        self.fields = fields
+        # 헤더(Server-Timing)는 1페이지까지만 담고 나가므로, 나머지 페이지 시간은 스트리밍 끝에 로그로 남긴다
+        self.trace = current_trace()
+        # 본문은 Flask 가 요청을 끝낸 뒤(teardown 에서 trace 를 지운 뒤) 읽으므로 지금의 context 를 잡아 둔다
+        self.context = contextvars.copy_context()
+        self.started = time.perf_counter()
+        self.emitted = 0
+        body, _ = fetch_store_page(self.params)
+        self.first = json.loads(body)
+        first_body = self.first.get("body") or {}
+        self.total_count = int(first_body.get("totalCount") or 0)
+        total_pages = -(-self.total_count // PROXY_PAGE_SIZE)
+        self.total_pages = max(1, min(total_pages, PROXY_MAX_PAGES))
+        self.truncated = total_pages > PROXY_MAX_PAGES
+
+    def iter_items(self):
+        for item in project_items(page_items(self.first), self.fields):
+            self.emitted += 1
+            yield item
+        for data in iter_remaining_pages(self.params, self.total_pages, context=self.context):
+            for item in project_items(page_items(data), self.fields):
+                self.emitted += 1
+                yield item
+
+    def iter_ndjson(self):
+        try:
+            for item in self.iter_items():
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+        self.log_done()
+
+    def iter_json(self):
+        # 기존 응답과 같은 header/body 구조로, items 배열만 페이지를 합친 것.
+        # numOfRows 는 실제로 내보낸 항목 수라서 items 뒤에 쓴다 (dump_json 의 키 정렬 순서와도 같다)
+        yield '{"header":' + json.dumps(self.first.get("header"), ensure_ascii=False)
+        yield ',"body":{"items":['
+        error = None
+        try:
+            for i, item in enumerate(self.iter_items()):
+                yield ("," if i else "") + json.dumps(item, ensure_ascii=False)
+        except Exception as e:
+            error = str(e)
+        yield f'],"numOfRows":{self.emitted},"pageNo":1,"totalCount":{self.total_count}'
+        # 페이지 상한이나 중간 실패로 totalCount 보다 적게 보냈으면 표시
+        yield ',"truncated":' + ("true" if self.emitted < self.total_count else "false")
+        if error is not None:
+            yield ',"error":' + json.dumps(error, ensure_ascii=False)
+        yield "}}\n"
+        self.log_done()
+
+    def log_done(self):
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        level = logging.INFO if elapsed_ms >= LOG_SLOW_MS else logging.DEBUG
+        if logger.isEnabledFor(level):
+            fields = {"pages": self.total_pages, "rows": self.emitted, "totalCount": self.total_count,
+                      "ms": round(elapsed_ms, 1)}
+            if self.trace is not None:
+                fields.update({f"{name}_ms": round(seconds * 1000, 2) for name, seconds in self.trace.totals().items()})
+            logger.log(level, "상가 목록 전체 페이지 스트리밍 완료", extra={"fields": fields})
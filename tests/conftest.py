@@ -0,0 +1,54 @@
+import os
+
+import pandas as pd
+import pytest
+
+from bench.load import ROOT_DIR
+from bench.synthetic import synthetic_area, write_data_dir
+from registry import BOJEONG_PATH, FEATURE_PATH, build_snapshot, load_bojeong
+
+
+@pytest.fixture(scope="session")
+def feature_df():
+    return pd.read_csv(os.path.join(ROOT_DIR, FEATURE_PATH))
+
+
+@pytest.fixture(scope="session")
+def area_df(feature_df):
+    return synthetic_area(feature_df, seed=0)
+
+
+@pytest.fixture(scope="session")
+def bojeong():
+    return load_bojeong(os.path.join(ROOT_DIR, BOJEONG_PATH))
+
+
+@pytest.fixture(scope="session")
+def data_dir(tmp_path_factory):
+    return write_data_dir(str(tmp_path_factory.mktemp("data")), seed=0)
+
+
+@pytest.fixture(scope="session")
+def snap(data_dir, tmp_path_factory):
+    # 산출물 없이 원본 CSV/pkl 경로로 로드
+    return build_snapshot(data_dir, 1, artifact_dir=str(tmp_path_factory.mktemp("no-artifacts")))
+
+
+@pytest.fixture(scope="session")
+def app(data_dir, tmp_path_factory):
+    # proxy 의 전역 registry 를 합성 데이터 디렉터리로 돌려서 Flask 앱을 요청 단위로 시험한다
+    import proxy
+    from registry import registry
+
+    saved = registry.base_dir, registry.artifact_dir, registry.reload_interval
+    registry.base_dir = data_dir
+    registry.artifact_dir = str(tmp_path_factory.mktemp("app-artifacts"))
+    registry.reload_interval = 0
+    registry.reload()
+    yield proxy.app
+    registry.base_dir, registry.artifact_dir, registry.reload_interval = saved
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,92 @@
+"""
+적응형 주변 탐색 vs 전수 격자 탐색: 같은 격자 점은 같은 값, 추천 순위(추천지/매출/순서)는 그대로 같게
+
+적응형 탐색은 모델 예측이 같을 수밖에 없는 점들(같은 상권 + 모든 분기 기준에 대해 같은 쪽)을 묶어
+한 번만 채점하므로 근사가 아니다. 기본 반경과 1km 에서 모든 위치가 같아야 한다.
+"""
+import numpy as np
+import pytest
+
+from bench.requests_gen import RequestGenerator
+from predictor import (
+    adaptive_neighbours, change_encoder_for, find_nearest_area, rank_recommendations, score_neighbours
+)
+from registry import INDUSTRY_CODE_MAP
+
+BASE_SALES = 1e7
+
+
+def search_cases(snap, radius, samples, seed=0):
+    gen = RequestGenerator(seed=seed)
+    cases = []
+    while len(cases) < samples:
+        req = gen.predict()
+        category = INDUSTRY_CODE_MAP[req["indsMclsCd"]]
+        nearest, _ = find_nearest_area(snap, req["lat"], req["lon"])
+        if snap.profiles.count(nearest["상권_코드_명"], category) == 0:
+            continue
+        start_time, end_time = (int(t) for t in req["time_range"].split("-"))
+        weights = snap.bojeong.temporal_weights(req["day_of_week"], start_time, end_time)
+        args = (snap, snap.model_for(category), change_encoder_for(snap, category), category,
+                req["lat"], req["lon"], BASE_SALES, weights)
+        grid = score_neighbours(*args, radius=radius, step=30)
+        adaptive = adaptive_neighbours(*args, radius=radius, min_step=30)
+        cases.append((grid, adaptive))
+    return cases
+
+
+@pytest.fixture(scope="module", params=[(300, 30), (1000, 12)], ids=["300m", "1km"])
+def cases(request, snap):
+    radius, samples = request.param
+    return search_cases(snap, radius, samples)
+
+
+def test_adaptive_points_match_grid(cases):
+    # 적응형이 결과로 낸 점은 전수 격자의 같은 점과 좌표/값이 같다
+    for grid, adaptive in cases:
+        by_coord = {(r["lat"], r["lon"]): r for r in grid}
+        assert bool(adaptive) == bool(grid)
+        for r in adaptive:
+            assert by_coord[(r["lat"], r["lon"])] == r
+
+
+def test_adaptive_ranking_matches_grid(cases):
+    for grid, adaptive in cases:
+        assert rank_recommendations(adaptive, BASE_SALES) == rank_recommendations(grid, BASE_SALES)
+
+
+def test_same_path_keys_predict_the_same(snap):
+    # 분기 기준에 대해 같은 쪽에 있는 행은 역 거리가 달라도 예측값이 비트 단위로 같다
+    category = "커피-음료"
+    store = snap.feature_stores[category]
+    model = snap.model_for(category)
+    rng = np.random.default_rng(0)
+    rows = np.repeat(rng.integers(0, len(store.matrix), 8), 50)
+    X = store.assemble(rows, station_dist=rng.uniform(0, 1500, len(rows)), station_traffic=np.full(len(rows), 5e4),
+                       change_encoded=np.zeros(len(rows), dtype=int), competitors=np.full(len(rows), 3.0))
+    keys = snap.split_index_for(category).path_keys(X, range(X.shape[1]))
+    predictions = model.predict(store.frame(X))
+    _, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    assert len(np.unique(inverse)) < len(X)
+    for cell in np.unique(inverse):
+        assert len(set(predictions[inverse == cell].tolist())) == 1
+
+
+def test_budget_scores_nearest_cells_only(snap):
+    gen = RequestGenerator(seed=1)
+    while True:
+        req = gen.predict()
+        category = INDUSTRY_CODE_MAP[req["indsMclsCd"]]
+        nearest, _ = find_nearest_area(snap, req["lat"], req["lon"])
+        if snap.profiles.count(nearest["상권_코드_명"], category) >= 4:
+            break
+    weights = snap.bojeong.temporal_weights(req["day_of_week"], 9, 18)
+    args = (snap, snap.model_for(category), change_encoder_for(snap, category), category,
+            req["lat"], req["lon"], BASE_SALES, weights)
+    full = adaptive_neighbours(*args, radius=300, min_step=30)
+    one = adaptive_neighbours(*args, radius=300, min_step=30, budget=1)
+    # 칸 하나만 채점하면 매출이 한 가지뿐이고, 그 점들은 전체 탐색에도 같은 값으로 있다
+    assert one and len({r["sales"] for r in one}) == 1
+    by_coord = {(r["lat"], r["lon"]): r for r in full}
+    assert all(by_coord.get((r["lat"], r["lon"]), r) == r for r in one)
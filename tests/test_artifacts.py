@@ -0,0 +1,107 @@
+"""
+산출물 경로: 원본 경로와 같은 예측, xgboost/sklearn 없이 로드, 원본이 그대로면 내용 해시를 건너뛰는지
+"""
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import registry
+from artifacts import build_artifacts
+from bench.load import ROOT_DIR
+from bench.requests_gen import RequestGenerator
+from predictor import predict_location
+from registry import AREA_PATH, INDUSTRY_CODE_MAP, build_snapshot
+from tree_ensemble import TreeEnsemble
+
+
+@pytest.fixture(scope="module")
+def artifact_dir(data_dir, tmp_path_factory):
+    out_dir = str(tmp_path_factory.mktemp("artifacts") / "artifacts")
+    build_artifacts(data_dir, out_dir)
+    return out_dir
+
+
+def test_artifact_predictions_match_source(snap, data_dir, artifact_dir):
+    loaded = build_snapshot(data_dir, 2, artifact_dir=artifact_dir)
+    assert loaded.source == "artifacts"
+    assert loaded.digest == snap.digest
+
+    gen = RequestGenerator(seed=1)
+    compared = 0
+    for _ in range(15):
+        req = gen.predict()
+        start_time, end_time = (int(t) for t in req["time_range"].split("-"))
+        args = (req["lat"], req["lon"], INDUSTRY_CODE_MAP[req["indsMclsCd"]], req["day_of_week"],
+                start_time, end_time, req["store_count"])
+        try:
+            expected = predict_location(snap, *args)
+        except ValueError:
+            with pytest.raises(ValueError):
+                predict_location(loaded, *args)
+            continue
+        assert predict_location(loaded, *args) == expected
+        compared += 1
+    assert compared >= 10
+
+
+@pytest.mark.parametrize("category", ["커피-음료", "한식음식점"])
+def test_tree_ensemble_matches_xgboost(snap, category):
+    model = snap.model_for(category)
+    store = snap.feature_stores[category]
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, len(store.matrix), 2000)
+    X = store.assemble(rows, station_dist=rng.uniform(0, 1500, len(rows)),
+                       station_traffic=rng.uniform(0, 1e5, len(rows)), change_encoded=rng.integers(0, 4, len(rows)),
+                       competitors=rng.integers(0, 20, len(rows)).astype(float))
+    X[rng.random(X.shape) < 0.05] = np.nan
+
+    ensemble = TreeEnsemble.from_model(model)
+    # 분기/결측 방향/float32 합산 순서까지 같아서 비트 단위로 같다
+    np.testing.assert_array_equal(ensemble.predict(store.frame(X)), model.predict(store.frame(X)))
+    assert ensemble.predict(X[:0]).shape == (0,)
+    with pytest.raises(ValueError):
+        ensemble.predict(store.frame(X).iloc[:, ::-1])
+
+
+def test_artifact_snapshot_skips_heavy_imports(data_dir, artifact_dir):
+    # 산출물 경로의 콜드 스타트는 xgboost(와 그게 끌어오는 sklearn/scipy)를 import 하지 않는다
+    code = (
+        "import sys\n"
+        "from registry import build_snapshot\n"
+        f"snap = build_snapshot({data_dir!r}, 1, artifact_dir={artifact_dir!r})\n"
+        "assert snap.source == 'artifacts', snap.source\n"
+        "print(sorted(m for m in ('xgboost', 'sklearn', 'scipy', 'joblib') if m in sys.modules))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == "[]"
+
+
+def test_unchanged_sources_skip_hashing(data_dir, artifact_dir, monkeypatch):
+    def no_hash(base_dir):
+        raise AssertionError("data_digest should not run when the fingerprint matches")
+
+    monkeypatch.setattr(registry, "data_digest", no_hash)
+    assert build_snapshot(data_dir, 3, artifact_dir=artifact_dir).source == "artifacts"
+
+
+def test_touched_source_is_hashed_again(data_dir, artifact_dir, monkeypatch):
+    calls = []
+    data_digest = registry.data_digest
+
+    def counting(base_dir):
+        calls.append(base_dir)
+        return data_digest(base_dir)
+
+    monkeypatch.setattr(registry, "data_digest", counting)
+    area_path = os.path.join(data_dir, AREA_PATH)
+    st = os.stat(area_path)
+    try:
+        os.utime(area_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        # mtime 만 바뀌고 내용은 같으므로 다시 해시한 뒤 산출물을 그대로 쓴다
+        assert build_snapshot(data_dir, 4, artifact_dir=artifact_dir).source == "artifacts"
+    finally:
+        os.utime(area_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert calls == [data_dir]
@@ -0,0 +1,172 @@
+"""
+ResponseCache (TTL / stale / 바이트 상한 LRU) 와 SingleFlight (중복 호출 합치기)
+"""
+import threading
+
+import pytest
+
+import cache
+from cache import HIT, MISS, STALE, ResponseCache, SingleFlight, VersionedCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", fake)
+    return fake
+
+
+def test_ttl_then_stale_then_miss(clock):
+    c = ResponseCache(1000, ttl=10, stale_ttl=5)
+    c.set("k", b"v", 1)
+    assert c.get("k") == (b"v", HIT)
+    clock.now += 9.9
+    assert c.get("k") == (b"v", HIT)
+    clock.now += 0.2
+    assert c.get("k") == (b"v", STALE)
+    clock.now += 5
+    assert c.get("k") == (None, MISS)
+    # 만료된 항목은 지워진다
+    assert c.stats()["entries"] == 0
+    assert c.stats()["bytes"] == 0
+
+
+def test_no_ttl_never_expires(clock):
+    c = ResponseCache(1000)
+    c.set("k", b"v", 1)
+    clock.now += 10 ** 9
+    assert c.get("k") == (b"v", HIT)
+
+
+def test_per_item_ttl_overrides_default(clock):
+    c = ResponseCache(1000, ttl=100)
+    c.set("short", 1, 1, ttl=1)
+    c.set("long", 2, 1)
+    clock.now += 2
+    assert c.get("short") == (None, MISS)
+    assert c.get("long") == (2, HIT)
+
+
+def test_byte_bound_evicts_least_recently_used(clock):
+    c = ResponseCache(10)
+    c.set("a", "a", 4)
+    c.set("b", "b", 4)
+    assert c.get("a") == ("a", HIT)      # a 가 최근 사용
+    c.set("c", "c", 4)                   # 12 > 10 → 가장 오래된 b 제거
+    assert c.get("b") == (None, MISS)
+    assert c.get("a") == ("a", HIT)
+    assert c.get("c") == ("c", HIT)
+    stats = c.stats()
+    assert stats["bytes"] == 8
+    assert stats["evictions"] == 1
+
+
+def test_oversized_and_disabled(clock):
+    c = ResponseCache(10)
+    c.set("big", "x", 11)
+    assert c.get("big") == (None, MISS)
+    disabled = ResponseCache(0)
+    disabled.set("k", "v", 1)
+    assert disabled.get("k") == (None, MISS)
+
+
+def test_replacing_key_keeps_byte_count(clock):
+    c = ResponseCache(100)
+    c.set("k", "v1", 30)
+    c.set("k", "v2", 20)
+    assert c.get("k") == ("v2", HIT)
+    assert c.stats()["bytes"] == 20
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", slow)))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(5)]
+    for t in followers:
+        t.start()
+    # 팔로워가 모두 대기에 들어갈 때까지
+    while flight.coalesced < 5:
+        threading.Event().wait(0.001)
+    release.set()
+    for t in [leader] + followers:
+        t.join(5)
+
+    assert calls == [1]
+    assert results == ["result"] * 6
+    assert not flight.in_flight("k")
+
+
+def test_single_flight_shares_errors_and_forgets_key():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    assert started.wait(5)
+    threads.append(threading.Thread(target=call))
+    threads[1].start()
+    while flight.coalesced < 1:
+        threading.Event().wait(0.001)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert errors == ["boom", "boom"]
+    # 실패한 키는 남지 않으므로 다음 호출은 새로 실행된다
+    assert flight.do("k", lambda: "ok") == "ok"
+
+
+def test_versioned_cache_newer_tag_clears():
+    c = VersionedCache(1000, name="t")
+    c.set("a", b"v1", 2, tag=1)
+    assert c.get("a", tag=1) == (b"v1", HIT)
+    assert c.get("a", tag=2) == (None, MISS)
+    assert c.tag == 2
+    assert c.stats()["entries"] == 0
+
+
+def test_versioned_cache_older_tag_is_miss_without_clearing():
+    c = VersionedCache(1000, name="t")
+    c.set("a", b"v2", 2, tag=2)
+    # 리로드 전에 시작한 요청 (옛 버전): 새 항목을 지우지도, 옛 결과를 저장하지도 않는다
+    assert c.get("a", tag=1) == (None, MISS)
+    c.set("b", b"v1", 2, tag=1)
+    c.set("a", b"v1", 2, tag=1)
+    assert c.tag == 2
+    assert c.get("a", tag=2) == (b"v2", HIT)
+    assert c.get("b", tag=2) == (None, MISS)
@@ -0,0 +1,72 @@
+"""
+FeatureStore.assemble 이 기존 요청 경로(load_predicted_vector → 위치별 컬럼 → 누락 피처 보완
+→ add_derived_features → DataFrame) 와 같은 입력 행렬/예측값을 만드는지
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from predictor import LATEST_QUARTER, NEEDED_COLS, SEASONAL_FEATURES, add_derived_features
+
+
+def baseline_frame(snap, model, category, code, station_dist, station_traffic, change_encoded, competitors,
+                   seasonal):
+    feature_df, df = snap.feature_df, snap.df
+    input_vec = feature_df[feature_df["상권_코드"] == code].iloc[0].to_dict()
+    input_vec["역까지_거리_m"] = station_dist
+    input_vec["가장_가까운_역_승하차_인원_수"] = station_traffic
+    input_vec["상권_변화_지표_명"] = int(change_encoded)
+    input_vec["300m내_경쟁_업종_수"] = competitors
+
+    recent_row = df[
+        (df["기준분기"] == LATEST_QUARTER) &
+        (df["상권_코드"].astype(int) == int(code)) &
+        (df["서비스_업종_코드_명"] == category)
+    ]
+    if not recent_row.empty:
+        for col in NEEDED_COLS:
+            if col not in input_vec:
+                input_vec[col] = recent_row.iloc[0].get(col, np.nan)
+    else:
+        for col in NEEDED_COLS:
+            input_vec[col] = np.nan
+
+    if seasonal:
+        input_vec.update(SEASONAL_FEATURES)
+
+    input_df = add_derived_features(pd.DataFrame([input_vec]))
+    return input_df[model.feature_names_in_]
+
+
+@pytest.mark.parametrize("category", ["커피-음료", "한식음식점", "중식음식점"])
+@pytest.mark.parametrize("seasonal", [False, True])
+def test_assemble_matches_baseline_frame(snap, category, seasonal):
+    store = snap.feature_stores[category]
+    model = snap.model_for(category)
+    rng = np.random.default_rng(7)
+
+    codes = list(store.index)
+    n = len(codes)
+    station_dist = rng.uniform(0, 2000, n)
+    station_traffic = rng.uniform(1e4, 9e4, n)
+    change_encoded = rng.integers(0, 4, n)
+    competitors = rng.integers(0, 40, n)
+
+    X = store.assemble([store.row_for(code) for code in codes], station_dist, station_traffic, change_encoded,
+                       competitors, seasonal=seasonal)
+    expected = pd.concat([
+        baseline_frame(snap, model, category, code, station_dist[i], station_traffic[i], change_encoded[i],
+                       competitors[i], seasonal)
+        for i, code in enumerate(codes)
+    ], ignore_index=True)
+
+    assert list(store.feature_names) == list(expected.columns)
+    np.testing.assert_array_equal(X, expected.to_numpy(dtype=np.float32))
+    np.testing.assert_array_equal(model.predict(store.frame(X)), model.predict(expected))
+
+
+def test_unknown_area_code(snap):
+    store = snap.feature_stores["커피-음료"]
+    assert store.row_of(-1) is None
+    with pytest.raises(ValueError):
+        store.row_for(-1)
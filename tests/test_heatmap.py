@@ -0,0 +1,44 @@
+"""
+히트맵 재빌드가 실행 중인 서버가 열어 둔 래스터를 건드리지 않는지 / 타일 쿼리 검증
+"""
+import os
+
+import numpy as np
+import pytest
+
+from heatmap import Heatmap, build_heatmap, parse_tile_params
+
+
+def test_rebuild_leaves_open_heatmap_intact(snap, tmp_path, capsys):
+    out_dir = str(tmp_path / "heatmap")
+    build_heatmap(snap, out_dir, step_m=400, margin_m=0)
+    live = Heatmap(out_dir)
+    before = {name: np.array(getattr(live, name)) for name in ("sales", "area", "station", "station_dist")}
+
+    # 다른 격자로 다시 빌드: 제자리에 썼다면 열려 있는 mmap 이 잘리거나 값이 바뀐다
+    meta = build_heatmap(snap, out_dir, step_m=300, margin_m=0)
+    for name, values in before.items():
+        np.testing.assert_array_equal(np.asarray(getattr(live, name)), values)
+
+    rebuilt = Heatmap(out_dir)
+    assert rebuilt.meta["step_m"] == 300
+    assert rebuilt.sales.shape == (len(meta["categories"]), meta["height"], meta["width"])
+    assert sorted(os.listdir(tmp_path)) == ["heatmap"]
+
+
+def test_parse_tile_params():
+    assert parse_tile_params({"tile_row": "1", "tile_col": "2"}) == (1, 2, None)
+    assert parse_tile_params({"tile_row": "0", "tile_col": "0", "time_range": "6-14"}) == (0, 0, (6, 14))
+
+
+@pytest.mark.parametrize("args", [
+    {"tile_row": "a", "tile_col": "0"},
+    {"tile_row": "0"},
+    {"tile_row": "0", "tile_col": "0", "time_range": "6"},
+    {"tile_row": "0", "tile_col": "0", "time_range": "6-x"},
+    {"tile_row": "0", "tile_col": "0", "time_range": "14-6"},
+    {"tile_row": "0", "tile_col": "0", "time_range": "0-25"},
+])
+def test_parse_tile_params_rejects(args):
+    with pytest.raises(ValueError):
+        parse_tile_params(args)
@@ -0,0 +1,59 @@
+"""
+업종별 순위: 업종마다 /api/predict(predict_location) 를 따로 부른 입력 위치 결과와 같은지
+"""
+import pytest
+
+from bench.requests_gen import RequestGenerator
+from predictor import predict_industries, predict_location
+from registry import INDUSTRY_CODE_MAP
+
+INDUSTRIES = list(INDUSTRY_CODE_MAP.items())
+SEARCH = {"search": "grid", "radius": 60, "min_step": 30, "budget": None}
+
+
+def individual(snap, lat, lon, category, selected_days, start_time, end_time, store_count):
+    """업종 하나를 /api/predict 경로로 예측 → (입력위치 또는 None, status)"""
+    try:
+        result, status = predict_location(snap, lat, lon, category, selected_days, start_time, end_time, store_count,
+                                          search=SEARCH)
+    except ValueError:
+        # 피처 저장소에 없는 상권: /api/predict 는 500
+        return None, 500
+    return (result["입력위치"] if status == 200 else None), status
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_industries_match_individual_predictions(snap, seed):
+    gen = RequestGenerator(seed=seed)
+    for _ in range(4):
+        req = gen.predict()
+        start_time, end_time = (int(t) for t in req["time_range"].split("-"))
+        store_counts = {"I212": req["store_count"]} if seed % 2 else {}
+        result, status = predict_industries(
+            snap, req["lat"], req["lon"], INDUSTRIES, req["day_of_week"], start_time, end_time, store_counts
+        )
+
+        expected = {}
+        for code, category in INDUSTRIES:
+            base, base_status = individual(snap, req["lat"], req["lon"], category, req["day_of_week"],
+                                           start_time, end_time, store_counts.get(code))
+            expected[code] = (base, base_status)
+
+        unavailable = {entry["업종코드"]: entry["status"] for entry in (result.get("예측불가") or [])}
+        assert unavailable == {code: s for code, (base, s) in expected.items() if s != 200}
+        if status != 200:
+            assert all(s != 200 for _, s in expected.values())
+            continue
+
+        ranked = result["업종순위"]
+        assert {entry["업종코드"]: entry["매출"] for entry in ranked} == {
+            code: base["sales"] for code, (base, s) in expected.items() if s == 200
+        }
+        # 매출 내림차순, 같으면 요청한 업종 순서
+        order = [code for code, _ in INDUSTRIES]
+        assert [entry["업종코드"] for entry in ranked] == sorted(
+            (entry["업종코드"] for entry in ranked), key=lambda code: (-expected[code][0]["sales"], order.index(code))
+        )
+        assert [entry["순위"] for entry in ranked] == list(range(1, len(ranked) + 1))
+        location = {k: v for k, v in expected[ranked[0]["업종코드"]][0].items() if k != "sales"}
+        assert result["입력위치"] == location
@@ -0,0 +1,172 @@
+"""
+predict_location 의 주변 추천(추천위치/추천순위/매출)이 기존 요청 경로의 오프셋별 이중 루프와 같은지
+
+아래 baseline_* 은 기존 /api/predict 의 입력 위치 예측, dy → dx 주변 탐색 루프, 추천 순위 구성을
+그대로 옮긴 것이다 (print 만 뺌). 최근접 상권/지하철역 조회만 스냅샷의 색인을 쓴다
+(지하철역은 haversine 최근접으로 바뀌었고, 같은 좌표의 상권 행은 첫 행으로 정해졌다).
+"""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+from geopy.distance import geodesic
+
+from bench.requests_gen import RequestGenerator
+from predictor import (
+    LATEST_QUARTER, NEEDED_COLS, SEASONAL_FEATURES, add_derived_features, change_encoder_for, find_nearest_area,
+    find_nearest_station, predict_location
+)
+from registry import INDUSTRY_CODE_MAP
+
+
+def offset_latlon(lat, lon, dy_m, dx_m):
+    delta_lat = dy_m / 111000
+    delta_lon = dx_m / (111000 * math.cos(math.radians(lat)))
+    return lat + delta_lat, lon + delta_lon
+
+
+def load_predicted_vector(feature_df, area_code):
+    row = feature_df[feature_df["상권_코드"] == area_code]
+    if row.empty:
+        raise ValueError(f"❌ 상권 코드 {area_code} 에 해당하는 예측 피처 없음")
+    return row.iloc[0].to_dict()
+
+
+def fill_needed_cols(df, input_vec, area_code, category):
+    recent_row = df[
+        (df["기준분기"] == LATEST_QUARTER) &
+        (df["상권_코드"].astype(int) == int(area_code)) &
+        (df["서비스_업종_코드_명"] == category)
+    ]
+    if not recent_row.empty:
+        for col in NEEDED_COLS:
+            if col not in input_vec:
+                input_vec[col] = recent_row.iloc[0].get(col, np.nan)
+    else:
+        for col in NEEDED_COLS:
+            input_vec[col] = np.nan
+
+
+def baseline_predict(snap, lat, lon, category, selected_days, start_time, end_time, store_count):
+    """기존 predicted_sales() 의 입력 위치 예측 + 주변 탐색 + 추천 순위 → (base_sales, 추천위치, 추천순위)"""
+    df, feature_df, bojeong = snap.df, snap.feature_df, snap.bojeong
+    model = snap.model_for(category)
+    change_encoder = change_encoder_for(snap, category)
+
+    nearest, _ = find_nearest_area(snap, lat, lon)
+    station_name, station_dist, station_traffic = find_nearest_station(snap, lat, lon)
+    change_encoded = change_encoder.transform([nearest["상권_변화_지표_명"]])[0]
+    df_basis = bojeong.get_sales_distribution_basis(df, nearest["상권_코드_명"], category)
+    df_basis = df_basis.dropna(subset=["점포_당_매출_금액"])
+    if len(df_basis) == 0:
+        return None
+
+    input_vec = load_predicted_vector(feature_df, nearest["상권_코드"])
+    input_vec["역까지_거리_m"] = station_dist
+    input_vec["가장_가까운_역_승하차_인원_수"] = station_traffic
+    input_vec["상권_변화_지표_명"] = int(change_encoded)
+    input_vec["300m내_경쟁_업종_수"] = store_count
+    fill_needed_cols(df, input_vec, nearest["상권_코드"], category)
+    input_df = add_derived_features(pd.DataFrame([input_vec]))[model.feature_names_in_]
+    base_sales = model.predict(input_df)[0]
+    base_sales = bojeong.apply_temporal_corrections(base_sales, df_basis, selected_days, start_time, end_time)
+
+    results = []
+    for dy in range(-300, 301, 30):
+        for dx in range(-300, 301, 30):
+            adj_lat, adj_lon = offset_latlon(lat, lon, dy, dx)
+            dist = geodesic((lat, lon), (adj_lat, adj_lon)).meters
+            if dist <= 300:
+                if abs(adj_lat - lat) < 1e-6 and abs(adj_lon - lon) < 1e-6:
+                    continue
+
+                near, _ = find_nearest_area(snap, adj_lat, adj_lon)
+                try:
+                    input_vec = load_predicted_vector(feature_df, near["상권_코드"])
+                except Exception:
+                    continue
+
+                df_basis_near = bojeong.get_sales_distribution_basis(df, near["상권_코드_명"], category)
+                df_basis_near = df_basis_near.dropna(subset=["점포_당_매출_금액"])
+                if len(df_basis_near) < 4:
+                    continue
+
+                stat_name, stat_d, stat_t = find_nearest_station(snap, adj_lat, adj_lon)
+                chg_enc = change_encoder.transform([near["상권_변화_지표_명"]])[0]
+
+                input_vec["역까지_거리_m"] = stat_d
+                input_vec["가장_가까운_역_승하차_인원_수"] = stat_t
+                input_vec["상권_변화_지표_명"] = int(chg_enc)
+                input_vec["300m내_경쟁_업종_수"] = near["300m내_경쟁_업종_수"]
+                fill_needed_cols(df, input_vec, near["상권_코드"], category)
+                input_vec.update(SEASONAL_FEATURES)
+
+                input_df = add_derived_features(pd.DataFrame([input_vec]))[model.feature_names_in_]
+                sales = model.predict(input_df)[0]
+                sales = bojeong.apply_temporal_corrections(sales, df_basis_near, selected_days, start_time, end_time)
+                percent = round(sales / base_sales * 100) if base_sales else None
+
+                results.append({
+                    "lat": adj_lat, "lon": adj_lon, "dist": int(dist), "sales": int(sales),
+                    "percent": percent, "상권명": near["상권_코드_명"],
+                    "지하철역": stat_name, "지하철역거리": int(stat_d), "승하차": int(stat_t)
+                })
+
+    final_recommendations = []
+    ranked_output = []
+    if results:
+        results_sorted = sorted(results, key=lambda x: -x["sales"])
+        rank = 1
+        i = 0
+        while i < len(results_sorted) and rank <= 3:
+            current_group = [results_sorted[i]]
+            current_sales = results_sorted[i]["sales"]
+            i += 1
+            while i < len(results_sorted) and abs(results_sorted[i]["sales"] - current_sales) <= 1_000_000:
+                current_group.append(results_sorted[i])
+                i += 1
+
+            group_percent = f"(입력 위치 대비: {round(current_sales / base_sales * 100)}%)" if base_sales else ""
+            group_result = {
+                "순위": rank, "매출": int(current_sales), "퍼센트": group_percent,
+                "공동": len(current_group) > 1, "추천지": []
+            }
+            for loc in current_group[:3]:
+                group_result["추천지"].append({
+                    "상권명": loc["상권명"], "lat": loc["lat"], "lon": loc["lon"], "거리": loc["dist"],
+                    "지하철역": loc["지하철역"], "지하철역거리": loc["지하철역거리"], "승하차": loc["승하차"],
+                    "예상매출": loc["sales"]
+                })
+            final_recommendations.append(loc)
+            ranked_output.append(group_result)
+            rank += 1
+    return base_sales, final_recommendations, ranked_output
+
+
+def seeded_requests(snap, samples, seed=0):
+    gen = RequestGenerator(seed=seed)
+    cases = []
+    while len(cases) < samples:
+        req = gen.predict()
+        category = INDUSTRY_CODE_MAP[req["indsMclsCd"]]
+        start_time, end_time = (int(t) for t in req["time_range"].split("-"))
+        args = (req["lat"], req["lon"], category, req["day_of_week"], start_time, end_time, req["store_count"])
+        expected = baseline_predict(snap, *args)
+        if expected is not None:
+            cases.append((args, expected))
+    return cases
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_neighbours_match_baseline_loop(snap, seed):
+    compared = 0
+    for args, (base_sales, final_recommendations, ranked_output) in seeded_requests(snap, 4, seed):
+        result, status = predict_location(snap, *args)
+        assert status == 200
+        assert result["입력위치"]["sales"] == int(base_sales)
+        assert result["추천위치"] == final_recommendations
+        assert result["추천순위"] == ranked_output
+        compared += bool(ranked_output)
+    # 추천이 실제로 나온 위치가 있어야 비교가 의미 있다
+    assert compared
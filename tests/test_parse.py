@@ -0,0 +1,25 @@
+"""
+요청 옵션 파싱: 참/거짓 옵션은 문자열 "false" 가 참이 되지 않도록 엄격하게
+"""
+import pytest
+
+from predictor import parse_flag
+
+
+@pytest.mark.parametrize("value, expected", [
+    (True, True), (False, False), (1, True), (0, False),
+    ("true", True), ("false", False), ("1", True), ("0", False), (" False ", False),
+])
+def test_parse_flag(value, expected):
+    assert parse_flag({"neighbours": value}, "neighbours", default=not expected) is expected
+
+
+def test_parse_flag_default():
+    assert parse_flag({}, "neighbours", default=True) is True
+    assert parse_flag({"neighbours": None}, "neighbours") is False
+
+
+@pytest.mark.parametrize("value", ["no", "", "yes", 2, 0.0, [], {}])
+def test_parse_flag_rejects(value):
+    with pytest.raises(ValueError):
+        parse_flag({"neighbours": value}, "neighbours")
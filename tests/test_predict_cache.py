@@ -0,0 +1,40 @@
+"""
+predict_cache_key: 같은 뜻의 요청은 같은 키, 결과가 달라질 수 있는 입력은 다른 키
+"""
+from predictor import DEFAULT_SEARCH, parse_search_params, predict_cache_key, snap_coord
+
+BASE = dict(lat=37.5401234, lon=127.0701234, indsMclsCd="I212", selected_days=["월", "화"],
+            start_time=9, end_time=18, store_count=3)
+
+
+def key(**overrides):
+    return predict_cache_key(**dict(BASE, **overrides))
+
+
+def test_day_order_does_not_matter():
+    assert key(selected_days=["화", "월"]) == key(selected_days=["월", "화"])
+    assert key(selected_days=["월"]) != key()
+
+
+def test_coordinates_snap_to_grid():
+    step = 0.0005
+    assert key(lat=37.54012, lon=127.07011, step=step) == key(lat=37.54018, lon=127.07016, step=step)
+    assert key(lat=37.5401, step=step) != key(lat=37.5411, step=step)
+    # step 0 이면 좌표 그대로
+    assert key(lat=37.54012) != key(lat=37.54013)
+    assert snap_coord(37.54012, step) == 37.54
+
+
+def test_default_search_shares_key_with_no_search():
+    assert key(search=DEFAULT_SEARCH) == key(search=None)
+    assert key(search=parse_search_params({})) == key()
+    assert key(search=parse_search_params({"search": "adaptive"})) != key()
+    assert key(search=parse_search_params({"radius": 600})) != key()
+
+
+def test_inputs_that_change_the_result():
+    assert key(mode="heatmap") != key()
+    assert key(store_count=4) != key()
+    assert key(indsMclsCd="I201") != key()
+    assert key(start_time=10) != key()
+    assert key(end_time=17) != key()
@@ -0,0 +1,48 @@
+"""
+/api/predict, /api/predict/batch 라우트: 입력 검증 상태 코드, 항목 수 제한, 스트리밍 결과
+"""
+import json
+
+import proxy
+from bench.requests_gen import RequestGenerator
+
+
+def predict_requests(count, seed=0):
+    gen = RequestGenerator(seed=seed)
+    return [gen.predict() for _ in range(count)]
+
+
+def batch_lines(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_batch_streams_one_line_per_item(client):
+    items = predict_requests(3) + [{"lat": 37.54}]
+    response = client.post("/api/predict/batch", json={"items": items})
+    assert response.status_code == 200
+    lines = batch_lines(response)
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    assert lines[3]["status"] == 400
+    # 매출 데이터가 없는 상권이면 그 항목만 400
+    assert all(line["status"] in (200, 400) for line in lines[:3])
+    assert any("추천위치" in line.get("result", {}) for line in lines)
+
+
+def test_neighbour_batch_size_is_capped(client, monkeypatch):
+    monkeypatch.setattr(proxy, "PREDICT_BATCH_MAX_NEIGHBOUR_ITEMS", 2)
+    items = predict_requests(3)
+    assert client.post("/api/predict/batch", json={"items": items}).status_code == 413
+    # 주변 탐색 없는 배치는 PREDICT_BATCH_MAX_ITEMS 까지 받는다
+    response = client.post("/api/predict/batch", json={"items": items, "neighbours": False})
+    assert response.status_code == 200
+    assert len(batch_lines(response)) == 3
+
+
+def test_unknown_industry_code_is_400_on_both_routes(client):
+    item = dict(predict_requests(1)[0], indsMclsCd="X999")
+    response = client.post("/api/predict", json=item)
+    assert response.status_code == 400
+    assert "X999" in response.get_json()["error"]
+    line, = batch_lines(client.post("/api/predict/batch", json={"items": [item]}))
+    assert line["status"] == 400
+    assert line["error"] == response.get_json()["error"]
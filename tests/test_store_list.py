@@ -0,0 +1,95 @@
+"""
+all 모드 스트리밍: 실제 내보낸 항목 수 / 잘림 표시 / 페이지 스레드의 단계 시간이 요청 trace 에 쌓이는지
+"""
+import json
+import time
+
+import pytest
+
+import store_list
+from metrics import current_trace, end_trace, stage, start_trace
+
+
+def fake_pages(total_count, page_size):
+    def fetch(params):
+        with stage("upstream_fetch"):
+            time.sleep(0.001)
+            start = (params["pageNo"] - 1) * page_size
+            items = [{"bizesId": str(i), "bizesNm": f"상가 {i}"} for i in range(start, min(start + page_size, total_count))]
+        body = {"header": {"resultCode": "00"}, "body": {"items": items, "totalCount": total_count}}
+        return json.dumps(body).encode("utf-8"), None
+    return fetch
+
+
+@pytest.fixture
+def trace():
+    trace = start_trace()
+    yield trace
+    end_trace()
+
+
+def stream(monkeypatch, total_count, page_size=10, max_pages=100, fields=None):
+    monkeypatch.setattr(store_list, "PROXY_PAGE_SIZE", page_size)
+    monkeypatch.setattr(store_list, "PROXY_MAX_PAGES", max_pages)
+    monkeypatch.setattr(store_list, "fetch_store_page", fake_pages(total_count, page_size))
+    pages = store_list.AllPages({"cx": "127.08", "cy": "37.54", "radius": "500", "indsMclsCd": "I212"}, fields)
+    return pages, json.loads("".join(pages.iter_json()))
+
+
+def test_all_pages_complete(monkeypatch, trace):
+    pages, data = stream(monkeypatch, total_count=35)
+    body = data["body"]
+    assert [item["bizesId"] for item in body["items"]] == [str(i) for i in range(35)]
+    assert body["numOfRows"] == 35
+    assert body["totalCount"] == 35
+    assert body["truncated"] is False
+    assert pages.total_pages == 4
+
+
+def test_page_cap_reports_emitted_rows(monkeypatch, trace):
+    _, data = stream(monkeypatch, total_count=35, max_pages=2)
+    body = data["body"]
+    assert len(body["items"]) == 20
+    assert body["numOfRows"] == 20
+    assert body["totalCount"] == 35
+    assert body["truncated"] is True
+
+
+def test_page_error_reports_emitted_rows(monkeypatch, trace):
+    fetch = fake_pages(35, 10)
+
+    def failing(params):
+        if params["pageNo"] == 3:
+            raise store_list.UpstreamError(502)
+        return fetch(params)
+
+    monkeypatch.setattr(store_list, "PROXY_PAGE_SIZE", 10)
+    monkeypatch.setattr(store_list, "fetch_store_page", failing)
+    pages = store_list.AllPages({"cx": "127.08", "cy": "37.54", "radius": "500", "indsMclsCd": "I212"})
+    body = json.loads("".join(pages.iter_json()))["body"]
+    assert body["numOfRows"] == len(body["items"]) == 20
+    assert body["truncated"] is True
+    assert "error" in body
+
+
+def test_page_threads_record_into_request_trace(monkeypatch, client):
+    calls = []
+    fetch = fake_pages(35, 10)
+
+    def traced(params):
+        calls.append((params["pageNo"], current_trace()))
+        return fetch(params)
+
+    monkeypatch.setattr(store_list, "PROXY_PAGE_SIZE", 10)
+    monkeypatch.setattr(store_list, "fetch_store_page", traced)
+    # 본문은 Flask 가 요청을 끝내고(teardown 에서 trace 를 지운 뒤) 읽는다
+    response = client.get("/api/proxy?all=1&cx=127.08&cy=37.54&radius=500&indsMclsCd=I212")
+    body = json.loads(response.get_data())["body"]
+    assert body["numOfRows"] == 35
+
+    assert sorted(page for page, _ in calls) == [1, 2, 3, 4]
+    request_trace = dict(calls)[1]
+    assert request_trace is not None
+    # 2~4페이지는 페이지 스레드에서 받았지만 같은 요청 trace 에 더해진다
+    assert all(trace is request_trace for _, trace in calls)
+    assert request_trace.totals()["upstream_fetch"] >= 4 * 0.001
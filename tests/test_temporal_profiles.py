@@ -0,0 +1,68 @@
+"""
+TemporalProfileIndex + apply_temporal_profile 이 요청마다 하던
+get_sales_distribution_basis → dropna → apply_temporal_corrections 와 같은 값을 내는지
+"""
+import numpy as np
+import pytest
+
+DAY_SETS = [
+    ["월", "화", "수", "목", "금"],
+    ["토", "일"],
+    ["월", "화", "수", "목", "금", "토", "일"],
+    ["수", "수"],
+    [],
+]
+TIME_RANGES = [(6, 14), (0, 24), (22, 23), (17, 30)]
+
+
+def basis_for(bojeong, df, area, category):
+    return bojeong.get_sales_distribution_basis(df, area, category).dropna(subset=["점포_당_매출_금액"])
+
+
+def combos(df):
+    pairs = list(df[["상권_코드_명", "서비스_업종_코드_명"]].drop_duplicates().itertuples(index=False, name=None))
+    # 데이터가 아예 없는 조합도 포함
+    return pairs + [("없는 상권", "커피-음료")]
+
+
+@pytest.fixture(scope="module")
+def sparse_df(area_df):
+    """요일/시간대 매출에 결측이 섞이고 시간대 컬럼 하나가 없는 데이터 (safe_sum 경로)"""
+    df = area_df.copy()
+    rng = np.random.default_rng(1)
+    for col in ["월요일_매출_금액", "토요일_매출_금액", "시간대_11_14_매출_금액"]:
+        df.loc[rng.random(len(df)) < 0.3, col] = np.nan
+    return df.drop(columns=["시간대_21_24_매출_금액"])
+
+
+@pytest.fixture(scope="module", params=["area_df", "sparse_df"])
+def case(request, bojeong):
+    """(프로필 인덱스, {(상권, 업종): 기존 방식 basis})"""
+    df = request.getfixturevalue(request.param)
+    bases = {(area, category): basis_for(bojeong, df, area, category) for area, category in combos(df)}
+    return bojeong.build_temporal_profiles(df), bases
+
+
+def test_counts_match_basis_rows(case):
+    profiles, bases = case
+    for (area, category), basis in bases.items():
+        assert profiles.count(area, category) == len(basis)
+
+
+@pytest.mark.parametrize("days", DAY_SETS)
+@pytest.mark.parametrize("time_range", TIME_RANGES)
+def test_profile_matches_per_request_corrections(bojeong, case, days, time_range):
+    profiles, bases = case
+    start_time, end_time = time_range
+    weights = bojeong.temporal_weights(days, start_time, end_time)
+
+    checked = 0
+    for (area, category), basis in bases.items():
+        if len(basis) == 0:
+            assert profiles.lookup(area, category) is None
+            continue
+        expected = bojeong.apply_temporal_corrections(12_345_678.0, basis, days, start_time, end_time)
+        actual = bojeong.apply_temporal_profile(12_345_678.0, profiles, profiles.lookup(area, category), weights)
+        assert actual == pytest.approx(expected, rel=1e-12, abs=1e-6)
+        checked += 1
+    assert checked > 100
@@ -0,0 +1,177 @@
+"""
+예측 풀: 요청 스레드 기준 과부하 차단, 스트림 작업, 마감에 맞춘 주변 탐색 중단
+"""
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+from bench.requests_gen import RequestGenerator
+from predictor import change_encoder_for, find_nearest_area, predict_batch, score_neighbours
+from registry import INDUSTRY_CODE_MAP
+from workers import Deadline, Overloaded, StreamJob, WorkerPool, wait_timeout
+
+
+def test_admission_limited_by_request_slots():
+    pool = WorkerPool(workers=2, queue_max=16, retry_after=3, request_slots=3)
+    assert pool.stats()["max_pending"] == 3
+    release = threading.Event()
+    futures = [pool.submit(release.wait, 5) for _ in range(3)]
+    with pytest.raises(Overloaded) as e:
+        pool.submit(release.wait, 5)
+    assert e.value.retry_after == 3
+    release.set()
+    for future in futures:
+        assert future.result(5)
+    assert pool.submit(lambda: "ok").result(5) == "ok"
+    stats = pool.stats()
+    assert (stats["submitted"], stats["rejected"]) == (4, 1)
+
+
+def test_admission_without_request_slots():
+    assert WorkerPool(workers=2, queue_max=3).stats()["max_pending"] == 5
+    # 요청 스레드가 예약분보다 적어도 워커 수만큼은 받는다
+    assert WorkerPool(workers=2, queue_max=3, request_slots=0).stats()["max_pending"] == 2
+
+
+def test_admission_floor_with_few_request_threads():
+    # --threads 4, 예약 2 → 요청 슬롯 2 지만 워커 4개 + 대기 2개까지는 받는다
+    pool = WorkerPool(workers=4, queue_max=16, request_slots=2, min_queue=2)
+    assert pool.stats()["max_pending"] == 6
+    # 대기열이 min_queue 보다 짧으면 workers + queue_max 가 상한
+    assert WorkerPool(workers=4, queue_max=1, request_slots=2, min_queue=2).stats()["max_pending"] == 5
+    # 요청 스레드가 넉넉하면 슬롯 수까지
+    pool.set_request_slots(10)
+    assert pool.stats()["max_pending"] == 10
+
+
+def test_wait_timeout():
+    assert wait_timeout(None) is None
+    assert wait_timeout(Deadline(-1), slack_ms=500) == 0.0
+    assert 0.9 < wait_timeout(Deadline(1), slack_ms=0) <= 1.0
+
+
+def test_stream_job_results_and_end():
+    pool = WorkerPool(workers=1, queue_max=0)
+    job = pool.submit_stream(lambda n: iter(range(n)), 3)
+    assert [job.next(timeout=5) for _ in range(3)] == [0, 1, 2]
+    with pytest.raises(StopIteration):
+        job.next(timeout=5)
+
+
+def test_stream_job_timeout_and_cancel():
+    release = threading.Event()
+    produced = []
+
+    def slow():
+        for k in range(3):
+            release.wait(5)
+            produced.append(k)
+            yield k
+
+    job = StreamJob()
+    thread = threading.Thread(target=job.run, args=(slow,))
+    thread.start()
+    with pytest.raises(FutureTimeoutError):
+        job.next(timeout=0.01)
+    job.cancel()
+    release.set()
+    thread.join(5)
+    # 취소 뒤에 나온 결과는 넘기지 않고 멈춘다
+    assert produced == [0]
+
+
+def test_stream_job_error():
+    def failing():
+        yield 1
+        raise RuntimeError("boom")
+
+    job = StreamJob()
+    job.run(failing)
+    assert job.next(timeout=1) == 1
+    with pytest.raises(RuntimeError):
+        job.next(timeout=1)
+
+
+def neighbour_case(snap, seed=0):
+    gen = RequestGenerator(seed=seed)
+    while True:
+        req = gen.predict()
+        category = INDUSTRY_CODE_MAP[req["indsMclsCd"]]
+        nearest, _ = find_nearest_area(snap, req["lat"], req["lon"])
+        if snap.profiles.count(nearest["상권_코드_명"], category):
+            weights = snap.bojeong.temporal_weights(req["day_of_week"], 9, 18)
+            return (snap, snap.model_for(category), change_encoder_for(snap, category), category,
+                    req["lat"], req["lon"], 1e7, weights)
+
+
+def test_chunked_grid_matches_single_pass(snap):
+    args = neighbour_case(snap)
+    full = score_neighbours(*args, radius=300, step=30, chunk_points=10_000)
+    assert full
+    assert score_neighbours(*args, radius=300, step=30, chunk_points=37) == full
+    assert score_neighbours(*args, radius=300, step=30, chunk_points=37, deadline=Deadline(60)) == full
+
+
+class ExpiresAfter(Deadline):
+    """expired() 를 checks 번 부른 뒤부터 지난 것으로 보는 마감"""
+
+    def __init__(self, checks):
+        super().__init__(60)
+        self.checks = checks
+
+    def expired(self):
+        self.checks -= 1
+        return self.checks < 0
+
+
+def test_grid_stops_at_deadline(snap):
+    args = neighbour_case(snap)
+    full = score_neighbours(*args, radius=300, step=30)
+    deadline = ExpiresAfter(1)
+    partial = score_neighbours(*args, radius=300, step=30, chunk_points=50, deadline=deadline)
+    assert deadline.was_cut
+    # 첫 덩어리(가장 가까운 점들)만 채점하고 멈춘다
+    assert 0 < len(partial) <= 50
+    assert max(r["dist"] for r in partial) <= min(r["dist"] for r in full if r not in partial)
+    assert all(r in full for r in partial)
+
+
+def test_default_grid_checks_deadline_before_inference(snap):
+    # 기본 격자는 한 덩어리라 덩어리 사이 확인이 없다: 모델 채점 전에 확인해서 채점 없이 끝난다
+    args = neighbour_case(snap)
+    deadline = Deadline(-1)
+    assert score_neighbours(*args, radius=300, step=30, deadline=deadline) == []
+    assert deadline.was_cut
+
+
+def batch_items(seed, count):
+    gen = RequestGenerator(seed=seed)
+    items = []
+    while len(items) < count:
+        req = gen.predict()
+        items.append({"lat": req["lat"], "lon": req["lon"], "category": INDUSTRY_CODE_MAP[req["indsMclsCd"]],
+                      "selected_days": req["day_of_week"], "start_time": 9, "end_time": 18,
+                      "store_count": req["store_count"]})
+    return items
+
+
+def test_batch_items_get_their_own_deadline(snap):
+    # 항목 마감을 주면 배치 공용 마감이 지나도 항목마다 새 마감으로 주변 탐색을 끝까지 한다
+    items = batch_items(2, 4)
+    outcomes = list(predict_batch(snap, items, deadline=Deadline(-1), item_deadline_ms=60_000))
+    ok = [result for result, status in outcomes if status == 200]
+    assert ok and any(result["추천위치"] for result in ok)
+    assert not any(result.get("주변탐색중단") for result in ok)
+    assert outcomes == list(predict_batch(snap, items))
+
+
+def test_batch_marks_items_after_deadline(snap):
+    items = batch_items(2, 4)
+    outcomes = list(predict_batch(snap, items, deadline=Deadline(-1)))
+    ok = [result for result, status in outcomes if status == 200]
+    assert ok
+    for result in ok:
+        assert result["주변탐색중단"] is True
+        assert result["추천위치"] == []
+        assert "입력위치" in result
@@ -0,0 +1,150 @@
+"""
+🌳 XGBoost 트리 앙상블을 numpy 로 채점
+
+산출물 경로는 모델을 xgboost 없이 쓴다. xgboost 는 import 만으로 sklearn/scipy 까지 끌어와서
+콜드 스타트의 대부분(~2s)을 차지하기 때문이다. 빌드 때 부스터의 트리를 노드 배열로 펼쳐 두고,
+서버는 그 배열을 mmap 으로 열어 행렬 연산으로 트리를 따라간다.
+
+XGBoost 와 같은 결과를 내도록 맞춘 부분:
+- 분기: float32 값 < 기준 → 왼쪽, NaN → 노드의 기본 방향
+- 합산: base_score 에서 시작해서 트리 순서대로 float32 누적
+"""
+import json
+import math
+
+import numpy as np
+
+# 예측값이 base_score + 잎 값 합 그대로인 objective 만 지원
+IDENTITY_OBJECTIVES = {"reg:squarederror", "reg:absoluteerror", "reg:pseudohubererror"}
+
+# 한 번에 따라가는 행 수 (행 × 트리 배열이 캐시에 머물 정도)
+PREDICT_CHUNK_ROWS = 256
+
+
+def parse_base_score(value):
+    # xgboost 3.x 는 "[2.39E7]" 처럼 벡터 문자열로 저장한다
+    return float(value.strip("[]"))
+
+
+class TreeEnsemble:
+    """
+    회귀 부스터의 트리들을 이어 붙인 노드 배열 (XGBRegressor 처럼 predict, feature_names_in_)
+    - roots: 트리별 루트 노드 번호
+    - left: 왼쪽 자식 (오른쪽 = 왼쪽 + 1), 잎이면 -1
+    - feature/threshold: 분기 피처와 기준 (잎이면 threshold 자리에 잎 값)
+    - default_left: 값이 NaN 일 때 왼쪽으로 가는지
+    """
+
+    ARRAYS = ("roots", "left", "feature", "threshold", "default_left")
+
+    def __init__(self, feature_names, base_score, roots, left, feature, threshold, default_left):
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.base_score = np.float32(base_score)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+
+        n_features = len(self.feature_names_in_)
+        leaf = self.left == -1
+        nodes = np.arange(len(self.left), dtype=np.int32)
+        # 잎은 자기 자신으로 돌아오게 해서 모든 트리를 같은 횟수만큼 따라간다 (+inf 와 비교 → 항상 왼쪽)
+        self._next = np.where(leaf, nodes, self.left).astype(np.int32)
+        self._compare = np.where(leaf, np.inf, self.threshold).astype(np.float32)
+        # NaN 은 기본 방향에 따라 -inf(왼쪽) / +inf(오른쪽) 로 바꾼 사본 중 하나를 본다
+        self._column = np.where(leaf, 0, self.feature + np.where(self.default_left, 0, n_features)).astype(np.int32)
+        self.max_depth = self._max_depth()
+
+    def _max_depth(self):
+        depth, frontier = 0, self.roots
+        while True:
+            children = self.left[frontier]
+            children = children[children != -1]
+            if len(children) == 0:
+                return depth
+            frontier = np.concatenate([children, children + 1])
+            depth += 1
+
+    @classmethod
+    def from_model(cls, model):
+        """XGBRegressor → TreeEnsemble (predict 와 같은 트리 범위: early stopping 모델이면 best_iteration 까지)"""
+        if not math.isnan(getattr(model, "missing", math.nan)):
+            raise ValueError("missing 이 NaN 이 아닌 모델은 지원하지 않습니다.")
+        learner = json.loads(model.get_booster().save_raw("json"))["learner"]
+        objective = learner["objective"]["name"]
+        if objective not in IDENTITY_OBJECTIVES:
+            raise ValueError(f"지원하지 않는 objective: {objective}")
+        if int(learner["learner_model_param"].get("num_target", "1")) > 1:
+            raise ValueError("다중 출력 모델은 지원하지 않습니다.")
+        booster = learner["gradient_booster"]
+        if booster["name"] != "gbtree":
+            raise ValueError(f"지원하지 않는 부스터: {booster['name']}")
+
+        trees = booster["model"]["trees"]
+        try:
+            end = int(model.best_iteration) + 1
+        except AttributeError:
+            end = None
+        if end is not None:
+            indptr = booster["model"].get("iteration_indptr")
+            per_iteration = int(booster["model"]["gbtree_model_param"]["num_parallel_tree"])
+            trees = trees[:indptr[end]] if indptr else trees[:end * per_iteration]
+
+        roots, left, feature, threshold, default_left = [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            if any(tree["split_type"]):
+                raise ValueError("범주형 분기가 있는 모델은 지원하지 않습니다.")
+            children = np.asarray(tree["left_children"], dtype=np.int64)
+            if np.any((children != -1) & (np.asarray(tree["right_children"]) != children + 1)):
+                raise ValueError("오른쪽 자식이 왼쪽 자식 바로 다음이 아닌 트리는 지원하지 않습니다.")
+            roots.append(offset)
+            left.append(np.where(children == -1, -1, children + offset))
+            feature.append(tree["split_indices"])
+            threshold.append(np.asarray(tree["split_conditions"], dtype=np.float32))
+            default_left.append(tree["default_left"])
+            offset += len(children)
+
+        return cls(
+            learner["feature_names"], parse_base_score(learner["learner_model_param"]["base_score"]),
+            roots, np.concatenate(left), np.concatenate(feature), np.concatenate(threshold),
+            np.concatenate(default_left).astype(bool),
+        )
+
+    def split_conditions(self):
+        """피처별 분기 기준 목록 (잎 제외)"""
+        split = self.left != -1
+        return [self.threshold[split & (self.feature == j)] for j in range(len(self.feature_names_in_))]
+
+    def predict(self, X):
+        if hasattr(X, "columns"):
+            # XGBoost 의 validate_features 처럼 학습 때 컬럼 순서와 같은지 확인
+            if list(X.columns) != list(self.feature_names_in_):
+                raise ValueError("feature_names mismatch: 입력 컬럼이 모델 학습 때와 다릅니다.")
+            X = X.to_numpy(dtype=np.float32)
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty(len(X), dtype=np.float32)
+        for start in range(0, len(X), PREDICT_CHUNK_ROWS):
+            out[start:start + PREDICT_CHUNK_ROWS] = self._predict_chunk(X[start:start + PREDICT_CHUNK_ROWS])
+        return out
+
+    def _predict_chunk(self, X):
+        n_rows, n_features = X.shape
+        missing = np.isnan(X)
+        values = np.empty((n_rows, 2 * n_features), dtype=np.float32)
+        values[:, :n_features] = np.where(missing, -np.inf, X)
+        values[:, n_features:] = np.where(missing, np.inf, X)
+        values = values.ravel()
+        row_offset = (np.arange(n_rows, dtype=np.int32) * (2 * n_features))[:, None]
+
+        node = np.broadcast_to(self.roots, (n_rows, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = np.take(values, row_offset + np.take(self._column, node))
+            node = np.take(self._next, node) + (x >= np.take(self._compare, node)).view(np.int8)
+
+        # XGBoost 처럼 base_score 부터 트리 순서대로 float32 로 더한다 (cumsum 은 순차 누적)
+        leaves = np.empty((n_rows, len(self.roots) + 1), dtype=np.float32)
+        leaves[:, 0] = self.base_score
+        np.take(self.threshold, node, out=leaves[:, 1:])
+        return np.cumsum(leaves, axis=1, dtype=np.float32)[:, -1]
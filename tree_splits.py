@@ -0,0 +1,37 @@
+"""
+🌲 트리 모델의 분기 기준 색인
+
+XGBoost 트리는 피처 값을 분기 기준과 비교(값 < 기준 → 왼쪽, NaN → 기본 방향)만 한다.
+그래서 모든 피처가 모델의 모든 분기 기준에 대해 같은 쪽에 있는 두 행은 모든 트리에서 같은 잎을 지나고
+예측값도 비트 단위로 같다. path_keys() 는 행마다 피처 값이 분기 기준 몇 개 이상인지를 돌려주므로,
+키가 같은 행들은 그중 하나만 채점해도 된다 (적응형 주변 탐색).
+
+비교는 XGBoost 와 같이 float32 로 한다 (피처 저장소 행렬이 float32).
+"""
+import numpy as np
+
+from tree_ensemble import TreeEnsemble
+
+
+class SplitIndex:
+    def __init__(self, thresholds):
+        # 피처별 분기 기준 (정렬된 float32, 중복 없음)
+        self.thresholds = thresholds
+
+    @classmethod
+    def from_model(cls, model):
+        """XGBRegressor 또는 TreeEnsemble → SplitIndex (예측에 쓰는 모든 트리의 분기 기준)"""
+        ensemble = model if isinstance(model, TreeEnsemble) else TreeEnsemble.from_model(model)
+        return cls([np.unique(values) for values in ensemble.split_conditions()])
+
+    def path_keys(self, X, columns):
+        """
+        X 의 columns 열마다 값 이상인 분기 기준 개수 (NaN 은 -1) → (N, len(columns)) 정수 배열
+        """
+        X = np.asarray(X, dtype=np.float32)
+        keys = np.empty((len(X), len(columns)), dtype=np.int64)
+        for k, j in enumerate(columns):
+            values = X[:, j]
+            keys[:, k] = np.searchsorted(self.thresholds[j], values, side="right")
+            keys[np.isnan(values), k] = -1
+        return keys
@@ -0,0 +1,119 @@
+"""
+🌐 공공데이터 API(상가업소 정보) 업스트림 클라이언트
+
+워커 프로세스당 하나의 PoolManager 를 두고 SSL 컨텍스트와 keep-alive 커넥션을 재사용한다.
+PoolManager 는 스레드 안전하므로 요청 스레드들이 그대로 공유한다.
+gunicorn --preload 로 fork 된 경우 부모의 소켓을 물려받지 않도록 pid 가 바뀌면 새로 만든다.
+"""
+import os
+import ssl
+import threading
+from urllib.parse import urlencode
+
+import urllib3
+
+SERVICE_KEY = "rA86OMjx7TmsRL+UAjovPORxHyyDJZxd6dIPJyKlqbPZzNo5fetvxLXhZ/MPki0fWIgUPGXq0thGIvFG5BmTZg=="
+# 벤치마크 등에서 로컬 스텁으로 바꿀 수 있다
+STORE_LIST_URL = os.environ.get(
+    "STORE_LIST_URL", "https://apis.data.go.kr/B553077/api/open/sdsc2/storeListInRadius"
+)
+
+# ⚙️ 풀/타임아웃/재시도 설정 (환경 변수로 조정)
+POOL_MAXSIZE = int(os.environ.get("UPSTREAM_POOL_MAXSIZE", "10"))
+NUM_POOLS = int(os.environ.get("UPSTREAM_NUM_POOLS", "4"))
+POOL_BLOCK = os.environ.get("UPSTREAM_POOL_BLOCK", "0") == "1"
+CONNECT_TIMEOUT = float(os.environ.get("UPSTREAM_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.environ.get("UPSTREAM_READ_TIMEOUT", "10"))
+RETRIES = int(os.environ.get("UPSTREAM_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.environ.get("UPSTREAM_BACKOFF", "0.3"))
+
+
+class UpstreamError(Exception):
+    """업스트림이 200 이 아닌 응답을 준 경우"""
+
+    def __init__(self, status):
+        super().__init__(f"upstream status {status}")
+        self.status = status
+
+
+def make_ssl_context():
+    ctx = ssl.create_default_context()
+    ctx.set_ciphers("DEFAULT:@SECLEVEL=1")
+    return ctx
+
+
+def idle_connections(pool):
+    # 풀 큐에는 아직 열지 않은 자리(None)도 들어 있으므로 실제 커넥션만 센다
+    if pool.pool is None:
+        return 0
+    return sum(1 for conn in list(pool.pool.queue) if conn is not None)
+
+
+class UpstreamClient:
+    def __init__(self, maxsize=POOL_MAXSIZE, num_pools=NUM_POOLS, block=POOL_BLOCK,
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 retries=RETRIES, backoff_factor=BACKOFF_FACTOR):
+        self.maxsize = maxsize
+        # GET 만 재시도 (연결 실패, 읽기 실패, 게이트웨이 계열 응답)
+        retry = urllib3.Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        self.http = urllib3.PoolManager(
+            num_pools=num_pools,
+            maxsize=maxsize,
+            block=block,
+            ssl_context=make_ssl_context(),
+            timeout=urllib3.Timeout(connect=connect_timeout, read=read_timeout),
+            retries=retry,
+            headers={"Connection": "keep-alive"},
+        )
+
+    def get(self, base_url, params):
+        full_url = f"{base_url}?{urlencode(params)}"
+        return full_url, self.http.request("GET", full_url)
+
+    def stats(self):
+        """
+        호스트별 커넥션 풀 상태 (num_connections 는 새로 맺은 커넥션 수,
+        num_requests 대비 비율로 재사용률을 본다)
+        """
+        pools = []
+        for key in list(self.http.pools.keys()):
+            pool = self.http.pools.get(key)
+            if pool is None:
+                continue
+            requests = pool.num_requests
+            connections = pool.num_connections
+            pools.append({
+                "host": pool.host,
+                "port": pool.port,
+                "requests": requests,
+                "new_connections": connections,
+                "idle_connections": idle_connections(pool),
+                "maxsize": self.maxsize,
+                "reuse_rate": round(1 - connections / requests, 4) if requests else None,
+            })
+        return {"pid": os.getpid(), "pools": pools}
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = UpstreamClient()
+                _client_pid = pid
+    return _client
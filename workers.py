@@ -0,0 +1,259 @@
+"""
+🧵 예측 전용 작업 풀 / 요청 마감 시간 / 과부하 차단
+
+/api/predict 의 CPU 작업(피처 조립, XGBoost predict, 주변 탐색)은 요청 스레드가 아니라
+크기가 정해진 스레드 풀에서 돈다. XGBoost/numpy 는 계산 중 GIL 을 놓으므로 스레드로 충분하고,
+워커들이 같은 프로세스의 스냅샷(모델/피처 저장소)을 그대로 쓴다.
+
+- 실행 중 + 대기 중 작업이 상한을 넘으면 Overloaded (→ 503 + Retry-After).
+  예측 요청은 결과를 기다리는 동안 gunicorn 요청 스레드를 하나씩 잡고 있으므로, 상한은
+  workers + queue_max 와 (요청 스레드 수 - /api/proxy 몫으로 남겨 둘 스레드 수) 중 작은 값이다.
+  그래야 예측이 몰려도 요청 스레드가 다 막히기 전에 503 이 나가고 /api/proxy 는 계속 처리된다.
+  단 상한은 workers + PREDICT_MIN_QUEUE 아래로 내려가지 않는다 (스레드가 적다고 워커를 놀리지 않게).
+  그래서 요청 스레드는 PREDICT_WORKERS + PREDICT_MIN_QUEUE + PROXY_RESERVED_THREADS 개는 있어야
+  /api/proxy 몫이 남는다. gunicorn.conf.py 는 threads 를 그만큼 올리고, --threads 로 더 적게 띄우면
+  워커마다 실제 스레드 수로 상한을 다시 잡고 경고를 남긴다
+- Deadline: 요청마다 마감 시각. 주변 탐색은 마감이 지나면 멈추고 그때까지의 결과(없으면 입력 위치만)를 돌려준다.
+  요청 스레드도 마감 + 여유(PREDICT_DEADLINE_SLACK_MS) 까지만 기다리고 그 뒤에는 503 으로 끝낸다.
+  /api/predict/batch 는 항목마다 주변 탐색 마감(PREDICT_BATCH_ITEM_DEADLINE_MS)을 따로 둔다
+- 작업은 제출한 요청의 contextvars 안에서 실행되므로 stage() 시간이 그 요청의 Server-Timing 에 그대로 쌓인다
+
+    PREDICT_WORKERS=4             (기본: CPU 수)
+    PREDICT_QUEUE_MAX=16          대기열 길이 (넘치면 바로 503)
+    PREDICT_DEADLINE_MS=5000      (0 이면 마감 없음)
+    PREDICT_DEADLINE_SLACK_MS=500 마감 뒤 결과를 더 기다리는 시간
+    PREDICT_BATCH_ITEM_DEADLINE_MS=1000  일괄 예측 항목 하나의 주변 탐색 마감 (0 이면 마감 없음)
+    PREDICT_RETRY_AFTER=1         503 응답의 Retry-After (초)
+    REQUEST_THREADS=8             gunicorn 워커당 요청 스레드 수 (gunicorn.conf.py 의 threads)
+    PROXY_RESERVED_THREADS=2      예측이 쓰지 못하게 남겨 둘 요청 스레드 수
+    PREDICT_MIN_QUEUE=2           요청 스레드가 적어도 예측 상한은 workers + 이 값 이상
+"""
+import contextvars
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from metrics import current_trace, record_stage
+
+PREDICT_WORKERS = int(os.environ.get("PREDICT_WORKERS", str(os.cpu_count() or 1)))
+PREDICT_QUEUE_MAX = int(os.environ.get("PREDICT_QUEUE_MAX", "16"))
+PREDICT_DEADLINE_MS = float(os.environ.get("PREDICT_DEADLINE_MS", "5000"))
+PREDICT_DEADLINE_SLACK_MS = float(os.environ.get("PREDICT_DEADLINE_SLACK_MS", "500"))
+PREDICT_BATCH_ITEM_DEADLINE_MS = float(os.environ.get("PREDICT_BATCH_ITEM_DEADLINE_MS", "1000"))
+PREDICT_RETRY_AFTER = int(os.environ.get("PREDICT_RETRY_AFTER", "1"))
+REQUEST_THREADS = int(os.environ.get("REQUEST_THREADS", "8"))
+PROXY_RESERVED_THREADS = int(os.environ.get("PROXY_RESERVED_THREADS", "2"))
+PREDICT_MIN_QUEUE = int(os.environ.get("PREDICT_MIN_QUEUE", "2"))
+
+
+class Overloaded(Exception):
+    """대기열이 가득 차서 작업을 받지 않은 경우"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"worker pool is full (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+class Deadline:
+    """
+    요청 마감 시각 (time.monotonic 기준). 작업 쪽에서 expired() 를 보고 멈췄으면 cut() 으로 표시한다.
+    """
+
+    def __init__(self, seconds):
+        self.at = time.monotonic() + seconds
+        self.was_cut = False
+
+    @classmethod
+    def after_ms(cls, ms):
+        return cls(ms / 1000) if ms > 0 else None
+
+    def remaining(self):
+        return self.at - time.monotonic()
+
+    def expired(self):
+        return time.monotonic() >= self.at
+
+    def cut(self):
+        self.was_cut = True
+
+
+def wait_timeout(deadline, slack_ms=PREDICT_DEADLINE_SLACK_MS):
+    """요청 스레드가 작업 결과를 기다릴 최대 시간 (초, 마감이 없으면 None)"""
+    if deadline is None:
+        return None
+    return max(0.0, deadline.remaining() + slack_ms / 1000)
+
+
+class StreamJob:
+    """
+    풀에서 도는 제너레이터의 결과를 요청 스레드로 하나씩 넘기는 큐.
+    요청 스레드는 next(timeout) 으로 받고, 끝까지 안 받고 떠나면 cancel() 로 작업을 멈춘다.
+    """
+
+    _DONE = object()
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._cancelled = threading.Event()
+
+    def run(self, fn, *args, **kwargs):
+        if self._cancelled.is_set():
+            return
+        try:
+            for item in fn(*args, **kwargs):
+                if self._cancelled.is_set():
+                    return
+                self._queue.put((item, None))
+        except Exception as e:
+            self._queue.put((None, e))
+            return
+        self._queue.put((self._DONE, None))
+
+    def next(self, timeout=None):
+        """
+        다음 결과 (끝났으면 StopIteration, timeout 안에 안 오면 Future.result 와 같은 TimeoutError,
+        작업 예외는 그대로)
+        """
+        try:
+            item, error = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            raise FutureTimeoutError from None
+        if error is not None:
+            raise error
+        if item is self._DONE:
+            raise StopIteration
+        return item
+
+    def cancel(self):
+        self._cancelled.set()
+
+
+class WorkerPool:
+    """
+    크기가 정해진 스레드 풀 + 대기열 상한.
+    gunicorn --preload 로 fork 된 워커에는 부모의 스레드가 없으므로 pid 가 바뀌면 새로 만든다.
+    request_slots: 작업을 기다리며 요청 스레드를 잡고 있을 수 있는 요청 수 (None 이면 제한 없음)
+    min_queue: request_slots 가 작아도 상한을 workers + min_queue 아래로는 줄이지 않는다
+    """
+
+    def __init__(self, workers, queue_max, retry_after=PREDICT_RETRY_AFTER, name="worker", request_slots=None,
+                 min_queue=0):
+        self.workers = max(1, workers)
+        self.queue_max = max(0, queue_max)
+        self.min_queue = max(0, min_queue)
+        self.retry_after = retry_after
+        self.name = name
+        self.request_slots = request_slots
+        self.max_pending = self._admission_limit(request_slots)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.deadline_cuts = 0
+        self.timeouts = 0
+
+    def _admission_limit(self, request_slots):
+        limit = self.workers + self.queue_max
+        if request_slots is not None:
+            floor = self.workers + min(self.queue_max, self.min_queue)
+            limit = min(limit, max(request_slots, floor))
+        return limit
+
+    def set_request_slots(self, request_slots):
+        """요청 스레드 수가 정해진 뒤(gunicorn post_fork) 상한을 다시 잡는다"""
+        with self._lock:
+            self.request_slots = request_slots
+            self.max_pending = self._admission_limit(request_slots)
+
+    def _get_executor(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            # 호출부가 self._lock 을 잡고 있다
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+            self._pid = pid
+            self._pending = 0
+            self._running = 0
+        return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        fn(*args, **kwargs) 를 풀에 넣고 Future 반환 (가득 차 있으면 Overloaded)
+        """
+        with self._lock:
+            executor = self._get_executor()
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise Overloaded(self.retry_after)
+            self._pending += 1
+            self.submitted += 1
+        context = contextvars.copy_context()
+        enqueued = time.perf_counter()
+
+        def run():
+            with self._lock:
+                self._running += 1
+            try:
+                # ⏳ 대기열에서 기다린 시간도 요청 단계로 기록
+                record_stage("queue", time.perf_counter() - enqueued)
+                trace = current_trace()
+                profiler = trace.profiler if trace is not None else None
+                if profiler is None:
+                    return fn(*args, **kwargs)
+                # 🔬 요청을 프로파일링 중이면 실제 계산하는 이 스레드도 샘플링
+                thread_id = threading.get_ident()
+                profiler.follow(thread_id)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    profiler.unfollow(thread_id)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._pending -= 1
+
+        try:
+            return executor.submit(context.run, run)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    def submit_stream(self, fn, *args, **kwargs):
+        """제너레이터 fn 을 풀에서 돌리고 결과를 받을 StreamJob 반환 (가득 차 있으면 Overloaded)"""
+        job = StreamJob()
+        self.submit(job.run, fn, *args, **kwargs)
+        return job
+
+    def record_cut(self):
+        with self._lock:
+            self.deadline_cuts += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_max": self.queue_max,
+                "max_pending": self.max_pending,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "deadline_cuts": self.deadline_cuts,
+                "timeouts": self.timeouts,
+            }
+
+
+predict_pool = WorkerPool(
+    PREDICT_WORKERS, PREDICT_QUEUE_MAX, name="predict", request_slots=REQUEST_THREADS - PROXY_RESERVED_THREADS,
+    min_queue=PREDICT_MIN_QUEUE,
+)
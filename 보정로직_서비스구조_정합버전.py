@@ -1,3 +1,14 @@
+import numpy as np
+
+WEEKDAYS = ['월', '화', '수', '목', '금', '토', '일']
+DEFINED_TIMES = {
+    "시간대_00_06": (0, 6), "시간대_06_11": (6, 11),
+    "시간대_11_14": (11, 14), "시간대_14_17": (14, 17),
+    "시간대_17_21": (17, 21), "시간대_21_24": (21, 24)
+}
+DAY_COLUMNS = [f"{day}요일_매출_금액" for day in WEEKDAYS]
+TIME_COLUMNS = [f"{col}_매출_금액" for col in DEFINED_TIMES]
+
 
 def get_sales_distribution_basis(df, area_name: str, category: str):
     """
@@ -14,17 +25,13 @@ def apply_temporal_corrections(predicted_sales, df_basis, selected_days, start_t
     """
     선택된 요일/시간대에 따라 매출 예측값을 보정
     """
-    defined_times = {
-        "시간대_00_06": (0, 6), "시간대_06_11": (6, 11),
-        "시간대_11_14": (11, 14), "시간대_14_17": (14, 17),
-        "시간대_17_21": (17, 21), "시간대_21_24": (21, 24)
-    }
+    defined_times = DEFINED_TIMES
 
     def safe_sum(df, col):
         return df[col].fillna(0).sum() if col in df.columns else 0
 
     # 요일 기반 보정
-    total_weekly_sales = sum([safe_sum(df_basis, f"{day}요일_매출_금액") for day in ['월', '화', '수', '목', '금', '토', '일']])
+    total_weekly_sales = sum([safe_sum(df_basis, f"{day}요일_매출_금액") for day in WEEKDAYS])
     selected_sales = sum([safe_sum(df_basis, f"{day}요일_매출_금액") for day in selected_days])
     if total_weekly_sales > 0:
         ratio = selected_sales / total_weekly_sales
@@ -46,3 +53,86 @@ def apply_temporal_corrections(predicted_sales, df_basis, selected_days, start_t
         predicted_sales *= ratio
 
     return predicted_sales
+
+
+class TemporalProfileIndex:
+    """
+    상권+업종별 매출 분포 요약 인덱스 (로드 시 한 번 계산)
+
+    (상권_코드_명, 서비스_업종_코드_명) → 행 번호로 찾고, 각 행에는
+    점포_당_매출_금액 이 있는 데이터 수와 요일 7개 + 시간대 6개 매출 합계가 들어 있다.
+    """
+
+    def __init__(self, keys, counts, day_sums, time_sums):
+        self.index = {key: i for i, key in enumerate(keys)}
+        self.counts = counts
+        self.day_sums = day_sums
+        self.time_sums = time_sums
+
+    def lookup(self, area_name, category):
+        return self.index.get((area_name, category))
+
+    def count(self, area_name, category):
+        i = self.lookup(area_name, category)
+        return 0 if i is None else int(self.counts[i])
+
+
+def build_temporal_profiles(df):
+    """
+    get_sales_distribution_basis + dropna + apply_temporal_corrections 에서 쓰는 합계를 미리 계산
+    """
+    keys = ["상권_코드_명", "서비스_업종_코드_명"]
+    df_basis = df.dropna(subset=["점포_당_매출_금액"])
+
+    # 없는 컬럼은 safe_sum 과 같이 0 으로 취급
+    sums = df_basis[keys].copy()
+    for col in DAY_COLUMNS + TIME_COLUMNS:
+        sums[col] = df_basis[col].fillna(0) if col in df_basis.columns else 0.0
+    grouped = sums.groupby(keys, sort=False)
+    totals = grouped[DAY_COLUMNS + TIME_COLUMNS].sum()
+    counts = grouped.size().reindex(totals.index)
+
+    return TemporalProfileIndex(
+        keys=list(totals.index),
+        counts=counts.to_numpy(dtype=np.int64),
+        day_sums=totals[DAY_COLUMNS].to_numpy(dtype=np.float64),
+        time_sums=totals[TIME_COLUMNS].to_numpy(dtype=np.float64),
+    )
+
+
+def temporal_weights(selected_days, start_time, end_time):
+    """
+    선택 요일/영업시간을 요일·시간대 합계에 곱할 가중치 벡터로 변환 (요청당 한 번)
+    """
+    day_weights = np.zeros(len(WEEKDAYS))
+    for day in selected_days:
+        if day in WEEKDAYS:
+            day_weights[WEEKDAYS.index(day)] += 1
+
+    time_weights = np.zeros(len(DEFINED_TIMES))
+    for i, (t_start, t_end) in enumerate(DEFINED_TIMES.values()):
+        overlap = max(0, min(end_time, t_end) - max(start_time, t_start))
+        if overlap > 0:
+            time_weights[i] = overlap / (t_end - t_start)
+    return day_weights, time_weights
+
+
+def apply_temporal_profile(predicted_sales, profiles, profile_idx, weights):
+    """
+    apply_temporal_corrections 와 같은 보정을 미리 계산된 합계로 수행 (O(1) 조회 + 내적)
+    """
+    day_weights, time_weights = weights
+
+    # 요일 기반 보정
+    day_sums = profiles.day_sums[profile_idx]
+    total_weekly_sales = day_sums.sum()
+    if total_weekly_sales > 0:
+        predicted_sales *= day_sums @ day_weights / total_weekly_sales
+
+    # 시간대 기반 보정
+    time_sums = profiles.time_sums[profile_idx]
+    total_time_sales = time_sums.sum()
+    if total_time_sales > 0:
+        predicted_sales *= time_sums @ time_weights / total_time_sales
+
+    return predicted_sales